@@ -64,6 +64,7 @@ from firedrake.nullspace import *
 from firedrake.optimizer import *
 from firedrake.parameters import *
 from firedrake.parloops import *
+from firedrake.pointevaluator import *
 from firedrake.plot import *
 from firedrake.projection import *
 from firedrake.slate import *
@@ -75,6 +76,7 @@ from firedrake.variational_solver import *
 from firedrake.vector import *
 from firedrake.version import __version__ as ver, __version_info__, check  # noqa: F401
 from firedrake.ensemble import *
+from firedrake.parareal import *
 from firedrake.randomfunctiongen import *
 
 from firedrake.logging import *
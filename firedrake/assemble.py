@@ -18,7 +18,7 @@ from firedrake.slate import slate
 from firedrake.slate import slac
 
 
-__all__ = ["assemble"]
+__all__ = ["assemble", "assemble_many", "AssemblyPlan"]
 
 
 def assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
@@ -107,6 +107,112 @@ def assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
         raise TypeError("Unable to assemble: %r" % f)
 
 
+def assemble_many(forms, tensors=None, form_compiler_parameters=None,
+                  mat_type=None, sub_mat_type=None):
+    r"""Assemble several forms, sharing mesh traversals between them.
+
+    :arg forms: a list of :class:`~ufl.classes.Form`\s.
+    :arg tensors: a list of existing tensor objects to place the
+         results in, or ``None`` for the forms whose result should be
+         a new object (optional).
+    :arg form_compiler_parameters: (optional) dict of parameters to pass to
+         the form compiler.
+    :arg mat_type: (optional) string indicating how 2-forms should be
+         assembled, see :func:`assemble`.
+    :arg sub_mat_type: (optional) string indicating the matrix type to
+         use inside a nested block matrix, see :func:`assemble`.
+    :returns: a list of the results, as returned by :func:`assemble`
+         for each form.
+
+    Forms which can be combined are assembled together, so that each
+    mesh entity is visited (and its coordinates and the coefficients
+    on it gathered) once for all of them, rather than once for each
+    form.  These are
+
+    - 0-forms on the same mesh, which are assembled as one 1-form
+      with a test function in a vector-valued `R` space, and
+    - 1-forms with the same scalar, non-mixed test function space
+      :math:`V`, which are assembled as one 1-form in a vector-valued
+      version of :math:`V`.
+
+    2-forms, and forms which can't be combined with any other, are
+    assembled separately.
+    """
+    forms = list(forms)
+    if tensors is None:
+        tensors = [None] * len(forms)
+    tensors = list(tensors)
+    if len(tensors) != len(forms):
+        raise ValueError("Need a tensor (or None) for each form")
+    for f in forms:
+        if not isinstance(f, ufl.form.Form):
+            raise TypeError("Can only assemble many forms, not %r" % f)
+
+    def fusion_key(f, tensor):
+        arguments = f.arguments()
+        if len(arguments) == 0:
+            if tensor is not None:
+                raise ValueError("Can't assemble 0-form into existing tensor")
+            return (0, f.ufl_domain())
+        if len(arguments) == 1:
+            V = arguments[0].function_space()
+            if len(V) == 1 and V.index is None and V.component is None \
+               and V.ufl_element().value_shape() == ():
+                return (1, V)
+        return None
+
+    groups = defaultdict(list)
+    for n, (f, tensor) in enumerate(zip(forms, tensors)):
+        key = fusion_key(f, tensor)
+        groups[key if key is not None else n].append(n)
+
+    results = [None] * len(forms)
+    for key, group in groups.items():
+        if len(group) == 1:
+            n, = group
+            results[n] = assemble(forms[n], tensor=tensors[n],
+                                  form_compiler_parameters=form_compiler_parameters,
+                                  mat_type=mat_type, sub_mat_type=sub_mat_type)
+            continue
+        rank, V = key
+        fused = _assemble(_fuse_forms([forms[n] for n in group], V),
+                          form_compiler_parameters=form_compiler_parameters)
+        values = fused.dat.data_ro
+        for i, n in enumerate(group):
+            if rank == 0:
+                results[n] = float(values[i])
+            else:
+                tensor = tensors[n]
+                if tensor is None:
+                    tensor = function.Function(V)
+                tensor.dat.data[:] = values[:, i]
+                results[n] = tensor
+    return results
+
+
+def _fuse_forms(forms, domain_or_space):
+    """Combine 0-forms on a mesh, or 1-forms on a scalar function
+    space, into a single 1-form on a vector-valued space, whose
+    components are the forms."""
+    from firedrake.functionspace import VectorFunctionSpace
+    from firedrake.ufl_expr import TestFunction
+    if len(forms[0].arguments()) == 0:
+        W = VectorFunctionSpace(domain_or_space, "R", 0, dim=len(forms))
+    else:
+        V = domain_or_space
+        W = VectorFunctionSpace(V.mesh(), V.ufl_element(), dim=len(forms))
+    w = TestFunction(W)
+    integrals = []
+    for i, f in enumerate(forms):
+        if len(f.arguments()) == 0:
+            integrals.extend(integral.reconstruct(integrand=integral.integrand()*w[i])
+                             for integral in f.integrals())
+        else:
+            v, = f.arguments()
+            integrals.extend(ufl.replace(f, {v: w[i]}).integrals())
+    return ufl.Form(integrals)
+
+
 def allocate_matrix(f, bcs=None, form_compiler_parameters=None,
                     inverse=False, mat_type=None, sub_mat_type=None, appctx={},
                     options_prefix=None):
@@ -150,6 +256,101 @@ def create_assembly_callable(f, tensor=None, bcs=None, form_compiler_parameters=
     return thunk
 
 
+class AssemblyPlan(object):
+    r"""A plan for assembling a form repeatedly into the same tensor.
+
+    Each call to :func:`assemble` checks the form, looks up its
+    kernels and builds the arguments of the parallel loops which
+    compute it, which can take longer than the loops themselves for
+    small problems.  An :class:`AssemblyPlan` does this work once, so
+    that executing it only runs the loops.
+
+    :arg f: a :class:`~ufl.classes.Form` or a
+        :class:`~slate.TensorBase` expression.
+    :kwarg tensor: an existing tensor object to place the result in
+        (optional, one is allocated if not supplied).  Must not be
+        supplied for 0-forms.
+    :kwarg bcs: a list of boundary conditions to apply (optional).
+    :kwarg form_compiler_parameters: (optional) dict of parameters to
+        pass to the form compiler.
+    :kwarg inverse: (optional) if f is a 2-form, then assemble the
+        inverse of the local matrices.
+    :kwarg mat_type: (optional) type for assembled matrices, one of
+        "nest", "aij" or "baij".
+    :kwarg sub_mat_type: (optional) type for assembled sub matrices
+        inside a "nest" matrix.  One of "aij" or "baij".
+    :kwarg options_prefix: PETSc options prefix to apply to matrices.
+
+    The plan refers to the coefficients of the form, rather than their
+    values, so each execution uses their current values.  To assemble
+    the form with a different coefficient, assign its values to the
+    coefficient in the form.  The boundary conditions (and the
+    subdomains they apply to) are fixed when the plan is made.
+
+    For example:
+
+    .. code-block:: python
+
+       plan = AssemblyPlan(F)
+       for t in times:
+           ...
+           b = plan.assemble()
+    """
+
+    def __init__(self, f, tensor=None, bcs=None, form_compiler_parameters=None,
+                 inverse=False, mat_type=None, sub_mat_type=None,
+                 options_prefix=None):
+        if not isinstance(f, (ufl.form.Form, slate.TensorBase)):
+            raise TypeError("Can only make an assembly plan for a form, not %r" % f)
+        if mat_type == "matfree":
+            raise ValueError("Can't make an assembly plan with matfree")
+        bcs = solving._extract_bcs(bcs)
+        rank = len(f.arguments())
+        if rank == 2:
+            if tensor is None:
+                tensor = allocate_matrix(f, bcs=bcs,
+                                         form_compiler_parameters=form_compiler_parameters,
+                                         inverse=inverse, mat_type=mat_type,
+                                         sub_mat_type=sub_mat_type,
+                                         options_prefix=options_prefix)
+            self._result = lambda: self.tensor
+        elif rank == 1:
+            if tensor is None:
+                tensor = function.Function(f.arguments()[0].function_space())
+            self._result = lambda: self.tensor
+        else:
+            if tensor is not None:
+                raise ValueError("Can't assemble 0-form into existing tensor")
+            tensor = op2.Global(1, [0.0])
+            self._result = lambda: self.tensor.data[0]
+        self.form = f
+        self.tensor = tensor
+        self.bcs = bcs
+        # Boundary conditions on vectors can't be collected into the
+        # loops, so they are applied after executing them.
+        self._loops = _assemble(f, tensor=tensor,
+                                bcs=bcs if rank == 2 else None,
+                                form_compiler_parameters=form_compiler_parameters,
+                                inverse=inverse, mat_type=mat_type,
+                                sub_mat_type=sub_mat_type,
+                                options_prefix=options_prefix,
+                                collect_loops=True)
+        self._vector_bcs = (bcs or ()) if rank == 1 else ()
+
+    def assemble(self):
+        """Assemble the form, using the current values of its coefficients.
+
+        :returns: the tensor, or a :class:`float` for 0-forms.
+        """
+        for loop in self._loops:
+            loop()
+        for bc in self._vector_bcs:
+            bc.apply(self.tensor)
+        return self._result()
+
+    __call__ = assemble
+
+
 @utils.known_pyop2_safe
 def _assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
               inverse=False, mat_type=None, sub_mat_type=None,
@@ -365,6 +566,9 @@ def _assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
         # 0-forms are always scalar
         if tensor is None:
             tensor = op2.Global(1, [0.0])
+        elif collect_loops and isinstance(tensor, op2.Global):
+            # Assembly plans reuse a Global for 0-forms.
+            zero_tensor = tensor.zero
         else:
             raise ValueError("Can't assemble 0-form into existing tensor")
         result = lambda: tensor.data[0]
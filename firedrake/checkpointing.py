@@ -1,10 +1,15 @@
 from firedrake.petsc import PETSc
 from pyop2.mpi import COMM_WORLD, dup_comm, free_comm
 from firedrake import hdf5interface as h5i
+from firedrake import dmplex
+from firedrake.utils import exchange_rows
 import firedrake
+import hashlib
 import numpy as np
 import os
 import h5py
+import ufl
+from mpi4py import MPI
 
 
 __all__ = ["DumbCheckpoint", "HDF5File", "FILE_READ", "FILE_CREATE", "FILE_UPDATE"]
@@ -20,6 +25,354 @@ FILE_UPDATE = PETSc.Viewer.Mode.APPEND
 r"""Open a checkpoint file for updating.  Creates the file if it does not exist, providing both read and write access."""
 
 
+# Families whose nodes are point evaluations, so that nodes can be
+# told apart by their coordinates.
+_nodal_families = frozenset(["Lagrange", "Discontinuous Lagrange", "Q", "DQ"])
+
+# Nodes on the same mesh entity are ordered by their position along
+# this (arbitrary) direction.
+_node_order_direction = np.array([1, 0.6180339887498949, 0.4142135623730951])
+
+
+def _scalar_element(V):
+    """Return the scalar element of a (non-mixed) function space,
+    checking that its nodes are point evaluations.
+
+    Other elements (such as Raviart-Thomas) have dofs whose signs
+    depend on the orientation of the mesh entities, and so on the
+    distribution of the mesh.
+    """
+    element = V.ufl_element()
+    if isinstance(element, (ufl.VectorElement, ufl.TensorElement)):
+        element = element.sub_elements()[0]
+    if element.family() not in _nodal_families:
+        raise NotImplementedError("Redistributable checkpoints not implemented for %s elements" %
+                                  element.family())
+    return element
+
+
+def _node_coordinates(V):
+    """Return the coordinates of the nodes of a function space."""
+    element = _scalar_element(V)
+    mesh = V.mesh()
+    X = firedrake.Function(firedrake.VectorFunctionSpace(mesh, element))
+    X.interpolate(firedrake.SpatialCoordinate(mesh))
+    return X.dat.data_ro_with_halos
+
+
+def _node_numbering(V):
+    """Return process independent numbers of the owned nodes of a
+    (non-mixed) function space.
+
+    Each node is numbered by the number of the mesh entity it lives
+    on (see :attr:`.MeshTopology._serial_point_numbering`) and its
+    position among the nodes on that entity.
+
+    :arg V: the function space.
+    :returns: an array of node numbers, and the number of mesh
+        entities before distribution.
+    """
+    mesh = V.mesh()
+    if mesh.layers is not None:
+        raise NotImplementedError("Redistributable checkpoints not implemented on extruded meshes")
+    _scalar_element(V)
+    topology = mesh.topology
+    section = V._shared_data.global_numbering
+    pStart, pEnd = section.getChart()
+    points = np.arange(pStart, pEnd)
+    ndofs, offsets = dmplex.section_dofs_offsets(section)
+    ndofs = ndofs.astype(np.int64)
+    offsets = offsets.astype(np.int64)
+    starts = np.repeat(np.cumsum(ndofs) - ndofs, ndofs)
+    nodes = np.repeat(offsets, ndofs) + np.arange(ndofs.sum()) - starts
+    points = np.repeat(points, ndofs)
+    owned = nodes < V.node_set.size
+    nodes = nodes[owned]
+    serial = topology._serial_point_numbering[points[owned] - pStart]
+    max_nodes = mesh.comm.allreduce(int(ndofs.max(initial=0)), op=MPI.MAX)
+    if max_nodes > 1:
+        # The order of the nodes on an entity depends on the
+        # orientation of the entity, and so on the distribution of
+        # the mesh, so order them by their position instead.
+        X = _node_coordinates(V)[nodes]
+        position = X.dot(_node_order_direction[:X.shape[1]])
+        order = np.lexsort((position, serial))
+    else:
+        order = np.argsort(serial, kind="stable")
+    serial = serial[order]
+    index = np.arange(len(serial)) - np.searchsorted(serial, serial)
+    numbering = np.empty(V.node_set.size, dtype=np.int64)
+    numbering[nodes[order]] = serial * max_nodes + index
+    npoints = mesh.comm.allreduce(topology._serial_point_count)
+    return numbering, npoints
+
+
+def _send_to(comm, destinations, *arrays):
+    """Send the rows of some arrays to the given processes.
+
+    :returns: the order in which the rows were sent, the number of
+        rows sent to and received from each process, and the received
+        arrays."""
+    order = np.argsort(destinations, kind="stable")
+    sendcounts = np.bincount(destinations, minlength=comm.size).astype(np.intc)
+    recvcounts = np.empty_like(sendcounts)
+    comm.Alltoall(sendcounts, recvcounts)
+    received = [exchange_rows(comm, a[order], sendcounts, recvcounts)
+                for a in arrays]
+    return order, sendcounts, recvcounts, received
+
+
+def _write_rows(dset, offset, values, collective=True):
+    """Write rows of a dataset.
+
+    :arg collective: should the write be collective?  Otherwise each
+        process writes independently.
+    """
+    if not collective:
+        dset[offset:offset + len(values)] = values
+        return
+    # Another MPI/non-MPI difference
+    try:
+        with dset.collective:
+            dset[offset:offset + len(values)] = values
+    except AttributeError:
+        dset[offset:offset + len(values)] = values
+
+
+def _read_rows(dset, start, stop):
+    """Collectively read rows of a dataset."""
+    try:
+        with dset.collective:
+            return dset[start:stop]
+    except AttributeError:
+        return dset[start:stop]
+
+
+def _create_dataset(h5file, name, shape, dtype, chunk_size=None,
+                    compression=None, compression_opts=None, shuffle=False,
+                    tolerance=None):
+    """Create a dataset, with the given storage options.
+
+    :arg h5file: the :class:`h5py:File`.
+    :arg name: the name of the dataset.
+    :arg shape: the shape of the dataset.
+    :arg dtype: the type of the dataset.
+    :kwarg chunk_size: the number of rows in each chunk.
+    :kwarg compression: the compression filter ("gzip", "lzf" or
+        "szip").
+    :kwarg compression_opts: options for the compression filter (for
+        example the level, from 0 to 9, of "gzip").
+    :kwarg shuffle: use the shuffle filter, which often improves
+        compression.
+    :kwarg tolerance: store floating point values with at most this
+        absolute error, using the (lossy) scale-offset filter.
+    """
+    kwargs = {}
+    if np.prod(shape) > 0:
+        if chunk_size is not None:
+            kwargs["chunks"] = (min(chunk_size, shape[0]), ) + tuple(shape[1:])
+        if compression is not None:
+            kwargs["compression"] = compression
+            kwargs["compression_opts"] = compression_opts
+        if shuffle:
+            kwargs["shuffle"] = True
+        if tolerance is not None and np.issubdtype(dtype, np.floating):
+            # The filter keeps this many decimal digits, with an error
+            # of less than one in the last of them.
+            kwargs["scaleoffset"] = max(int(np.ceil(-np.log10(tolerance))), 0)
+    return h5file.create_dataset(name, shape=shape, dtype=dtype, **kwargs)
+
+
+# The number of values in each chunk of a time series of scalars
+# (timestep values and indices).  These are small, uncompressed, and
+# only appended to.
+_scalar_series_chunk = 1024
+
+
+def _series_dataset(h5file, name, shape, dtype, time_chunk=1, **options):
+    """Return an extendible dataset of a time series, creating it if
+    necessary.
+
+    The dataset has shape ``(nsteps, ) + shape``, where the number of
+    steps may be increased.  Unwritten values are NaN.
+
+    :arg h5file: the :class:`h5py:File`.
+    :arg name: the name of the dataset.
+    :arg shape: the shape of the data at each time step.
+    :arg dtype: the type of the dataset.
+    :kwarg time_chunk: the number of time steps in each chunk.  With
+        one, writing a time step only writes (and compresses) its own
+        chunks, while larger chunks make reading the values at one
+        node over many time steps faster.
+    :kwarg options: storage options (see :func:`_create_dataset`),
+        where ``chunk_size`` is the number of values (at each time
+        step) in each chunk.
+    """
+    if name in h5file:
+        return h5file[name]
+    kwargs = {}
+    if options.get("compression") is not None:
+        kwargs["compression"] = options["compression"]
+        kwargs["compression_opts"] = options.get("compression_opts")
+    if options.get("shuffle", False):
+        kwargs["shuffle"] = True
+    tolerance = options.get("tolerance")
+    if tolerance is not None and np.issubdtype(dtype, np.floating):
+        kwargs["scaleoffset"] = max(int(np.ceil(-np.log10(tolerance))), 0)
+    chunk_size = options.get("chunk_size") or 2048
+    chunks = (time_chunk, ) + tuple(max(1, min(n, chunk_size)) for n in shape)
+    fillvalue = np.nan if np.issubdtype(dtype, np.inexact) else None
+    return h5file.create_dataset(name, shape=(0, ) + tuple(shape),
+                                 maxshape=(None, ) + tuple(shape),
+                                 chunks=chunks, dtype=dtype,
+                                 fillvalue=fillvalue, **kwargs)
+
+
+def _append_series(h5file, comm, name, value):
+    """Append a value to a one dimensional time series dataset.
+
+    :returns: the position of the value in the dataset."""
+    dset = _series_dataset(h5file, name, (), np.asarray(value).dtype,
+                           time_chunk=_scalar_series_chunk)
+    n = dset.shape[0]
+    dset.resize((n + 1, ))
+    if comm.rank == 0:
+        dset[n] = value
+    return n
+
+
+def _write_series_step(dset, step, offset, values):
+    """Collectively write the values of a time series at a step,
+    extending the dataset if necessary."""
+    if dset.shape[0] <= step:
+        dset.resize((step + 1, ) + dset.shape[1:])
+    try:
+        with dset.collective:
+            dset[step, offset:offset + len(values)] = values
+    except AttributeError:
+        dset[step, offset:offset + len(values)] = values
+
+
+def _filtered(options):
+    """Do storage options (see :func:`_create_dataset`) apply filters?"""
+    return (options.get("compression") is not None
+            or options.get("shuffle", False)
+            or options.get("tolerance") is not None)
+
+
+def _write_redistributable(h5file, comm, function, path, numberings,
+                           write_rows=_write_rows, options={}):
+    """Store a function in a redistributable layout.
+
+    For each component of the function, the values are stored in the
+    dataset ``path/i``, ordered by process independent node numbers
+    (see :func:`_node_numbering`).  The node numbers are stored once
+    for all function spaces with the same element and numbering, in
+    the dataset named by the ``"numbering"`` attribute.
+
+    :arg h5file: the :class:`h5py:File`.
+    :arg comm: the communicator.
+    :arg function: the :class:`~.Function` to store.
+    :arg path: the group to store the function in.
+    :arg numberings: a dict caching the node numbering of each
+        function space.
+    :arg write_rows: the function writing rows of a dataset (see
+        :func:`_write_rows`).
+    :arg options: storage options for the datasets (see
+        :func:`_create_dataset`).
+    """
+    if path in h5file:
+        del h5file[path]
+    for i, f in enumerate(function.split()):
+        name = "%s/%d" % (path, i)
+        V = f.function_space()
+        if V.ufl_element().family() == "Real":
+            dset = h5file.create_dataset(name, shape=f.dat.data_ro.shape, dtype=f.dat.dtype)
+            if comm.rank == 0:
+                write_rows(dset, 0, f.dat.data_ro, collective=False)
+            continue
+        if V not in numberings:
+            numberings[V] = _node_numbering(V)
+        numbering, npoints = numberings[V]
+        values = f.dat.data_ro.reshape(len(numbering), -1)
+        nnodes = comm.allreduce(len(numbering))
+
+        # Sort the values by node number, each process taking a range
+        # of numbers, and write them contiguously.
+        nmax = comm.allreduce(int(numbering.max(initial=-1)), op=MPI.MAX) + 1
+        destinations = numbering * comm.size // max(nmax, 1)
+        _, _, _, (numbering, values) = _send_to(comm, destinations, numbering, values)
+        order = np.argsort(numbering)
+        numbering = numbering[order]
+        values = values[order]
+        offset = comm.exscan(len(numbering)) or 0
+
+        # Function spaces on different meshes may have the same
+        # element and sizes but different numberings, so identify the
+        # numbering by its contents too.
+        element = V.ufl_element()
+        digests = comm.allgather(hashlib.md5(numbering.tobytes()).hexdigest())
+        key = hashlib.md5(repr((element, npoints, nnodes, digests)).encode()).hexdigest()
+        numbering_name = "/numberings/%s" % key
+        if numbering_name not in h5file:
+            dset = _create_dataset(h5file, numbering_name, (nnodes, ), np.int64, **options)
+            write_rows(dset, offset, numbering)
+            dset.attrs["element"] = repr(element)
+            dset.attrs["mesh_points"] = npoints
+        dset = _create_dataset(h5file, name, (nnodes, values.shape[1]), f.dat.dtype, **options)
+        write_rows(dset, offset, values)
+        dset.attrs["numbering"] = numbering_name
+
+
+def _read_redistributable(h5file, comm, function, path, numberings):
+    """Load a function stored by :func:`_write_redistributable`.
+
+    Each process reads a contiguous part of the stored values, and
+    sends them to the processes owning the corresponding nodes.
+
+    :arg h5file: the :class:`h5py:File`.
+    :arg comm: the communicator.
+    :arg function: the :class:`~.Function` to load values into.
+    :arg path: the group the function is stored in.
+    :arg numberings: a dict caching the node numbering of each
+        function space.
+    """
+    for i, f in enumerate(function.split()):
+        dset = h5file["%s/%d" % (path, i)]
+        V = f.function_space()
+        if V.ufl_element().family() == "Real":
+            f.dat.data[...] = dset[...]
+            continue
+        if V not in numberings:
+            numberings[V] = _node_numbering(V)
+        numbering, npoints = numberings[V]
+        stored_numbering = h5file[dset.attrs["numbering"]]
+        nnodes = comm.allreduce(len(numbering))
+        if stored_numbering.attrs["mesh_points"] != npoints or len(stored_numbering) != nnodes:
+            raise ValueError("Function '%s' was stored on a different mesh or function space" % path)
+
+        start = nnodes * comm.rank // comm.size
+        stop = nnodes * (comm.rank + 1) // comm.size
+        stored = _read_rows(stored_numbering, start, stop)
+        stored_values = _read_rows(dset, start, stop)
+
+        # Ask the process which read each node number for its value.
+        last = stored[-1] if len(stored) else -1
+        lasts = np.maximum.accumulate(np.array(comm.allgather(last), dtype=np.int64))
+        destinations = np.minimum(np.searchsorted(lasts, numbering), comm.size - 1)
+        order, sendcounts, recvcounts, (requested, ) = _send_to(comm, destinations, numbering)
+        positions = np.minimum(np.searchsorted(stored, requested), max(len(stored) - 1, 0))
+        if len(stored):
+            missing = np.any(stored[positions] != requested)
+        else:
+            missing = len(requested) > 0
+        if comm.allreduce(bool(missing), op=MPI.LOR):
+            raise ValueError("Function '%s' was stored on a different mesh or function space" % path)
+        values = np.empty((len(numbering), stored_values.shape[1]), dtype=stored_values.dtype)
+        values[order] = exchange_rows(comm, stored_values[positions], recvcounts, sendcounts)
+        f.dat.data[...] = values.reshape(f.dat.data.shape)
+
+
 class DumbCheckpoint(object):
 
     r"""A very dumb checkpoint object.
@@ -27,6 +380,8 @@ class DumbCheckpoint(object):
     This checkpoint object is capable of writing :class:`~.Function`\s
     to disk in parallel (using HDF5) and reloading them on the same
     number of processes and a :func:`~.Mesh` constructed identically.
+    Redistributable checkpoints may be reloaded on any number of
+    processes.
 
     :arg basename: the base name of the checkpoint file.
     :arg single_file: Should the checkpoint object use only a single
@@ -37,6 +392,18 @@ class DumbCheckpoint(object):
          :data:`~.FILE_CREATE`, or :data:`~.FILE_UPDATE`)
     :arg comm: (optional) communicator the writes should be collective
          over.
+    :arg redistributable: (optional) should functions be stored in a
+         layout independent of the number of processes?  Ignored
+         when reading, where the layout of the file is used.
+    :arg time_series: (optional) should functions stored at different
+         timesteps be stored in one dataset for each function, with
+         a row for each timestep?  See :meth:`set_timestep`.  Ignored
+         when reading, where the layout of the file is used.
+    :arg time_chunk: (optional) the number of timesteps in each chunk
+         of a time series dataset.  By default, each timestep is
+         stored in its own chunks, so that storing a timestep only
+         writes those.  Larger chunks make reading the values of a
+         node over many timesteps faster.
 
     This object can be used in a context manager (in which case it
     closes the file when the scope is exited).
@@ -51,9 +418,16 @@ class DumbCheckpoint(object):
 
     """
     def __init__(self, basename, single_file=True,
-                 mode=FILE_UPDATE, comm=None):
+                 mode=FILE_UPDATE, comm=None, redistributable=False,
+                 time_series=False, time_chunk=1):
+        if redistributable and time_series:
+            raise ValueError("Time series checkpoints can't be redistributable")
+        self._time_chunk = time_chunk
         self.comm = dup_comm(comm or COMM_WORLD)
         self.mode = mode
+        self.redistributable = redistributable
+        self.time_series = time_series
+        self._numberings = {}
 
         self._single = single_file
         self._made_file = False
@@ -78,6 +452,13 @@ class DumbCheckpoint(object):
         self._time = t
         if self.mode == FILE_READ:
             return
+        if self.time_series:
+            # Appending to datasets takes constant time, unlike
+            # rewriting the attributes.
+            self._step = _append_series(self.h5file, self.comm,
+                                        "/time_series/indices", self._tidx)
+            _append_series(self.h5file, self.comm, "/time_series/steps", float(t))
+            return
         indices = self.read_attribute("/", "stored_time_indices", [])
         new_indices = np.concatenate((indices, [self._tidx]))
         self.write_attribute("/", "stored_time_indices", new_indices)
@@ -92,10 +473,26 @@ class DumbCheckpoint(object):
         This is useful when reloading from a checkpoint file that
         contains multiple timesteps and one wishes to determine the
         final available timestep in the file."""
+        if "/time_series/steps" in self.h5file:
+            return (self.h5file["/time_series/steps"][:],
+                    self.h5file["/time_series/indices"][:])
         indices = self.read_attribute("/", "stored_time_indices", [])
         steps = self.read_attribute("/", "stored_time_steps", [])
         return steps, indices
 
+    def _time_series_step(self):
+        """Return the position of the current timestep in the time
+        series datasets."""
+        if self._time is None:
+            raise ValueError("Must call set_timestep before using a time series checkpoint")
+        if self.mode != FILE_READ:
+            return self._step
+        indices = self.h5file["/time_series/indices"][:]
+        steps, = np.nonzero(indices == self._tidx)
+        if len(steps) == 0:
+            raise ValueError("No timestep with index %d stored" % self._tidx)
+        return steps[-1]
+
     def new_file(self, name=None):
         r"""Open a new on-disk file for writing checkpoint data.
 
@@ -142,12 +539,16 @@ class DumbCheckpoint(object):
         self._vwr = PETSc.ViewerHDF5().create(name, mode=mode,
                                               comm=self.comm)
         if self.mode == FILE_READ:
+            self.redistributable = bool(self.read_attribute("/", "redistributable", False))
+            self.time_series = bool(self.read_attribute("/", "time_series", False))
             nprocs = self.read_attribute("/", "nprocs")
-            if nprocs != self.comm.size:
+            if nprocs != self.comm.size and not self.redistributable:
                 raise ValueError("Process mismatch: written on %d, have %d" %
                                  (nprocs, self.comm.size))
         else:
             self.write_attribute("/", "nprocs", self.comm.size)
+            self.write_attribute("/", "redistributable", self.redistributable)
+            self.write_attribute("/", "time_series", self.time_series)
 
     @property
     def vwr(self):
@@ -205,8 +606,20 @@ class DumbCheckpoint(object):
         if not isinstance(function, firedrake.Function):
             raise ValueError("Can only store functions")
         name = name or function.name()
+        if self.time_series:
+            step = self._time_series_step()
+            with function.dat.vec_ro as v:
+                dset = _series_dataset(self.h5file, "/time_series/fields/%s" % name,
+                                       (v.getSize(), ), function.dat.dtype,
+                                       time_chunk=self._time_chunk)
+                _write_series_step(dset, step, v.getOwnershipRange()[0], v.array_r)
+            return
         group = self._get_data_group()
         self._write_timestep_attr(group)
+        if self.redistributable:
+            _write_redistributable(self.h5file, self.comm, function,
+                                   "%s/%s" % (group, name), self._numberings)
+            return
         with function.dat.vec_ro as v:
             self.vwr.pushGroup(group)
             oname = v.getName()
@@ -228,7 +641,18 @@ class DumbCheckpoint(object):
         if not isinstance(function, firedrake.Function):
             raise ValueError("Can only load functions")
         name = name or function.name()
+        if self.time_series:
+            step = self._time_series_step()
+            dset = self.h5file["/time_series/fields/%s" % name]
+            with function.dat.vec_wo as v:
+                v.array[:] = dset[step, slice(*v.getOwnershipRange())]
+            return
         group = self._get_data_group()
+        path = "%s/%s" % (group, name)
+        if isinstance(self.h5file.get(path), h5py.Group):
+            _read_redistributable(self.h5file, self.comm, function, path,
+                                  self._numberings)
+            return
         with function.dat.vec_wo as v:
             self.vwr.pushGroup(group)
             # PETSc replaces the array in the Vec, which screws things
@@ -301,19 +725,79 @@ class HDF5File(object):
     This checkpoint object is capable of writing :class:`~.Function`\s
     to disk in parallel (using HDF5) and reloading them on the same
     number of processes and a :func:`~.Mesh` constructed identically.
+    Redistributable checkpoints may be reloaded on any number of
+    processes.
 
     :arg filename: filename (including suffix .h5) of checkpoint file.
     :arg file_mode: the access mode, passed directly to h5py, see
         :class:`h5py:File` for details on the meaning.
     :arg comm: communicator the writes should be collective
          over.
+    :arg redistributable: (optional) should functions be stored in a
+         layout independent of the number of processes?  Ignored
+         when reading, where the layout of the file is used.
+    :arg asynchronous: (optional) write function data on a background
+         thread, see :meth:`write`.
+    :arg incremental: (optional) store functions whose values have
+         not changed since they were last written to the same path
+         (with a different timestamp) as links to the earlier data
+         (empty datasets whose ``"link"`` attribute is the path of
+         the data).
+    :arg max_pending: (optional) the maximum number of asynchronous
+         writes waiting to run, before :meth:`write` blocks.
+    :arg chunk_size: (optional) the number of rows (nodes) in each
+         chunk of the datasets storing functions.
+    :arg compression: (optional) the compression filter to apply to
+         stored functions, "gzip", "lzf" or "szip".
+    :arg compression_opts: (optional) options for the compression
+         filter, such as the level (0-9) for "gzip".
+    :arg shuffle: (optional) apply the shuffle filter before
+         compression, which often improves it.
+    :arg tolerance: (optional) store floating point values with at
+         most this absolute error, which makes them much more
+         compressible.
+    :arg time_series: (optional) store the values of a function at
+         different timestamps in one dataset, with a row for each
+         timestamp, rather than in a dataset for each timestamp.
+         Can't be used with ``redistributable``, ``asynchronous``
+         or ``incremental``.
+    :arg time_chunk: (optional) the number of timestamps in each
+         chunk of a time series dataset (see :class:`DumbCheckpoint`).
 
     This object can be used in a context manager (in which case it
     closes the file when the scope is exited).
 
     """
-    def __init__(self, filename, file_mode, comm=None):
+    def __init__(self, filename, file_mode, comm=None, redistributable=False,
+                 asynchronous=False, incremental=False, max_pending=2,
+                 chunk_size=None, compression=None, compression_opts=None,
+                 shuffle=False, tolerance=None, time_series=False, time_chunk=1):
+        if time_series and (redistributable or asynchronous or incremental):
+            raise ValueError("Time series checkpoints can't be redistributable, asynchronous or incremental")
         self.comm = dup_comm(comm or COMM_WORLD)
+        self.time_series = time_series
+        self._time_chunk = time_chunk
+        self._dataset_options = {"chunk_size": chunk_size,
+                                 "compression": compression,
+                                 "compression_opts": compression_opts,
+                                 "shuffle": shuffle,
+                                 "tolerance": tolerance}
+        self.redistributable = redistributable
+        self._numberings = {}
+        self._incremental = incremental
+        # The path and a copy of the values of the function last
+        # written to each path.
+        self._last_written = {}
+        if asynchronous:
+            if _filtered(self._dataset_options):
+                # Parallel HDF5 can only write filtered datasets collectively.
+                raise ValueError("Can't write compressed checkpoints asynchronously")
+            if MPI.Query_thread() < MPI.THREAD_MULTIPLE:
+                raise RuntimeError("Asynchronous checkpointing needs MPI initialised with MPI_THREAD_MULTIPLE")
+            from firedrake.output import BackgroundWriter
+            self._writer = BackgroundWriter(max_pending=max_pending)
+        else:
+            self._writer = None
 
         self._filename = filename
         self._mode = file_mode
@@ -336,12 +820,14 @@ class HDF5File(object):
             raise RuntimeError("h5py *must* be installed with MPI support")
 
         if file_mode == 'r':
+            self.redistributable = bool(self.attributes('/').get('redistributable', False))
             nprocs = self.attributes('/')['nprocs']
-            if nprocs != self.comm.size:
+            if nprocs != self.comm.size and not self.redistributable:
                 raise ValueError("Process mismatch: written on %d, have %d" %
                                  (nprocs, self.comm.size))
         else:
             self.attributes('/')['nprocs'] = self.comm.size
+            self.attributes('/')['redistributable'] = self.redistributable
 
     def _set_timestamp(self, t):
         r"""Set the timestamp for storing.
@@ -350,19 +836,28 @@ class HDF5File(object):
         """
         if self._mode == 'r':
             return
+        if self.time_series:
+            _append_series(self._h5file, self.comm, "/stored_timestamps", float(t))
+            return
         attrs = self.attributes("/")
         timestamps = attrs.get("stored_timestamps", [])
         attrs["stored_timestamps"] = np.concatenate((timestamps, [t]))
 
     def get_timestamps(self):
         r"""Get the timestamps this HDF5File knows about."""
-
+        if "/stored_timestamps" in self._h5file:
+            return self._h5file["/stored_timestamps"][:]
         attrs = self.attributes("/")
         timestamps = attrs.get("stored_timestamps", [])
         return timestamps
 
     def close(self):
         r"""Close the checkpoint file (flushing any pending writes)"""
+        if getattr(self, '_writer', None) is not None:
+            try:
+                self._writer.close()
+            finally:
+                self._writer = None
         if hasattr(self, '_h5file'):
             self._h5file.flush()
             # Need to explicitly close the h5py File so that all
@@ -374,40 +869,139 @@ class HDF5File(object):
 
     def flush(self):
         r"""Flush any pending writes."""
+        if self._writer is not None:
+            self._writer.flush()
         self._h5file.flush()
 
-    def write(self, function, path, timestamp=None):
+    def _write_rows(self, dset, offset, values, collective=True):
+        if self._writer is None:
+            _write_rows(dset, offset, values, collective=collective)
+        else:
+            # Collective operations on the background thread could
+            # interleave with those of the main thread, so background
+            # writes are independent.  Copy the values, since the
+            # caller may change them before the write runs.
+            self._writer.submit(_write_rows, dset, offset, np.array(values), False)
+
+    def write(self, function, path, timestamp=None, **options):
         r"""Store a function in the checkpoint file.
 
         :arg function: The function to store.
         :arg path: the path to store the function under.
         :arg timestamp: timestamp associated with function, or None for
                         stationary data
+
+        Any further keyword arguments override the storage options
+        (``chunk_size``, ``compression``, ``compression_opts``,
+        ``shuffle`` and ``tolerance``) given when the file was opened,
+        for this function only.
+
+        If the file was opened with ``asynchronous=True``, the values
+        of the function are copied and written on a background thread,
+        so that this returns as soon as the (collective) creation of
+        the datasets is done.  The function may be changed straight
+        away.  Use :meth:`flush` to wait for the writes to complete.
         """
         if self._mode == 'r':
             raise IOError("Cannot store to checkpoint opened with mode 'FILE_READ'")
         if not isinstance(function, firedrake.Function):
             raise ValueError("Can only store functions")
+        unknown = set(options) - set(self._dataset_options)
+        if unknown:
+            raise TypeError("Unknown storage options '%s'" % ', '.join(sorted(unknown)))
+        options = dict(self._dataset_options, **options)
+        if self._writer is not None and _filtered(options):
+            raise ValueError("Can't write compressed checkpoints asynchronously")
+
+        if self.time_series:
+            if timestamp is None:
+                raise ValueError("Need a timestamp to write to a time series checkpoint")
+            step = _append_series(self._h5file, self.comm, path + "/timestamps", float(timestamp))
+            with function.dat.vec_ro as v:
+                dset = _series_dataset(self._h5file, path + "/values", (v.getSize(), ),
+                                       function.dat.dtype, time_chunk=self._time_chunk,
+                                       **options)
+                _write_series_step(dset, step, v.getOwnershipRange()[0], v.array_r)
+            self._set_timestamp(timestamp)
+            return
 
+        base = path
         if timestamp is not None:
             suffix = "/%.15e" % timestamp
             path = path + suffix
 
-        with function.dat.vec_ro as v:
-            dset = self._h5file.create_dataset(path, shape=(v.getSize(),), dtype=function.dat.dtype)
+        if self._incremental and self._link_unchanged(function, base, path):
+            if timestamp is not None:
+                self.attributes(path)["timestamp"] = timestamp
+                self._set_timestamp(timestamp)
+            return
 
-            # Another MPI/non-MPI difference
-            try:
-                with dset.collective:
-                    dset[slice(*v.getOwnershipRange())] = v.array_r
-            except AttributeError:
-                dset[slice(*v.getOwnershipRange())] = v.array_r
+        if path in self._h5file:
+            self._remove(base, path)
+        if self.redistributable:
+            _write_redistributable(self._h5file, self.comm, function, path,
+                                   self._numberings, write_rows=self._write_rows,
+                                   options=options)
+        else:
+            self._write_vec(function, path, options)
 
         if timestamp is not None:
             attr = self.attributes(path)
             attr["timestamp"] = timestamp
             self._set_timestamp(timestamp)
 
+    def _link_unchanged(self, function, base, path):
+        """If a function is the one last written under the same base
+        path, and its values have not changed, link path to them.
+
+        :returns: ``True`` if the function was unchanged."""
+        V = function.function_space()
+        values = np.concatenate([d.data_ro.ravel() for d in function.dat])
+        last_path, last_V, last_values = self._last_written.get(base, (None, None, None))
+        unchanged = (last_path is not None and V == last_V
+                     and np.array_equal(values, last_values))
+        if not self.comm.allreduce(unchanged, op=MPI.LAND):
+            self._last_written[base] = (path, V, values)
+            return False
+        if path != last_path:
+            # A link, rather than a hard link, so that it has its own
+            # attributes (in particular, its timestamp).
+            if path in self._h5file:
+                self._remove(base, path)
+            link = self._h5file.create_dataset(path, shape=(0, ), dtype=function.dat.dtype)
+            link.attrs["link"] = last_path
+        return True
+
+    def _remove(self, base, path):
+        """Remove the function stored at path, which is about to be
+        overwritten.  If other timestamps under the same base path
+        link to its values, these are moved to the first such link
+        instead, and the other links pointed there."""
+        group = self._h5file.get(base)
+        links = []
+        if isinstance(group, h5py.Group):
+            links = sorted(name for name, obj in group.items() if obj.attrs.get("link") == path)
+        if not links:
+            del self._h5file[path]
+            return
+        if self._writer is not None:
+            self._writer.flush()
+        target = "%s/%s" % (base, links[0])
+        attrs = {key: value for key, value in group[links[0]].attrs.items() if key != "link"}
+        del self._h5file[target]
+        self._h5file.move(path, target)
+        moved = self._h5file[target].attrs
+        if "timestamp" in moved:
+            del moved["timestamp"]
+        moved.update(attrs)
+        for name in links[1:]:
+            group[name].attrs["link"] = target
+
+    def _write_vec(self, function, path, options):
+        with function.dat.vec_ro as v:
+            dset = _create_dataset(self._h5file, path, (v.getSize(), ), function.dat.dtype, **options)
+            self._write_rows(dset, v.getOwnershipRange()[0], v.array_r)
+
     def read(self, function, path, timestamp=None):
         r"""Store a function from the checkpoint file.
 
@@ -416,10 +1010,27 @@ class HDF5File(object):
         """
         if not isinstance(function, firedrake.Function):
             raise ValueError("Can only load functions")
+        if self._writer is not None:
+            self._writer.flush()
+        series = self._h5file.get(path)
+        if isinstance(series, h5py.Group) and "values" in series:
+            steps, = np.nonzero(series["timestamps"][:] == timestamp)
+            if len(steps) == 0:
+                raise ValueError("No values of '%s' stored at timestamp %g" % (path, timestamp))
+            with function.dat.vec_wo as v:
+                v.array[:] = series["values"][steps[-1], slice(*v.getOwnershipRange())]
+            return
         if timestamp is not None:
             suffix = "/%.15e" % timestamp
             path = path + suffix
+        if "link" in self._h5file[path].attrs:
+            # Unchanged data written incrementally.
+            path = self._h5file[path].attrs["link"]
 
+        if isinstance(self._h5file[path], h5py.Group):
+            _read_redistributable(self._h5file, self.comm, function, path,
+                                  self._numberings)
+            return
         with function.dat.vec_wo as v:
             dset = self._h5file[path]
             v.array[:] = dset[slice(*v.getOwnershipRange())]
@@ -2152,6 +2152,29 @@ def make_global_numbering(PETSc.Section lsec, PETSc.Section gsec):
     return val
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def section_dofs_offsets(PETSc.Section section):
+    """Return the number of dofs and the offset of every point in a
+    section.
+
+    :arg section: the section.
+    :returns: a tuple of arrays ``(dofs, offsets)``, indexed by the
+        point number minus the start of the chart."""
+    cdef:
+        PetscInt p, pStart, pEnd
+        np.ndarray[PetscInt, ndim=1, mode="c"] dofs
+        np.ndarray[PetscInt, ndim=1, mode="c"] offsets
+
+    pStart, pEnd = section.getChart()
+    dofs = np.empty(pEnd - pStart, dtype=IntType)
+    offsets = np.empty(pEnd - pStart, dtype=IntType)
+    for p in range(pStart, pEnd):
+        CHKERR(PetscSectionGetDof(section.sec, p, &dofs[p - pStart]))
+        CHKERR(PetscSectionGetOffset(section.sec, p, &offsets[p - pStart]))
+    return dofs, offsets
+
+
 def prune_sf(PETSc.SF sf):
     """Prune an SF of roots referencing the local rank
 
@@ -1,6 +1,95 @@
+from contextlib import contextmanager
+
+import numpy as np
+
 from pyop2.mpi import MPI
 
-__all__ = ("Ensemble", )
+from firedrake.function import Function
+from firedrake.petsc import PETSc
+
+__all__ = ("Ensemble", "EnsembleRequest", "EnsembleFunction")
+
+
+def _as_tuple(functions):
+    if isinstance(functions, (tuple, list)):
+        return tuple(functions)
+    return (functions, )
+
+
+def _pack(functions):
+    """Copy the (owned) values of some functions into one contiguous
+    buffer."""
+    arrays = []
+    for f in functions:
+        with f.dat.vec_ro as v:
+            arrays.append(v.array_r.copy())
+    return np.concatenate(arrays)
+
+
+def _empty_buffer(functions):
+    """Return a buffer to receive the values of some functions."""
+    n = sum(f.function_space().dof_dset.layout_vec.getLocalSize() for f in functions)
+    return np.empty(n, dtype=functions[0].dat.dtype)
+
+
+def _unpack(buf, functions):
+    """Copy the values in a buffer made by :func:`_pack` into some
+    functions."""
+    offset = 0
+    for f in functions:
+        with f.dat.vec_wo as v:
+            n = v.getLocalSize()
+            v.array[:] = buf[offset:offset + n]
+        offset += n
+
+
+class EnsembleRequest(object):
+    r"""A handle on a non-blocking communication over an
+    :class:`Ensemble`.
+
+    This behaves like an :class:`mpi4py.MPI.Request`: the
+    communication is finished by calling :meth:`Wait` (or
+    :meth:`Test` until it returns ``True``), after which the received
+    values are in the destination :class:`.Function`\s.
+    """
+
+    def __init__(self, request, callback=None, buffers=()):
+        self.request = request
+        """The underlying MPI request."""
+        self._callback = callback
+        # MPI uses the buffers until the communication completes.
+        self._buffers = buffers
+
+    def _complete(self):
+        if self._callback is not None:
+            callback, self._callback = self._callback, None
+            callback()
+        self._buffers = ()
+
+    def Wait(self):
+        """Wait for the communication to complete."""
+        self.request.Wait()
+        self._complete()
+
+    def Test(self):
+        """Test whether the communication has completed.
+
+        :returns: ``True`` if it has, in which case the received
+            values are available."""
+        done = self.request.Test()
+        if done:
+            self._complete()
+        return done
+
+    @staticmethod
+    def Waitall(requests):
+        r"""Wait for several communications to complete.
+
+        :arg requests: an iterable of :class:`EnsembleRequest`\s."""
+        requests = list(requests)
+        MPI.Request.Waitall([r.request for r in requests])
+        for r in requests:
+            r._complete()
 
 
 class Ensemble(object):
@@ -34,26 +123,140 @@ class Ensemble(object):
         assert self.comm.size == M
         assert self.ensemble_comm.size == (size // M)
 
-    def allreduce(self, f, f_reduced, op=MPI.SUM):
+    def _check_functions(self, functions, results=None):
+        """Check that some functions live on :attr:`comm`, and optionally
+        match the functions receiving the results of a communication.
+
+        :raises ValueError: if communicators mismatch, or function sizes mismatch.
         """
+        if results is not None:
+            if len(results) != len(functions):
+                raise ValueError("Mismatching number of functions")
+            for f, g in zip(functions, results):
+                if MPI.Comm.Compare(g.comm, f.comm) not in {MPI.CONGRUENT, MPI.IDENT}:
+                    raise ValueError("Mismatching communicators for functions")
+                with f.dat.vec_ro as vin, g.dat.vec_ro as vout:
+                    if vout.getSizes() != vin.getSizes():
+                        raise ValueError("Mismatching sizes")
+        for f in functions:
+            if MPI.Comm.Compare(f.comm, self.comm) not in {MPI.CONGRUENT, MPI.IDENT}:
+                raise ValueError("Function communicator does not match space communicator")
+
+    def allreduce(self, f, f_reduced, op=MPI.SUM):
+        r"""
         Allreduce a function f into f_reduced over :attr:`ensemble_comm`.
 
-        :arg f: The a :class:`.Function` to allreduce.
-        :arg f_reduced: the result of the reduction.
+        :arg f: The a :class:`.Function` to allreduce, or a list of
+            :class:`.Function`\s, which are reduced together.
+        :arg f_reduced: the result of the reduction (a list, if ``f`` is).
+        :arg op: MPI reduction operator.
+        :raises ValueError: if communicators mismatch, or function sizes mismatch.
+        """
+        self.iallreduce(f, f_reduced, op=op).Wait()
+        return f_reduced
+
+    def iallreduce(self, f, f_reduced, op=MPI.SUM):
+        r"""
+        Allreduce (non-blocking) a function f into f_reduced over
+        :attr:`ensemble_comm`.
+
+        :arg f: The a :class:`.Function` to allreduce, or a list of
+            :class:`.Function`\s.  The values of all of them are sent
+            in one message.
+        :arg f_reduced: the result of the reduction (a list, if ``f`` is).
+        :arg op: MPI reduction operator.
+        :returns: an :class:`EnsembleRequest`.  ``f_reduced`` holds the
+            result once it has completed.
+        :raises ValueError: if communicators mismatch, or function sizes mismatch.
+        """
+        functions = _as_tuple(f)
+        results = _as_tuple(f_reduced)
+        self._check_functions(functions, results)
+        sendbuf = _pack(functions)
+        recvbuf = np.empty_like(sendbuf)
+        request = self.ensemble_comm.Iallreduce(sendbuf, recvbuf, op=op)
+        return EnsembleRequest(request, lambda: _unpack(recvbuf, results),
+                               buffers=(sendbuf, recvbuf))
+
+    def reduce(self, f, f_reduced, op=MPI.SUM, root=0):
+        r"""
+        Reduce a function f into f_reduced on the root of
+        :attr:`ensemble_comm`.
+
+        :arg f: The a :class:`.Function` to reduce, or a list of
+            :class:`.Function`\s, which are reduced together.
+        :arg f_reduced: the result of the reduction (a list, if ``f``
+            is), which is only modified on the root.
         :arg op: MPI reduction operator.
+        :arg root: the ensemble rank to reduce to.
         :raises ValueError: if communicators mismatch, or function sizes mismatch.
         """
-        if MPI.Comm.Compare(f_reduced.comm, f.comm) not in {MPI.CONGRUENT, MPI.IDENT}:
-            raise ValueError("Mismatching communicators for functions")
-        if MPI.Comm.Compare(f.comm, self.comm) not in {MPI.CONGRUENT, MPI.IDENT}:
-            raise ValueError("Function communicator does not match space communicator")
-        with f_reduced.dat.vec_wo as vout, f.dat.vec_ro as vin:
-            if vout.getSizes() != vin.getSizes():
-                raise ValueError("Mismatching sizes")
-            vout.set(0)
-            self.ensemble_comm.Allreduce(vin.array_r, vout.array, op=op)
+        self.ireduce(f, f_reduced, op=op, root=root).Wait()
         return f_reduced
 
+    def ireduce(self, f, f_reduced, op=MPI.SUM, root=0):
+        r"""
+        Reduce (non-blocking) a function f into f_reduced on the root
+        of :attr:`ensemble_comm`.
+
+        :arg f: The a :class:`.Function` to reduce, or a list of
+            :class:`.Function`\s.  The values of all of them are sent
+            in one message.
+        :arg f_reduced: the result of the reduction (a list, if ``f``
+            is), which is only modified on the root.
+        :arg op: MPI reduction operator.
+        :arg root: the ensemble rank to reduce to.
+        :returns: an :class:`EnsembleRequest`.
+        :raises ValueError: if communicators mismatch, or function sizes mismatch.
+        """
+        functions = _as_tuple(f)
+        results = _as_tuple(f_reduced)
+        self._check_functions(functions, results)
+        sendbuf = _pack(functions)
+        if self.ensemble_comm.rank != root:
+            request = self.ensemble_comm.Ireduce(sendbuf, None, op=op, root=root)
+            return EnsembleRequest(request, buffers=(sendbuf, ))
+        recvbuf = np.empty_like(sendbuf)
+        request = self.ensemble_comm.Ireduce(sendbuf, recvbuf, op=op, root=root)
+        return EnsembleRequest(request, lambda: _unpack(recvbuf, results),
+                               buffers=(sendbuf, recvbuf))
+
+    def bcast(self, f, root=0):
+        r"""
+        Broadcast a function f over :attr:`ensemble_comm` from the root.
+
+        :arg f: The a :class:`.Function` to broadcast, or a list of
+            :class:`.Function`\s, which are broadcast together.  On
+            the other ranks, these receive the values.
+        :arg root: the ensemble rank to broadcast from.
+        :raises ValueError: if the function communicator mismatches.
+        """
+        self.ibcast(f, root=root).Wait()
+        return f
+
+    def ibcast(self, f, root=0):
+        r"""
+        Broadcast (non-blocking) a function f over
+        :attr:`ensemble_comm` from the root.
+
+        :arg f: The a :class:`.Function` to broadcast, or a list of
+            :class:`.Function`\s.  The values of all of them are sent
+            in one message.
+        :arg root: the ensemble rank to broadcast from.
+        :returns: an :class:`EnsembleRequest`.  On ranks other than
+            the root, ``f`` holds the broadcast values once it has
+            completed.
+        :raises ValueError: if the function communicator mismatches.
+        """
+        functions = _as_tuple(f)
+        self._check_functions(functions)
+        if self.ensemble_comm.rank == root:
+            buf = _pack(functions)
+            return EnsembleRequest(self.ensemble_comm.Ibcast(buf, root=root), buffers=(buf, ))
+        buf = _empty_buffer(functions)
+        request = self.ensemble_comm.Ibcast(buf, root=root)
+        return EnsembleRequest(request, lambda: _unpack(buf, functions), buffers=(buf, ))
+
     def __del__(self):
         if hasattr(self, "comm"):
             self.comm.Free()
@@ -62,54 +265,244 @@ class Ensemble(object):
             self.ensemble_comm.Free()
             del self.ensemble_comm
 
-    def send(self, f, rank, tag=0):
-        """
+    def send(self, f, dest, tag=0):
+        r"""
         Send (blocking) a function f over :attr:`ensemble_comm` to another
         ensemble rank.
 
-        :arg f: The a :class:`.Function` to send
+        :arg f: The a :class:`.Function` to send, or a list of
+            :class:`.Function`\s, which are sent in one message.
         :arg dest: the rank to send to
         :arg tag: the tag of the message
         """
-
-        raise NotImplementedError("Ensemble send not implemented")
+        functions = _as_tuple(f)
+        self._check_functions(functions)
+        self.ensemble_comm.Send(_pack(functions), dest=dest, tag=tag)
 
     def recv(self, f, source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG):
-        """
+        r"""
         Receive (blocking) a function f over :attr:`ensemble_comm` from
         another ensemble rank.
 
-        :arg f: The a :class:`.Function` to receive into
+        :arg f: The a :class:`.Function` to receive into, or a list of
+            :class:`.Function`\s sent together.
         :arg source: the rank to receive from
         :arg tag: the tag of the message
         """
-
-        raise NotImplementedError("Ensemble recv not implemented")
+        self.irecv(f, source=source, tag=tag).Wait()
+        return f
 
     def isend(self, f, dest, tag=0):
-        """
+        r"""
         Send (non-blocking) a function f over :attr:`ensemble_comm` to another
         ensemble rank.
 
-        Returns a Request object.
+        Returns an :class:`EnsembleRequest`.  The values of ``f`` are
+        copied, so it may be modified before the send completes.
 
-        :arg f: The a :class:`.Function` to send
+        :arg f: The a :class:`.Function` to send, or a list of
+            :class:`.Function`\s, which are sent in one message.
         :arg dest: the rank to send to
         :arg tag: the tag of the message
         """
-
-        raise NotImplementedError("Ensemble isend not implemented")
+        functions = _as_tuple(f)
+        self._check_functions(functions)
+        buf = _pack(functions)
+        return EnsembleRequest(self.ensemble_comm.Isend(buf, dest=dest, tag=tag),
+                               buffers=(buf, ))
 
     def irecv(self, f, source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG):
-        """
+        r"""
         Receive (non-blocking) a function f over :attr:`ensemble_comm` from
         another ensemble rank.
 
-        Returns a Request object.
+        Returns an :class:`EnsembleRequest`.  ``f`` holds the received
+        values once it has completed.
 
-        :arg f: The a :class:`.Function` to receive into
+        :arg f: The a :class:`.Function` to receive into, or a list of
+            :class:`.Function`\s sent together.
         :arg source: the rank to receive from
         :arg tag: the tag of the message
         """
+        functions = _as_tuple(f)
+        self._check_functions(functions)
+        buf = _empty_buffer(functions)
+        request = self.ensemble_comm.Irecv(buf, source=source, tag=tag)
+        return EnsembleRequest(request, lambda: _unpack(buf, functions), buffers=(buf, ))
+
+
+class EnsembleFunction(object):
+    r"""A block of :class:`.Function`\s distributed over the members
+    of an :class:`Ensemble`.
+
+    Each ensemble member holds ``n`` functions in the same function
+    space, and the :class:`EnsembleFunction` represents all of them
+    together, as one vector.  The reductions (:meth:`dot`,
+    :meth:`norm` and :meth:`mean`) each use a single collective
+    operation over all the functions, and :meth:`variance` uses two.
+
+    :arg ensemble: the :class:`Ensemble`.
+    :arg V: the function space of the functions, which must be
+        defined on a mesh on :attr:`Ensemble.comm`.
+    :kwarg n: the number of functions on this ensemble member.
+    """
+
+    def __init__(self, ensemble, V, n=1):
+        if n < 1:
+            raise ValueError("Need at least one function on each ensemble member")
+        self.ensemble = ensemble
+        self.V = V
+        self.subfunctions = tuple(Function(V) for _ in range(n))
+        """The functions held by this ensemble member."""
+        ensemble._check_functions(self.subfunctions)
+        self.nfunctions = ensemble.ensemble_comm.allreduce(n)
+        """The total number of functions on all the ensemble members."""
+        self._vec = None
+
+    @property
+    def comm(self):
+        """The communicator over all the functions."""
+        return self.ensemble.global_comm
+
+    def _pairs(self, other):
+        if not isinstance(other, EnsembleFunction) or len(other.subfunctions) != len(self.subfunctions):
+            raise ValueError("Mismatching EnsembleFunctions")
+        return zip(self.subfunctions, other.subfunctions)
+
+    def assign(self, other):
+        """Set the values of the functions.
+
+        :arg other: an :class:`EnsembleFunction` with the same layout,
+            or a value to assign to each function.
+        :returns: ``self``.
+        """
+        if isinstance(other, EnsembleFunction):
+            for f, g in self._pairs(other):
+                f.assign(g)
+        else:
+            for f in self.subfunctions:
+                f.assign(other)
+        return self
+
+    def zero(self):
+        """Set all the values to zero.
+
+        :returns: ``self``."""
+        for f in self.subfunctions:
+            f.dat.zero()
+        return self
+
+    def axpy(self, a, x):
+        """Add ``a*x`` to this :class:`EnsembleFunction`.
+
+        :arg a: a scalar.
+        :arg x: an :class:`EnsembleFunction` with the same layout.
+        :returns: ``self``.
+        """
+        for f, g in self._pairs(x):
+            with f.dat.vec as v, g.dat.vec_ro as w:
+                v.axpy(a, w)
+        return self
+
+    def dot(self, other):
+        """Return the (Euclidean) inner product of the values with
+        those of another :class:`EnsembleFunction`.
+
+        :arg other: an :class:`EnsembleFunction` with the same layout.
+        """
+        local = 0
+        for f, g in self._pairs(other):
+            with f.dat.vec_ro as v, g.dat.vec_ro as w:
+                local += np.vdot(w.array_r, v.array_r)
+        return self.comm.allreduce(local, op=MPI.SUM)
+
+    def norm(self):
+        """Return the (Euclidean) norm of the values."""
+        return np.sqrt(abs(self.dot(self)))
+
+    def _values(self):
+        """Return the (owned) values of the functions on this ensemble
+        member, as an array with a row for each function."""
+        return _pack(self.subfunctions).reshape(len(self.subfunctions), -1)
+
+    def _mean(self, values):
+        """Return the (owned) values of the mean of the functions."""
+        total = values.sum(axis=0)
+        self.ensemble.ensemble_comm.Allreduce(MPI.IN_PLACE, total, op=MPI.SUM)
+        return total / self.nfunctions
+
+    def mean(self, result):
+        """Compute the mean of all the functions.
+
+        :arg result: a :class:`.Function` in the function space of
+            the functions, in which the mean is returned on every
+            ensemble member.
+        :returns: ``result``.
+        """
+        self.ensemble._check_functions((result, ), self.subfunctions[:1])
+        _unpack(self._mean(self._values()), (result, ))
+        return result
+
+    def variance(self, result):
+        r"""Compute the (unbiased) pointwise sample variance of all the
+        functions.
+
+        :arg result: a :class:`.Function` in the function space of
+            the functions, in which the variance is returned on every
+            ensemble member.
+        :returns: ``result``.
+
+        The mean is computed first, and then the sum of the squared
+        deviations from it,
+
+        .. math::
+
+            \frac{1}{N - 1}\sum_i |u_i - \bar{u}|^2,
+
+        which (unlike summing the squares of the values) does not lose
+        accuracy when the mean is large compared with the spread.
+        This takes two collective operations.
+        """
+        N = self.nfunctions
+        if N < 2:
+            raise ValueError("Need at least two functions to compute a variance")
+        self.ensemble._check_functions((result, ), self.subfunctions[:1])
+        values = self._values()
+        squares = (abs(values - self._mean(values))**2).sum(axis=0)
+        self.ensemble.ensemble_comm.Allreduce(MPI.IN_PLACE, squares, op=MPI.SUM)
+        _unpack(squares / (N - 1), (result, ))
+        return result
+
+    @contextmanager
+    def _vec_context(self, read=True, write=True):
+        if self._vec is None:
+            n = sum(f.function_space().dof_dset.layout_vec.getLocalSize()
+                    for f in self.subfunctions)
+            self._vec = PETSc.Vec().createMPI((n, PETSc.DETERMINE), comm=self.comm)
+        if read:
+            self._vec.array[:] = _pack(self.subfunctions)
+        yield self._vec
+        if write:
+            _unpack(self._vec.array_r, self.subfunctions)
+
+    @property
+    def vec(self):
+        """Context manager for a PETSc Vec (on :attr:`comm`) holding the
+        values of all the functions.
+
+        The values are copied into the Vec on entry, and back into
+        the functions on exit."""
+        return self._vec_context()
+
+    @property
+    def vec_ro(self):
+        """Context manager for a PETSc Vec (on :attr:`comm`) holding the
+        values of all the functions, which must not be modified."""
+        return self._vec_context(write=False)
 
-        raise NotImplementedError("Ensemble irecv not implemented")
+    @property
+    def vec_wo(self):
+        """Context manager for a PETSc Vec (on :attr:`comm`) into which
+        values for the functions are written.  Its values on entry are
+        undefined."""
+        return self._vec_context(read=False)
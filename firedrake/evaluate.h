@@ -7,6 +7,26 @@
 extern "C" {
 #endif
 
+/* Kinds of spatial index (see sidx_kind below) */
+#define SIDX_CELLS 0		/* R-tree of cell bounding boxes */
+#define SIDX_COLUMNS 1		/* R-tree of column bounding boxes, layers by bisection */
+#define SIDX_INTERVALS 2	/* Sorted intervals (1D meshes), see struct IntervalIndex */
+
+struct IntervalIndex {
+	/* Number of intervals */
+	int n;
+
+	/* Lower bounds (sorted) and upper bounds of the intervals */
+	double *lo;
+	double *hi;
+
+	/* Running maximum of the upper bounds */
+	double *hi_max;
+
+	/* Cell number of each interval */
+	int *ids;
+};
+
 struct Function {
 	/* Number of cells in the base mesh */
 	int n_cols;
@@ -28,6 +48,16 @@ struct Function {
 	/* Spatial index */
 	void *sidx;
 
+	/* Kind of spatial index, one of the SIDX_* values above */
+	int sidx_kind;
+
+	/*
+	 * Bounds of the cells of each column in the last coordinate
+	 * direction (SIDX_COLUMNS only), [n_cols][n_layers]
+	 */
+	double *layer_lo;
+	double *layer_hi;
+
 	/*
 	 * TODO:
 	 * - cell orientation
@@ -52,10 +82,33 @@ extern int locate_cell(struct Function *f,
 		       inside_predicate_xtr try_candidate_xtr,
 		       void *data_);
 
+extern int locate_all_cells(struct Function *f,
+			    double *x,
+			    int dim,
+			    inside_predicate try_candidate,
+			    inside_predicate_xtr try_candidate_xtr,
+			    void *data_,
+			    size_t data_size,
+			    int max_cells,
+			    int *cells,
+			    void *cells_data);
+
 extern int evaluate(struct Function *f,
 		    double *x,
 		    double *result);
 
+extern int evaluate_points(struct Function *f,
+			   double *x,
+			   int npoints,
+			   double *result,
+			   int *found);
+
+extern int evaluate_reference_points(struct Function *f,
+				     int npoints,
+				     int *cells,
+				     double *X,
+				     double *result);
+
 #ifdef __cplusplus
 }
 #endif
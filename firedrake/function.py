@@ -32,7 +32,10 @@ class _CFunction(ctypes.Structure):
                 # FIXME: what if f does not have type double?
                 ("f", POINTER(c_double)),
                 ("f_map", POINTER(as_ctypes(IntType))),
-                ("sidx", c_void_p)]
+                ("sidx", c_void_p),
+                ("sidx_kind", c_int),
+                ("layer_lo", POINTER(c_double)),
+                ("layer_hi", POINTER(c_double))]
 
 
 class CoordinatelessFunction(ufl.Coefficient):
@@ -476,7 +479,7 @@ class Function(ufl.Coefficient):
     def _ctypes(self):
         mesh = self.ufl_domain()
         c_function = self._constant_ctypes
-        c_function.sidx = mesh.spatial_index and mesh.spatial_index.ctypes
+        mesh._set_spatial_index_ctypes(c_function)
 
         # Return pointer
         return ctypes.pointer(c_function)
@@ -491,6 +494,97 @@ class Function(ufl.Coefficient):
             result.restype = c_int
             return cache.setdefault(tolerance, result)
 
+    def _c_evaluate_points(self, tolerance=None):
+        cache = self.__dict__.setdefault("_c_evaluate_points_cache", {})
+        try:
+            return cache[tolerance]
+        except KeyError:
+            result = make_c_evaluate(self, c_name="evaluate_points", tolerance=tolerance)
+            result.argtypes = [POINTER(_CFunction), POINTER(c_double), c_int,
+                               POINTER(c_double), POINTER(c_int)]
+            result.restype = c_int
+            return cache.setdefault(tolerance, result)
+
+    @utils.cached_property
+    def _c_evaluate_reference_points(self):
+        result = make_c_evaluate(self, c_name="evaluate_reference_points")
+        result.argtypes = [POINTER(_CFunction), c_int, POINTER(c_int),
+                           POINTER(c_double), POINTER(c_double)]
+        result.restype = c_int
+        return result
+
+    def _update_halos_for_evaluation(self):
+        # Need to ensure data is up-to-date for reading
+        self.dat._force_evaluation(read=True, write=False)
+        self.dat.global_to_local_begin(op2.READ)
+        self.dat.global_to_local_end(op2.READ)
+
+    def _evaluate_reference_points(self, cells, reference_coords):
+        r"""Evaluate this :class:`Function` at points with known location.
+
+        :arg cells: array of the (local) cell number containing each
+            point, as returned by :meth:`.MeshGeometry._locate_points`,
+            or -1 to skip the point.
+        :arg reference_coords: array of shape ``(npoints, tdim)`` of
+            reference coordinates of each point in its cell.
+        :returns: an array of shape ``(npoints, ) + value_shape``.
+
+        Only the basis functions are tabulated at the reference points:
+        no point location is performed.  Mixed :class:`Function`\s are
+        not supported, evaluate their components instead.
+        """
+        if len(self.split()) != 1:
+            raise NotImplementedError("Evaluate the components of a mixed Function separately.")
+        cells = np.ascontiguousarray(cells, dtype=np.intc)
+        reference_coords = np.ascontiguousarray(reference_coords, dtype=float)
+        npoints = len(cells)
+        self._update_halos_for_evaluation()
+        values = np.zeros((npoints, ) + self.ufl_shape, dtype=float)
+        if npoints:
+            self._c_evaluate_reference_points(self._ctypes, npoints,
+                                              cells.ctypes.data_as(POINTER(c_int)),
+                                              reference_coords.ctypes.data_as(POINTER(c_double)),
+                                              values.ctypes.data_as(POINTER(c_double)))
+        return values
+
+    def _evaluate_points(self, points, tolerance=None):
+        r"""Evaluate this :class:`Function` at many points on this process.
+
+        :arg points: array of shape ``(npoints, gdim)`` of point coordinates.
+        :kwarg tolerance: Tolerance to use when checking for points in cell.
+        :returns: a tuple ``(values, found)``.  ``values`` is an array of
+            shape ``(npoints, ) + value_shape`` (or, for mixed
+            :class:`Function`\s, a tuple of such arrays, one per
+            component space); ``found`` is a boolean mask of the points
+            that lie in the locally owned part of the domain.  Values of
+            points that were not found are undefined.
+
+        All points are located and evaluated in a single call to
+        compiled code.  No parallel communication is performed.
+        """
+        points = np.ascontiguousarray(points, dtype=float)
+        npoints = len(points)
+        split = self.split()
+        if len(split) != 1:
+            values = []
+            found = np.ones(npoints, dtype=bool)
+            for f in split:
+                f_values, f_found = f._evaluate_points(points, tolerance=tolerance)
+                values.append(f_values)
+                found &= f_found
+            return tuple(values), found
+
+        self._update_halos_for_evaluation()
+        values = np.zeros((npoints, ) + self.ufl_shape, dtype=float)
+        found = np.zeros(npoints, dtype=np.intc)
+        if npoints:
+            self._c_evaluate_points(tolerance=tolerance)(self._ctypes,
+                                                         points.ctypes.data_as(POINTER(c_double)),
+                                                         npoints,
+                                                         values.ctypes.data_as(POINTER(c_double)),
+                                                         found.ctypes.data_as(POINTER(c_int)))
+        return values, found.astype(bool)
+
     def evaluate(self, coord, mapping, component, index_values):
         # Called by UFL when evaluating expressions at coordinates
         if component or index_values:
@@ -504,11 +598,12 @@ class Function(ufl.Coefficient):
         :arg args: Additional points.
         :kwarg dont_raise: Do not raise an error if a point is not found.
         :kwarg tolerance: Tolerance to use when checking for points in cell.
+        :kwarg redundant: If ``True`` (the default), every process must
+            pass the same points and gets the values at all of them.
+            If ``False``, each process evaluates at its own points,
+            which are sent only to the processes that might contain
+            them (see :class:`.PointEvaluator`).
         """
-        # Need to ensure data is up-to-date for reading
-        self.dat._force_evaluation(read=True, write=False)
-        self.dat.global_to_local_begin(op2.READ)
-        self.dat.global_to_local_end(op2.READ)
         from mpi4py import MPI
 
         if args:
@@ -518,6 +613,7 @@ class Function(ufl.Coefficient):
         dont_raise = kwargs.get('dont_raise', False)
 
         tolerance = kwargs.get('tolerance', None)
+        redundant = kwargs.get('redundant', True)
         # Handle f.at(0.3)
         if not arg.shape:
             arg = arg.reshape(-1)
@@ -539,6 +635,26 @@ class Function(ufl.Coefficient):
         else:
             raise ValueError("Point dimension (%d) does not match geometric dimension (%d)." % (arg.shape[-1], gdim))
 
+        if not len(arg.shape) <= 2:
+            raise ValueError("Function.at expects point or array of points.")
+        points = arg.reshape(-1, arg.shape[-1])
+
+        mixed = len(self.split()) != 1
+
+        if not redundant:
+            from firedrake.pointevaluator import PointEvaluator
+            evaluator = PointEvaluator(mesh, points, tolerance=tolerance,
+                                       dont_raise=dont_raise, redundant=False)
+            values = evaluator.evaluate(self)
+            if not mixed:
+                values = (values, )
+            g_result = [(tuple(v[i] for v in values) if mixed else values[0][i])
+                        if evaluator.found[i] else None
+                        for i in range(len(points))]
+            if len(arg.shape) == 1:
+                g_result = g_result[0]
+            return g_result
+
         # Check if we have got the same points on each process
         root_arg = self.comm.bcast(arg, root=0)
         same_arg = arg.shape == root_arg.shape and np.allclose(arg, root_arg)
@@ -546,61 +662,35 @@ class Function(ufl.Coefficient):
         if diff_arg:
             raise ValueError("Points to evaluate are inconsistent among processes.")
 
-        def single_eval(x, buf):
-            r"""Helper function to evaluate at a single point."""
-            err = self._c_evaluate(tolerance=tolerance)(self._ctypes,
-                                                        x.ctypes.data_as(POINTER(c_double)),
-                                                        buf.ctypes.data_as(POINTER(c_double)))
-            if err == -1:
-                raise PointNotInDomainError(self.function_space().mesh(), x.reshape(-1))
-
-        if not len(arg.shape) <= 2:
-            raise ValueError("Function.at expects point or array of points.")
-        points = arg.reshape(-1, arg.shape[-1])
-        value_shape = self.ufl_shape
-
-        split = self.split()
-        mixed = len(split) != 1
-
         # Local evaluation
-        l_result = []
-        for i, p in enumerate(points):
-            try:
-                if mixed:
-                    l_result.append((i, tuple(f.at(p) for f in split)))
-                else:
-                    p_result = np.zeros(value_shape, dtype=float)
-                    single_eval(points[i:i+1], p_result)
-                    l_result.append((i, p_result))
-            except PointNotInDomainError:
-                # Skip point
-                pass
+        values, found = self._evaluate_points(points, tolerance=tolerance)
+        if not mixed:
+            values = (values, )
+        indices, = np.nonzero(found)
+        l_result = (indices, tuple(v[indices] for v in values))
 
         # Collecting the results
-        def same_result(a, b):
-            if mixed:
-                for a_, b_ in zip(a, b):
-                    if not np.allclose(a_, b_):
-                        return False
-                return True
-            else:
-                return np.allclose(a, b)
-
-        all_results = self.comm.allgather(l_result)
-        g_result = [None] * len(points)
-        for results in all_results:
-            for i, result in results:
-                if g_result[i] is None:
-                    g_result[i] = result
-                elif same_result(result, g_result[i]):
-                    pass
-                else:
+        g_values = [np.zeros_like(v) for v in values]
+        g_found = np.zeros(len(points), dtype=bool)
+        for indices, results in self.comm.allgather(l_result):
+            seen = g_found[indices]
+            for g, r in zip(g_values, results):
+                if not np.allclose(g[indices[seen]], r[seen]):
                     raise RuntimeError("Point evaluation gave different results across processes.")
+                g[indices[~seen]] = r[~seen]
+            g_found[indices] = True
 
-        if not dont_raise:
-            for i in range(len(g_result)):
-                if g_result[i] is None:
-                    raise PointNotInDomainError(self.function_space().mesh(), points[i].reshape(-1))
+        if not dont_raise and not g_found.all():
+            i = np.argmin(g_found)
+            raise PointNotInDomainError(self.function_space().mesh(), points[i].reshape(-1))
+
+        if mixed:
+            g_result = [tuple(g[i] for g in g_values) if g_found[i] else None
+                        for i in range(len(points))]
+        else:
+            g_values, = g_values
+            g_result = [g_values[i] if g_found[i] else None
+                        for i in range(len(points))]
 
         if len(arg.shape) == 1:
             g_result = g_result[0]
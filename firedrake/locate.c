@@ -1,9 +1,101 @@
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
 #include <spatialindex/capi/sidx_api.h>
 
 #include <evaluate.h>
 
+static int push_candidate(int64_t **ids, uint64_t *nids, uint64_t *capacity, int64_t id)
+{
+    if (*nids == *capacity) {
+        uint64_t new_capacity = *capacity ? 2 * *capacity : 8;
+        int64_t *new_ids = realloc(*ids, new_capacity * sizeof(int64_t));
+        if (!new_ids) {
+            return -1;
+        }
+        *ids = new_ids;
+        *capacity = new_capacity;
+    }
+    (*ids)[(*nids)++] = id;
+    return 0;
+}
+
+/* Index of the first entry of the sorted array a[0:n] which is greater than v */
+static int upper_bound(double *a, int n, double v)
+{
+    int lo = 0, hi = n;
+    while (lo < hi) {
+        int mid = lo + (hi - lo) / 2;
+        if (a[mid] <= v) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo;
+}
+
+/*
+ * Collect the cells (numbered as in locate_cell) whose bounding boxes
+ * contain x using the spatial index.  On success returns 0, and *ids
+ * must be freed by the caller.
+ */
+static int candidate_cells(struct Function *f, double *x, int dim, int64_t **ids, uint64_t *nids)
+{
+    RTError err;
+    uint64_t capacity = 0;
+
+    *ids = NULL;
+    *nids = 0;
+    switch (f->sidx_kind) {
+    case SIDX_CELLS:
+        err = Index_Intersects_id(f->sidx, x, x, dim, ids, nids);
+        if (err != RT_None) {
+            fputs("ERROR: Index_Intersects_id failed in libspatialindex!", stderr);
+            return -1;
+        }
+        return 0;
+    case SIDX_COLUMNS: {
+        int64_t *cols = NULL;
+        uint64_t ncols = 0;
+        int nlayers = f->n_layers;
+        double z = x[dim - 1];
+        err = Index_Intersects_id(f->sidx, x, x, dim, &cols, &ncols);
+        if (err != RT_None) {
+            fputs("ERROR: Index_Intersects_id failed in libspatialindex!", stderr);
+            return -1;
+        }
+        for (uint64_t i = 0; i < ncols; i++) {
+            double *lo = f->layer_lo + cols[i] * nlayers;
+            double *hi = f->layer_hi + cols[i] * nlayers;
+            /* Layers are sorted by both bounds, so scan down from
+             * the last layer starting below z. */
+            for (int l = upper_bound(lo, nlayers, z) - 1; l >= 0 && hi[l] >= z; l--) {
+                if (push_candidate(ids, nids, &capacity, cols[i] * nlayers + l)) {
+                    free(cols);
+                    return -1;
+                }
+            }
+        }
+        free(cols);
+        return 0;
+    }
+    case SIDX_INTERVALS: {
+        struct IntervalIndex *index = (struct IntervalIndex *)f->sidx;
+        double v = x[0];
+        for (int i = upper_bound(index->lo, index->n, v) - 1; i >= 0 && index->hi_max[i] >= v; i--) {
+            if (index->hi[i] >= v && push_candidate(ids, nids, &capacity, index->ids[i])) {
+                return -1;
+            }
+        }
+        return 0;
+    }
+    default:
+        fputs("ERROR: unknown spatial index kind!", stderr);
+        return -1;
+    }
+}
+
 int locate_cell(struct Function *f,
         double *x,
         int dim,
@@ -11,15 +103,13 @@ int locate_cell(struct Function *f,
         inside_predicate_xtr try_candidate_xtr,
         void *data_)
 {
-    RTError err;
     int cell = -1;
 
     if (f->sidx) {
         int64_t *ids = NULL;
         uint64_t nids = 0;
-        err = Index_Intersects_id(f->sidx, x, x, dim, &ids, &nids);
-        if (err != RT_None) {
-            fputs("ERROR: Index_Intersects_id failed in libspatialindex!", stderr);
+        if (candidate_cells(f, x, dim, &ids, &nids)) {
+            free(ids);
             return -1;
         }
         if (f->extruded == 0) {
@@ -67,3 +157,66 @@ int locate_cell(struct Function *f,
     }
     return cell;
 }
+
+int locate_all_cells(struct Function *f,
+        double *x,
+        int dim,
+        inside_predicate try_candidate,
+        inside_predicate_xtr try_candidate_xtr,
+        void *data_,
+        size_t data_size,
+        int max_cells,
+        int *cells,
+        void *cells_data)
+{
+    int ncells = 0;
+    char *out = (char *)cells_data;
+
+#define FOUND(c) do {                                                   \
+        if (ncells < max_cells) {                                       \
+            cells[ncells] = (c);                                        \
+            memcpy(out + ncells*data_size, data_, data_size);           \
+        }                                                               \
+        ncells++;                                                       \
+    } while (0)
+
+    if (f->sidx) {
+        int64_t *ids = NULL;
+        uint64_t nids = 0;
+        if (candidate_cells(f, x, dim, &ids, &nids)) {
+            free(ids);
+            return -1;
+        }
+        for (int i = 0; i < nids; i++) {
+            if (f->extruded == 0) {
+                if ((*try_candidate)(data_, f, ids[i], x)) {
+                    FOUND(ids[i]);
+                }
+            } else {
+                int nlayers = f->n_layers;
+                int c = ids[i] / nlayers;
+                int l = ids[i] % nlayers;
+                if ((*try_candidate_xtr)(data_, f, c, l, x)) {
+                    FOUND(ids[i]);
+                }
+            }
+        }
+        free(ids);
+    } else {
+        for (int c = 0; c < f->n_cols; c++) {
+            if (f->extruded == 0) {
+                if ((*try_candidate)(data_, f, c, x)) {
+                    FOUND(c);
+                }
+            } else {
+                for (int l = 0; l < f->n_layers; l++) {
+                    if ((*try_candidate_xtr)(data_, f, c, l, x)) {
+                        FOUND(c * f->n_layers + l);
+                    }
+                }
+            }
+        }
+    }
+#undef FOUND
+    return ncells;
+}
@@ -11,7 +11,7 @@ import enum
 from pyop2.datatypes import IntType
 from pyop2 import op2
 from pyop2.base import DataSet
-from pyop2.mpi import COMM_WORLD, dup_comm
+from pyop2.mpi import COMM_WORLD, MPI, dup_comm
 from pyop2.profiling import timed_function, timed_region
 from pyop2.utils import as_tuple, tuplify
 
@@ -22,7 +22,6 @@ import firedrake.extrusion_utils as eutils
 import firedrake.spatialindex as spatialindex
 import firedrake.utils as utils
 from firedrake.interpolation import interpolate
-from firedrake.logging import info_red
 from firedrake.parameters import parameters
 from firedrake.petsc import PETSc, OptionsManager
 
@@ -334,6 +333,33 @@ def _from_cell_list(dim, cells, coords, comm):
     return plex
 
 
+def _migrate_point_data(comm, sf, rootdata):
+    """Send data on the points of a plex along the star forest
+    returned by distributing it.
+
+    :arg comm: the communicator.
+    :arg sf: the migration :class:`PETSc.SF`, whose roots are the
+        points of the plex before distribution and whose leaves are
+        the points afterwards.
+    :arg rootdata: an array of data on the points before distribution.
+    :returns: an array of data on the points after distribution.
+    """
+    _, ilocal, iremote = sf.getGraph()
+    iremote = np.asarray(iremote, dtype=np.int64).reshape(-1, 2)
+    if ilocal is None:
+        ilocal = np.arange(len(iremote))
+    ilocal = np.asarray(ilocal)
+    order = np.argsort(iremote[:, 0], kind="stable")
+    sendcounts = np.bincount(iremote[order, 0], minlength=comm.size).astype(np.intc)
+    recvcounts = np.empty_like(sendcounts)
+    comm.Alltoall(sendcounts, recvcounts)
+    requested = utils.exchange_rows(comm, iremote[order, 1], sendcounts, recvcounts)
+    values = utils.exchange_rows(comm, rootdata[requested], recvcounts, sendcounts)
+    leafdata = np.full(ilocal.max() + 1 if len(ilocal) else 0, -1, dtype=rootdata.dtype)
+    leafdata[ilocal[order]] = values
+    return leafdata
+
+
 class MeshTopology(object):
     """A representation of mesh topology."""
 
@@ -366,13 +392,13 @@ class MeshTopology(object):
         elif overlap_type == DistributedMeshOverlapType.FACET:
             def add_overlap():
                 dmplex.set_adjacency_callback(self._plex)
-                self._plex.distributeOverlap(overlap)
+                self._distribution_sfs.append(self._plex.distributeOverlap(overlap))
                 dmplex.clear_adjacency_callback(self._plex)
                 self._grown_halos = True
         elif overlap_type == DistributedMeshOverlapType.VERTEX:
             def add_overlap():
                 # Default is FEM (vertex star) adjacency.
-                self._plex.distributeOverlap(overlap)
+                self._distribution_sfs.append(self._plex.distributeOverlap(overlap))
                 self._grown_halos = True
         else:
             raise ValueError("Unknown overlap type %r" % overlap_type)
@@ -397,6 +423,14 @@ class MeshTopology(object):
         label_boundary = (self.comm.size == 1) or distribute
         dmplex.label_facets(plex, label_boundary=label_boundary)
 
+        # Record the points of the undistributed plex, and (below) how
+        # they are distributed, to give them process independent
+        # numbers (see :attr:`_serial_point_numbering`).
+        pStart, pEnd = plex.getChart()
+        self._serial_point_count = pEnd - pStart
+        self._serial_point_offset = self.comm.exscan(pEnd - pStart) or 0
+        self._distribution_sfs = []
+
         # Distribute the dm to all ranks
         if self.comm.size > 1 and distribute:
             # We distribute with overlap zero, in case we're going to
@@ -413,7 +447,9 @@ class MeshTopology(object):
             except TypeError:
                 pass
             partitioner.setFromOptions()
-            plex.distribute(overlap=0)
+            sf = plex.distribute(overlap=0)
+            if sf is not None:
+                self._distribution_sfs.append(sf)
 
         dim = plex.getDimension()
 
@@ -502,6 +538,23 @@ class MeshTopology(object):
         """The UFL :class:`~ufl.classes.Cell` associated with the mesh."""
         return self._ufl_cell
 
+    @utils.cached_property
+    def _serial_point_numbering(self):
+        """Process independent numbers of the points of the plex.
+
+        Points are numbered by their position in the plex the mesh
+        was created from, before it was distributed (taking the
+        points on each process in rank order).  For meshes created in
+        serial, which includes the utility mesh constructors and
+        meshes read from files, these do not depend on the number of
+        processes."""
+        numbering = np.arange(self._serial_point_offset,
+                              self._serial_point_offset + self._serial_point_count,
+                              dtype=np.int64)
+        for sf in self._distribution_sfs:
+            numbering = _migrate_point_data(self.comm, sf, numbering)
+        return numbering
+
     @utils.cached_property
     def cell_closure(self):
         """2D array of ordered cell closures
@@ -970,6 +1023,96 @@ class ExtrudedMeshTopology(MeshTopology):
         return cell_data[cell_list]
 
 
+# Kinds of spatial index, must match the SIDX_* values in evaluate.h
+SIDX_CELLS = 0
+SIDX_COLUMNS = 1
+SIDX_INTERVALS = 2
+
+
+class _CIntervalIndex(ctypes.Structure):
+    r"""C struct collecting data from an :class:`IntervalIndex`"""
+    _fields_ = [("n", ctypes.c_int),
+                ("lo", ctypes.POINTER(ctypes.c_double)),
+                ("hi", ctypes.POINTER(ctypes.c_double)),
+                ("hi_max", ctypes.POINTER(ctypes.c_double)),
+                ("ids", ctypes.POINTER(ctypes.c_int))]
+
+
+class IntervalIndex(object):
+    """Spatial index for the cells of a one dimensional mesh.
+
+    The cells are sorted by their lower bounds, so that the cells
+    containing a point are found by bisection.
+
+    :arg lo: the lower bounds of the cells.
+    :arg hi: the upper bounds of the cells.
+    """
+
+    kind = SIDX_INTERVALS
+
+    def __init__(self, lo, hi):
+        order = np.argsort(lo, kind="mergesort")
+        self.lo = np.ascontiguousarray(lo[order], dtype=float)
+        self.hi = np.ascontiguousarray(hi[order], dtype=float)
+        self.hi_max = np.maximum.accumulate(self.hi)
+        self.ids = order.astype(np.intc)
+
+        double_p = ctypes.POINTER(ctypes.c_double)
+        self._c_index = _CIntervalIndex(len(order),
+                                        self.lo.ctypes.data_as(double_p),
+                                        self.hi.ctypes.data_as(double_p),
+                                        self.hi_max.ctypes.data_as(double_p),
+                                        self.ids.ctypes.data_as(ctypes.POINTER(ctypes.c_int)))
+
+    @property
+    def ctypes(self):
+        """Returns a ctypes pointer to the native index."""
+        return ctypes.cast(ctypes.pointer(self._c_index), ctypes.c_void_p)
+
+
+class ColumnIndex(object):
+    """Spatial index for the cells of an extruded mesh.
+
+    The R-tree only contains the bounding boxes of the columns.  The
+    layers of a column containing a point are then found by bisection
+    on their extents in the direction of the last coordinate.
+
+    :arg rtree: the R-tree of the column bounding boxes.
+    :arg layer_lo: array of shape ``(ncolumns, nlayers)`` of the lower
+        bounds of the layers, sorted in each column.
+    :arg layer_hi: likewise for the upper bounds.
+    """
+
+    kind = SIDX_COLUMNS
+
+    def __init__(self, rtree, layer_lo, layer_hi):
+        self.rtree = rtree
+        self.layer_lo = layer_lo
+        self.layer_hi = layer_hi
+
+    @property
+    def ctypes(self):
+        """Returns a ctypes pointer to the native R-tree."""
+        return self.rtree.ctypes
+
+
+def _column_bounds(coords_min, coords_max, nlayers):
+    """Split the cell bounding boxes of an extruded mesh into column
+    bounding boxes and layer extents.
+
+    :returns: a tuple ``(column_min, column_max, layer_lo, layer_hi)``,
+        or ``None`` if the layers of some column are not sorted in the
+        direction of the last coordinate."""
+    gdim = coords_min.shape[1]
+    coords_min = coords_min.reshape(-1, nlayers, gdim)
+    coords_max = coords_max.reshape(-1, nlayers, gdim)
+    layer_lo = np.ascontiguousarray(coords_min[:, :, -1])
+    layer_hi = np.ascontiguousarray(coords_max[:, :, -1])
+    if (np.diff(layer_lo, axis=1) < 0).any() or (np.diff(layer_hi, axis=1) < 0).any():
+        return None
+    return coords_min.min(axis=1), coords_max.max(axis=1), layer_lo, layer_hi
+
+
 class MeshGeometry(ufl.Mesh):
     """A representation of mesh topology and geometry."""
 
@@ -1068,23 +1211,23 @@ values from f.)"""
         """Reset the :attr:`spatial_index` on this mesh geometry.
 
         Use this if you move the mesh (for example by reassigning to
-        the coordinate field)."""
+        the coordinate field).  If the mesh only moves a little, see
+        also :meth:`update_spatial_index`."""
         try:
             del self.spatial_index
         except AttributeError:
             pass
 
-    @utils.cached_property
-    def spatial_index(self):
-        """Spatial index to quickly find which cell contains a given point."""
+    def _cell_bounding_boxes(self):
+        """Compute the bounding boxes of all cells.
 
+        :returns: a tuple ``(coords_min, coords_max)`` of arrays of
+            shape ``(ncells, gdim)``, ordered according to the cell
+            indices used by the spatial index."""
         from firedrake import function, functionspace
         from firedrake.parloops import par_loop, READ, RW
 
         gdim = self.ufl_cell().geometric_dimension()
-        if gdim <= 1:
-            info_red("libspatialindex does not support 1-dimension, falling back on brute force.")
-            return None
 
         # Calculate the bounding boxes for all cells by running a kernel
         V = functionspace.VectorFunctionSpace(self, "DG", 0, dim=gdim)
@@ -1114,9 +1257,127 @@ values from f.)"""
         column_list = V.cell_node_list.reshape(-1)
         coords_min = self._order_data_by_cell_index(column_list, coords_min.dat.data_ro_with_halos)
         coords_max = self._order_data_by_cell_index(column_list, coords_max.dat.data_ro_with_halos)
+        return coords_min, coords_max
 
-        # Build spatial index
-        return spatialindex.from_regions(coords_min, coords_max)
+    @utils.cached_property
+    def spatial_index(self):
+        """Spatial index to quickly find which cell contains a given point.
+
+        This is an R-tree of the cell bounding boxes, except for one
+        dimensional meshes, which use an :class:`IntervalIndex`, and
+        extruded meshes whose layers are stacked in the direction of
+        the last coordinate, which use a :class:`ColumnIndex`."""
+        coords_min, coords_max = self._cell_bounding_boxes()
+        return self._build_spatial_index(coords_min, coords_max)
+
+    def _build_spatial_index(self, coords_min, coords_max):
+        if coords_min.shape[1] == 1:
+            return IntervalIndex(coords_min[:, 0], coords_max[:, 0])
+
+        bounds = None
+        if self.layers is not None and not self.variable_layers:
+            bounds = _column_bounds(coords_min, coords_max, self.layers - 1)
+            if bounds is not None:
+                coords_min, coords_max, layer_lo, layer_hi = bounds
+
+        # Remember the regions inserted in the R-tree, so that it can
+        # be updated in place when the mesh moves.
+        self._spatial_index_regions = (coords_min, coords_max)
+
+        rtree = spatialindex.from_regions(coords_min, coords_max)
+        if bounds is None:
+            return rtree
+        return ColumnIndex(rtree, layer_lo, layer_hi)
+
+    def _set_spatial_index_ctypes(self, c_function):
+        """Set the spatial index fields of a C struct describing a
+        :class:`.Function` on this mesh."""
+        sidx = self.spatial_index
+        c_function.sidx = sidx.ctypes
+        c_function.sidx_kind = getattr(sidx, "kind", SIDX_CELLS)
+        if isinstance(sidx, ColumnIndex):
+            c_function.layer_lo = sidx.layer_lo.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+            c_function.layer_hi = sidx.layer_hi.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+        else:
+            c_function.layer_lo = None
+            c_function.layer_hi = None
+
+    @timed_function("UpdateSpatialIndex")
+    def update_spatial_index(self, slack=0.1, rebuild_fraction=0.25):
+        """Update the :attr:`spatial_index` after moving the mesh.
+
+        :kwarg slack: the relative amount by which the regions stored
+            in the index are enlarged beyond the cell bounding boxes.
+        :kwarg rebuild_fraction: if more than this fraction of the
+            cells moved out of their stored regions, the index is
+            rebuilt from scratch instead of being updated in place.
+
+        Rather than rebuilding the spatial index, the stored region of
+        each cell is kept as long as the cell's bounding box stays
+        inside it.  Only the cells that moved out of their stored
+        regions are reinserted, with regions enlarged by ``slack``
+        times the size of their bounding box, so that small, repeated
+        mesh movements (for example in ALE simulations) rarely touch
+        the index at all.  (For extruded meshes using a
+        :class:`ColumnIndex`, this applies to the columns, and the
+        vertical extents of the layers are recomputed.  An
+        :class:`IntervalIndex` is cheap to rebuild, and is always
+        rebuilt.)
+
+        Use this instead of :meth:`clear_spatial_index` if the mesh
+        moves by small amounts.
+
+        This is collective over the mesh communicator.
+        """
+        has_index = "spatial_index" in self.__dict__
+        if not self.comm.allreduce(has_index, op=MPI.LOR):
+            # Nothing to update: the index will be built when needed.
+            return
+        if not has_index:
+            # Computing the bounding boxes is collective, so build the
+            # index here if other processes are updating theirs.
+            self.spatial_index
+            return
+        coords_min, coords_max = self._cell_bounding_boxes()
+        index = self.spatial_index
+        if isinstance(index, IntervalIndex):
+            self.spatial_index = self._build_spatial_index(coords_min, coords_max)
+            return
+        rtree = index
+        if isinstance(index, ColumnIndex):
+            bounds = _column_bounds(coords_min, coords_max, self.layers - 1)
+            if bounds is None:
+                # Layers are no longer stacked vertically.
+                self.spatial_index = self._build_spatial_index(coords_min, coords_max)
+                return
+            coords_min, coords_max, index.layer_lo, index.layer_hi = bounds
+            rtree = index.rtree
+
+        regions_min, regions_max = self._spatial_index_regions
+        escaped, = np.nonzero(np.any((coords_min < regions_min) | (coords_max > regions_max), axis=1))
+        if len(escaped) == 0:
+            return
+
+        pad = slack * (coords_max[escaped] - coords_min[escaped])
+        new_min = coords_min[escaped] - pad
+        new_max = coords_max[escaped] + pad
+        if len(escaped) > rebuild_fraction * len(coords_min):
+            regions_min = regions_min.copy()
+            regions_max = regions_max.copy()
+            regions_min[escaped] = new_min
+            regions_max[escaped] = new_max
+            self._spatial_index_regions = (regions_min, regions_max)
+            rtree = spatialindex.from_regions(regions_min, regions_max)
+            if isinstance(index, ColumnIndex):
+                index.rtree = rtree
+            else:
+                self.spatial_index = rtree
+        else:
+            spatialindex.update_regions(rtree, escaped.astype(np.int64),
+                                        regions_min[escaped], regions_max[escaped],
+                                        new_min, new_max)
+            regions_min[escaped] = new_min
+            regions_max[escaped] = new_max
 
     def locate_cell(self, x, tolerance=None):
         """Locate cell containg given point.
@@ -1124,18 +1385,105 @@ values from f.)"""
         :arg x: point coordinates
         :kwarg tolerance: for checking if a point is in a cell.
         :returns: cell number (int), or None (if the point is not in the domain)
+
+        To locate many points at once, use :meth:`locate_cells`.
         """
-        if self.variable_layers:
-            raise NotImplementedError("Cell location not implemented for variable layers")
-        x = np.asarray(x, dtype=np.float)
-        cell = self._c_locator(tolerance=tolerance)(self.coordinates._ctypes,
-                                                    x.ctypes.data_as(ctypes.POINTER(ctypes.c_double)))
+        x = np.asarray(x, dtype=float).reshape(1, -1)
+        cells, _ = self._locate_points(x, tolerance=tolerance)
+        cell = int(cells[0])
         if cell == -1:
             return None
         else:
             return cell
 
-    def _c_locator(self, tolerance=None):
+    def locate_cells(self, X, tolerance=None, all_candidates=False):
+        """Locate the cells containing many points.
+
+        :arg X: array-like of shape ``(npoints, gdim)`` of point
+            coordinates (for one dimensional meshes, a flat array of
+            coordinates is also accepted).
+        :kwarg tolerance: for checking if a point is in a cell.
+        :kwarg all_candidates: if ``True``, return every cell
+            containing each point (for example all the cells sharing a
+            facet or vertex on which the point lies) instead of only
+            the first one found.
+        :returns: if ``all_candidates`` is ``False``, a tuple ``(cells,
+            reference_coords)``, where ``cells`` is an array of the
+            local cell number containing each point (-1 if the point
+            is not in the local part of the domain) and
+            ``reference_coords`` has shape ``(npoints, tdim)``.  If
+            ``all_candidates`` is ``True``, a tuple ``(offsets, cells,
+            reference_coords)``, where the cells containing point ``i``
+            are ``cells[offsets[i]:offsets[i+1]]``, with reference
+            coordinates ``reference_coords[offsets[i]:offsets[i+1]]``.
+
+        All points are located in a single call to compiled code.  See
+        also :meth:`locate_cell`.
+        """
+        X = np.array(X, dtype=float)
+        gdim = self.geometric_dimension()
+        if gdim == 1 and len(X.shape) < 2:
+            X = X.reshape(-1, 1)
+        if len(X.shape) != 2 or X.shape[1] != gdim:
+            raise ValueError("Expected an array of points of shape (npoints, %d)." % gdim)
+        if not all_candidates:
+            return self._locate_points(X, tolerance=tolerance)
+
+        if self.variable_layers:
+            raise NotImplementedError("Cell location not implemented for variable layers")
+        npoints = len(X)
+        tdim = self.topological_dimension()
+        counts = np.zeros(npoints, dtype=np.intc)
+        # Start with room for a few candidates per point and retry with
+        # enough room if any point lies in more cells.
+        max_cells = 2**tdim
+        while True:
+            cells = np.empty((npoints, max_cells), dtype=np.intc)
+            reference_coords = np.zeros((npoints, max_cells, gdim), dtype=float)
+            if npoints:
+                self._c_locator(tolerance=tolerance, c_name="locate_points_all")(
+                    self.coordinates._ctypes,
+                    X.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+                    npoints, max_cells,
+                    counts.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+                    cells.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+                    reference_coords.ctypes.data_as(ctypes.POINTER(ctypes.c_double)))
+            if counts.max(initial=0) <= max_cells:
+                break
+            max_cells = counts.max()
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(IntType)
+        mask = np.arange(max_cells) < counts[:, np.newaxis]
+        return offsets, cells[mask], reference_coords[mask][:, :tdim]
+
+    def _locate_points(self, x, tolerance=None):
+        """Locate the cells containing many points.
+
+        :arg x: array of shape ``(npoints, gdim)`` of point coordinates
+        :kwarg tolerance: for checking if a point is in a cell.
+        :returns: a tuple ``(cells, reference_coords)``.  ``cells`` is
+            an array of the local cell number containing each point (-1
+            if the point is not in the local part of the domain) and
+            ``reference_coords`` an array of shape ``(npoints, tdim)``
+            with the reference coordinates of each point in its cell.
+
+        All points are located in a single call to compiled code.
+        """
+        if self.variable_layers:
+            raise NotImplementedError("Cell location not implemented for variable layers")
+        x = np.ascontiguousarray(x, dtype=float)
+        npoints = len(x)
+        cells = np.empty(npoints, dtype=np.intc)
+        reference_coords = np.zeros((npoints, self.topological_dimension()), dtype=float)
+        if npoints:
+            self._c_locator(tolerance=tolerance, c_name="locate_points")(
+                self.coordinates._ctypes,
+                x.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+                npoints,
+                cells.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+                reference_coords.ctypes.data_as(ctypes.POINTER(ctypes.c_double)))
+        return cells, reference_coords
+
+    def _c_locator(self, tolerance=None, c_name="locator"):
         from pyop2 import compilation
         from pyop2.utils import get_petsc_dir
         import firedrake.function as function
@@ -1143,7 +1491,7 @@ values from f.)"""
 
         cache = self.__dict__.setdefault("_c_locator_cache", {})
         try:
-            return cache[tolerance]
+            return cache[(c_name, tolerance)]
         except KeyError:
             src = pq_utils.src_locate_cell(self, tolerance=tolerance)
             src += """
@@ -1152,9 +1500,39 @@ values from f.)"""
         struct ReferenceCoords reference_coords;
         return locate_cell(f, x, %(geometric_dimension)d, &to_reference_coords, &to_reference_coords_xtr, &reference_coords);
     }
-    """ % dict(geometric_dimension=self.geometric_dimension())
 
-            locator = compilation.load(src, "c", "locator",
+    int locate_points(struct Function *f, double *x, int npoints, int *cells, double *X)
+    {
+        struct ReferenceCoords reference_coords;
+        int nfound = 0;
+        for (int i = 0; i < npoints; i++) {
+            cells[i] = locate_cell(f, x + i*%(geometric_dimension)d, %(geometric_dimension)d, &to_reference_coords, &to_reference_coords_xtr, &reference_coords);
+            if (cells[i] != -1) {
+                for (int j = 0; j < %(topological_dimension)d; j++) {
+                    X[i*%(topological_dimension)d + j] = reference_coords.X[j];
+                }
+                nfound++;
+            }
+        }
+        return nfound;
+    }
+
+    int locate_points_all(struct Function *f, double *x, int npoints, int max_cells, int *counts, int *cells, double *X)
+    {
+        struct ReferenceCoords reference_coords;
+        int nfound = 0;
+        for (int i = 0; i < npoints; i++) {
+            counts[i] = locate_all_cells(f, x + i*%(geometric_dimension)d, %(geometric_dimension)d, &to_reference_coords, &to_reference_coords_xtr,
+                                         &reference_coords, sizeof(reference_coords), max_cells,
+                                         cells + i*max_cells, X + i*max_cells*%(geometric_dimension)d);
+            nfound += counts[i] > 0;
+        }
+        return nfound;
+    }
+    """ % dict(geometric_dimension=self.geometric_dimension(),
+               topological_dimension=self.topological_dimension())
+
+            locator = compilation.load(src, "c", c_name,
                                        cppargs=["-I%s" % os.path.dirname(__file__),
                                                 "-I%s/include" % sys.prefix]
                                        + ["-I%s/include" % d for d in get_petsc_dir()],
@@ -1162,10 +1540,25 @@ values from f.)"""
                                                "-lspatialindex_c",
                                                "-Wl,-rpath,%s/lib" % sys.prefix])
 
-            locator.argtypes = [ctypes.POINTER(function._CFunction),
-                                ctypes.POINTER(ctypes.c_double)]
+            if c_name == "locate_points_all":
+                locator.argtypes = [ctypes.POINTER(function._CFunction),
+                                    ctypes.POINTER(ctypes.c_double),
+                                    ctypes.c_int,
+                                    ctypes.c_int,
+                                    ctypes.POINTER(ctypes.c_int),
+                                    ctypes.POINTER(ctypes.c_int),
+                                    ctypes.POINTER(ctypes.c_double)]
+            elif c_name == "locate_points":
+                locator.argtypes = [ctypes.POINTER(function._CFunction),
+                                    ctypes.POINTER(ctypes.c_double),
+                                    ctypes.c_int,
+                                    ctypes.POINTER(ctypes.c_int),
+                                    ctypes.POINTER(ctypes.c_double)]
+            else:
+                locator.argtypes = [ctypes.POINTER(function._CFunction),
+                                    ctypes.POINTER(ctypes.c_double)]
             locator.restype = ctypes.c_int
-            return cache.setdefault(tolerance, locator)
+            return cache.setdefault((c_name, tolerance), locator)
 
     def init_cell_orientations(self, expr):
         """Compute and initialise :attr:`cell_orientations` relative to a specified orientation.
@@ -1,14 +1,20 @@
 
+import atexit
 import collections
+import concurrent.futures
+import functools
+import io
 import itertools
 import numpy
 import os
+import queue
+import threading
 import ufl
 import weakref
 from pyop2.mpi import COMM_WORLD, dup_comm
 from pyop2.datatypes import IntType
 
-__all__ = ("File", )
+__all__ = ("File", "VTKHDFFile")
 
 
 VTK_INTERVAL = 3
@@ -34,6 +40,11 @@ cells = {
 
 OFunction = collections.namedtuple("OFunction", ["array", "name", "function"])
 
+Compressor = collections.namedtuple("Compressor", ["name", "compress"])
+
+# Size of the blocks of uncompressed data compressed independently.
+COMPRESSION_BLOCK_SIZE = 32768
+
 
 def is_cg(V):
     """Is the provided space continuous?
@@ -175,6 +186,96 @@ def write_array(f, ofunction):
     array.tofile(f)
 
 
+def array_bytes(ofunction):
+    """Return the appended data for an array as bytes.
+
+    This is the same data :func:`write_array` writes to a file."""
+    array = ofunction.array
+    if get_byte_order(array.dtype) == "BigEndian":
+        array = array.byteswap()
+    return numpy.uint32(array.nbytes).tobytes() + array.tobytes()
+
+
+def get_compressor(compression, level=None):
+    """Get a compressor for VTU appended data.
+
+    :arg compression: ``"zlib"`` or ``"lz4"``.
+    :kwarg level: optional compression level, with the meaning the
+        compression library gives it.
+    :returns: a :class:`Compressor`, holding the name of the VTK
+        compressor able to read the data and a function compressing a
+        block of data.
+    """
+    if compression == "zlib":
+        import zlib
+        level = -1 if level is None else level
+        return Compressor("vtkZLibDataCompressor",
+                          lambda block: zlib.compress(block, level))
+    elif compression == "lz4":
+        try:
+            import lz4.block
+        except ImportError:
+            raise ImportError("LZ4 compression requires the lz4 package")
+        kwargs = {} if level is None else {"mode": "high_compression",
+                                           "compression": level}
+        return Compressor("vtkLZ4DataCompressor",
+                          lambda block: lz4.block.compress(block, store_size=False,
+                                                           **kwargs))
+    else:
+        raise ValueError("Unknown compression %r, expected 'zlib' or 'lz4'" % (compression, ))
+
+
+def compressed_array_bytes(ofunction, compressor, pool=None,
+                           block_size=COMPRESSION_BLOCK_SIZE):
+    """Return the compressed appended data for an array as bytes.
+
+    :arg ofunction: the :class:`OFunction` to compress.
+    :arg compressor: the :class:`Compressor` to use.
+    :kwarg pool: optional :class:`concurrent.futures.Executor` to
+        compress the blocks of data on.
+    :kwarg block_size: the size in bytes of the blocks of data to
+        compress independently.
+
+    The data is preceded by the header VTK expects for compressed
+    data: the number of blocks, the block size, the size of the last
+    block if it is partial and the compressed size of each block.
+    """
+    array = ofunction.array
+    if get_byte_order(array.dtype) == "BigEndian":
+        array = array.byteswap()
+    data = numpy.ascontiguousarray(array).reshape(-1).view(numpy.uint8)
+    blocks = [data[i:i + block_size] for i in range(0, len(data), block_size)]
+    compressed = list((pool.map if pool else map)(compressor.compress, blocks))
+    header = numpy.array([len(blocks), block_size, len(data) % block_size]
+                         + [len(block) for block in compressed],
+                         dtype=numpy.uint32)
+    return header.tobytes() + b"".join(compressed)
+
+
+def write_vtu_header(f, compressor=None):
+    f.write(b'<?xml version="1.0" ?>\n')
+    f.write(b'<VTKFile type="UnstructuredGrid" version="0.1" '
+            b'byte_order="LittleEndian" '
+            b'header_type="UInt32"')
+    if compressor is not None:
+        f.write((' compressor="%s"' % compressor.name).encode('ascii'))
+    f.write(b'>\n')
+    f.write(b'<UnstructuredGrid>\n')
+
+
+def write_at(fname, chunks):
+    """Write data at given positions in an existing file.
+
+    :arg fname: the file name.
+    :arg chunks: iterable of ``(offset, data)`` pairs, where ``data``
+        is a bytes object to write at byte ``offset``.
+    """
+    with open(fname, "r+b") as f:
+        for offset, data in chunks:
+            f.seek(offset)
+            f.write(data)
+
+
 def write_array_descriptor(f, ofunction, offset=None, parallel=False):
     array, name, _ = ofunction
     shape = array.shape[1:]
@@ -199,6 +300,42 @@ def write_array_descriptor(f, ofunction, offset=None, parallel=False):
     return 4 + array.nbytes     # 4 is for the array size (uint32)
 
 
+def write_piece_descriptor(f, num_points, num_cells, coordinates, topology,
+                           functions, offsets):
+    r"""Write the header of a VTU piece.
+
+    :arg num_points: the number of points in the piece.
+    :arg num_cells: the number of cells in the piece.
+    :arg coordinates: the coordinate :class:`OFunction`.
+    :arg topology: the ``(connectivity, offsets, types)``
+        :class:`OFunction`\s.
+    :arg functions: the field :class:`OFunction`\s.
+    :arg offsets: the offset in the appended data of each of the
+        above arrays, in order.
+    """
+    offsets = iter(offsets)
+    connectivity, cell_offsets, types = topology
+    f.write(('<Piece NumberOfPoints="%d" '
+             'NumberOfCells="%d">\n' % (num_points, num_cells)).encode('ascii'))
+    f.write(b'<Points>\n')
+    # Vertex coordinates
+    write_array_descriptor(f, coordinates, offset=next(offsets))
+    f.write(b'</Points>\n')
+
+    f.write(b'<Cells>\n')
+    write_array_descriptor(f, connectivity, offset=next(offsets))
+    write_array_descriptor(f, cell_offsets, offset=next(offsets))
+    write_array_descriptor(f, types, offset=next(offsets))
+    f.write(b'</Cells>\n')
+
+    f.write(b'<PointData%s>\n' % active_field_attributes(functions))
+    for function in functions:
+        write_array_descriptor(f, function, offset=next(offsets))
+    f.write(b'</PointData>\n')
+
+    f.write(b'</Piece>\n')
+
+
 def active_field_attributes(ofunctions):
     # select first function of each rank present as "active field"
     # and return the corresponding attributes for the (P)PointData element
@@ -255,83 +392,86 @@ def get_array(function):
     return array
 
 
-class File(object):
-    _header = (b'<?xml version="1.0" ?>\n'
-               b'<VTKFile type="Collection" version="0.1" '
-               b'byte_order="LittleEndian">\n'
-               b'<Collection>\n')
-    _footer = (b'</Collection>\n'
-               b'</VTKFile>\n')
-
-    def __init__(self, filename, project_output=False, comm=None, mode="w"):
-        """Create an object for outputting data for visualisation.
-
-        This produces output in VTU format, suitable for visualisation
-        with Paraview or other VTK-capable visualisation packages.
-
-
-        :arg filename: The name of the output file (must end in
-            ``.pvd``).
-        :kwarg project_output: Should the output be projected to
-            linears?  Default is to use interpolation.
-        :kwarg comm: The MPI communicator to use.
-        :kwarg mode: "w" to overwrite any existing file, "a" to append to an existing file.
-
-        .. note::
-
-           Visualisation is only possible for linear fields (either
-           continuous or discontinuous).  All other fields are first
-           either projected or interpolated to linear before storing
-           for visualisation purposes.
-        """
-        filename = os.path.abspath(filename)
-        basename, ext = os.path.splitext(filename)
-        if ext not in (".pvd", ):
-            raise ValueError("Only output to PVD is supported")
+class BackgroundWriter(object):
+    """Run file output on a background thread.
 
-        if mode not in ["w", "a"]:
-            raise ValueError("Mode must be 'a' or 'w'")
-        if mode == "a" and not os.path.isfile(filename):
-            mode = "w"
+    :arg max_pending: the maximum number of writes waiting to run.
+        Submitting more blocks until one of them has completed.
 
-        comm = dup_comm(comm or COMM_WORLD)
+    Writes run in the order they were submitted.  An exception raised
+    by a write is re-raised by the next call to :meth:`submit`,
+    :meth:`flush` or :meth:`close`, and subsequent writes are skipped.
+    If the writer is not closed, it is closed when the interpreter
+    exits, so that pending writes are not lost.
+    """
 
-        if comm.rank == 0 and mode == "w":
-            outdir = os.path.dirname(os.path.abspath(filename))
-            if not os.path.exists(outdir):
-                os.makedirs(outdir)
-        elif comm.rank == 0 and mode == "a":
-            if not os.path.exists(os.path.abspath(filename)):
-                raise ValueError("Need a file to restart from.")
-        comm.barrier()
+    def __init__(self, max_pending=2):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        # The (daemon) thread is killed at exit, so finish the pending
+        # writes before then.
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                if self._error is None:
+                    job()
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, fn, *args):
+        """Schedule ``fn(*args)`` to run on the background thread."""
+        self._check()
+        self._queue.put(functools.partial(fn, *args))
+
+    def flush(self):
+        """Wait for all submitted writes to complete."""
+        self._queue.join()
+        self._check()
+
+    def close(self):
+        """Wait for all submitted writes to complete and stop the
+        background thread.
+
+        Re-raises the exception of a failed write, if there was one."""
+        atexit.unregister(self.close)
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._check()
+
+
+def stage(ofunction):
+    """Copy the array of an :class:`OFunction`, so that it is safe
+    to write after the function it came from has changed."""
+    return OFunction(array=numpy.array(ofunction.array),
+                     name=ofunction.name, function=None)
+
+
+class FunctionOutput(object):
+    r"""Base class for writing :class:`.Function`\s for visualisation.
+
+    :arg project_output: Should the output be projected to linears?
+        Default is to use interpolation.
+    :arg comm: The MPI communicator to use.
+    """
 
+    def __init__(self, project_output, comm):
         self.comm = comm
-        self.filename = filename
-        self.basename = basename
         self.project = project_output
-        countstart = 0
-
-        if self.comm.rank == 0 and mode == "w":
-            with open(self.filename, "wb") as f:
-                f.write(self._header)
-                f.write(self._footer)
-        elif self.comm.rank == 0 and mode == "a":
-            import xml.etree.ElementTree as ET
-            tree = ET.parse(os.path.abspath(filename))
-            # Count how many the file already has
-            for parent in tree.iter():
-                for child in list(parent):
-                    if child.tag != "DataSet":
-                        continue
-                    countstart += 1
-
-        if mode == "a":
-            # Need to communicate the count across all cores involved; default op is SUM
-            countstart = self.comm.allreduce(countstart)
-
-        self.counter = itertools.count(countstart)
-        self.timestep = itertools.count(countstart)
-
         self._fnames = None
         self._topology = None
         self._output_functions = weakref.WeakKeyDictionary()
@@ -395,7 +535,13 @@ class File(object):
 
         return OFunction(array=get_array(output), name=name, function=output)
 
-    def _write_vtu(self, *functions):
+    def _prepare_functions(self, *functions):
+        r"""Check the :class:`.Function`\s to write and prepare them
+        for output.
+
+        :returns: a tuple of the coordinate :class:`OFunction` and a
+            tuple of :class:`OFunction`\s for the functions.
+        """
         from firedrake.function import Function
         for f in functions:
             if not isinstance(f, Function):
@@ -426,15 +572,153 @@ class File(object):
         if self._topology is None:
             self._topology = get_topology(coordinates.function)
 
+        return coordinates, functions
+
+
+class File(FunctionOutput):
+    _header = (b'<?xml version="1.0" ?>\n'
+               b'<VTKFile type="Collection" version="0.1" '
+               b'byte_order="LittleEndian">\n'
+               b'<Collection>\n')
+    _footer = (b'</Collection>\n'
+               b'</VTKFile>\n')
+
+    def __init__(self, filename, project_output=False, comm=None, mode="w",
+                 single_file=False, asynchronous=False, max_pending=2,
+                 compression=None, compression_level=None,
+                 compression_threads=1):
+        """Create an object for outputting data for visualisation.
+
+        This produces output in VTU format, suitable for visualisation
+        with Paraview or other VTK-capable visualisation packages.
+
+
+        :arg filename: The name of the output file (must end in
+            ``.pvd``).
+        :kwarg project_output: Should the output be projected to
+            linears?  Default is to use interpolation.
+        :kwarg comm: The MPI communicator to use.
+        :kwarg mode: "w" to overwrite any existing file, "a" to append to an existing file.
+        :kwarg single_file: In parallel, write a single ``.vtu``
+            file per timestep, containing one piece per process,
+            collectively with MPI-IO, instead of one ``.vtu`` file per
+            process per timestep and a ``.pvtu`` file referencing them.
+        :kwarg asynchronous: Write files on a background thread, so
+            that :meth:`write` returns as soon as the data to write has
+            been copied.  Call :meth:`flush` to wait for the pending
+            writes, and :meth:`close` when done with the file.
+        :kwarg max_pending: With ``asynchronous=True``, the maximum
+            number of timesteps waiting to be written; :meth:`write`
+            blocks while this many are pending.
+        :kwarg compression: Compress the data written, with
+            ``"zlib"`` or ``"lz4"`` (which needs the lz4 package).
+            By default, data is written uncompressed.
+        :kwarg compression_level: The compression level to use, with
+            the meaning the compression library gives it.
+        :kwarg compression_threads: The number of threads to compress
+            data with.  Each array is compressed in independent
+            blocks, which are distributed among the threads.
+
+        .. note::
+
+           Visualisation is only possible for linear fields (either
+           continuous or discontinuous).  All other fields are first
+           either projected or interpolated to linear before storing
+           for visualisation purposes.
+        """
+        filename = os.path.abspath(filename)
+        basename, ext = os.path.splitext(filename)
+        if ext not in (".pvd", ):
+            raise ValueError("Only output to PVD is supported")
+
+        if mode not in ["w", "a"]:
+            raise ValueError("Mode must be 'a' or 'w'")
+        if mode == "a" and not os.path.isfile(filename):
+            mode = "w"
+        if compression is not None:
+            compressor = get_compressor(compression, compression_level)
+        else:
+            compressor = None
+
+        comm = dup_comm(comm or COMM_WORLD)
+
+        if comm.rank == 0 and mode == "w":
+            outdir = os.path.dirname(os.path.abspath(filename))
+            if not os.path.exists(outdir):
+                os.makedirs(outdir)
+        elif comm.rank == 0 and mode == "a":
+            if not os.path.exists(os.path.abspath(filename)):
+                raise ValueError("Need a file to restart from.")
+        comm.barrier()
+
+        super().__init__(project_output, comm)
+        self.filename = filename
+        self.basename = basename
+        self.single_file = single_file
+        countstart = 0
+
+        if self.comm.rank == 0 and mode == "w":
+            with open(self.filename, "wb") as f:
+                f.write(self._header)
+                f.write(self._footer)
+        elif self.comm.rank == 0 and mode == "a":
+            import xml.etree.ElementTree as ET
+            tree = ET.parse(os.path.abspath(filename))
+            # Count how many the file already has
+            for parent in tree.iter():
+                for child in list(parent):
+                    if child.tag != "DataSet":
+                        continue
+                    countstart += 1
+
+        if mode == "a":
+            # Need to communicate the count across all cores involved; default op is SUM
+            countstart = self.comm.allreduce(countstart)
+
+        self.counter = itertools.count(countstart)
+        self.timestep = itertools.count(countstart)
+
+        self._writer = BackgroundWriter(max_pending) if asynchronous else None
+        self._compressor = compressor
+        if compressor is not None and compression_threads > 1:
+            self._compression_pool = concurrent.futures.ThreadPoolExecutor(compression_threads)
+        else:
+            self._compression_pool = None
+
+    def _write_vtu(self, *functions):
+        coordinates, functions = self._prepare_functions(*functions)
+
         basename = "%s_%s" % (self.basename, next(self.counter))
 
-        vtu = self._write_single_vtu(basename, coordinates, *functions)
+        if self._writer is not None:
+            # The functions may change before the data are written.
+            coordinates = stage(coordinates)
+            functions = tuple(stage(f) for f in functions)
+
+        if self.single_file and self.comm.size > 1:
+            return self._write_shared_vtu(basename, coordinates, *functions)
+
+        vtu = get_vtu_name(basename, self.comm.rank, self.comm.size)
+        self._submit(self._write_single_vtu, basename, coordinates, *functions)
 
         if self.comm.size > 1:
-            vtu = self._write_single_pvtu(basename, coordinates, *functions)
+            vtu = get_pvtu_name(basename)
+            self._submit(self._write_single_pvtu, basename, coordinates, *functions)
 
         return vtu
 
+    def _array_bytes(self, ofunction):
+        if self._compressor is None:
+            return array_bytes(ofunction)
+        return compressed_array_bytes(ofunction, self._compressor,
+                                      pool=self._compression_pool)
+
+    def _submit(self, fn, *args):
+        if self._writer is None:
+            fn(*args)
+        else:
+            self._writer.submit(fn, *args)
+
     def _write_single_vtu(self, basename,
                           coordinates,
                           *functions):
@@ -445,48 +729,101 @@ class File(object):
         with open(fname, "wb") as f:
             # Running offset for appended data
             offset = 0
-            f.write(b'<?xml version="1.0" ?>\n')
-            f.write(b'<VTKFile type="UnstructuredGrid" version="0.1" '
-                    b'byte_order="LittleEndian" '
-                    b'header_type="UInt32">\n')
-            f.write(b'<UnstructuredGrid>\n')
-
-            f.write(('<Piece NumberOfPoints="%d" '
-                     'NumberOfCells="%d">\n' % (num_points, num_cells)).encode('ascii'))
-            f.write(b'<Points>\n')
-            # Vertex coordinates
-            offset += write_array_descriptor(f, coordinates, offset=offset)
-            f.write(b'</Points>\n')
-
-            f.write(b'<Cells>\n')
-            offset += write_array_descriptor(f, connectivity, offset=offset)
-            offset += write_array_descriptor(f, offsets, offset=offset)
-            offset += write_array_descriptor(f, types, offset=offset)
-            f.write(b'</Cells>\n')
+            write_vtu_header(f, self._compressor)
 
-            f.write(b'<PointData%s>\n' % active_field_attributes(functions))
-            for function in functions:
-                offset += write_array_descriptor(f, function, offset=offset)
-            f.write(b'</PointData>\n')
-
-            f.write(b'</Piece>\n')
+            arrays = (coordinates, connectivity, offsets, types) + functions
+            if self._compressor is None:
+                data = None
+                sizes = [4 + array.array.nbytes for array in arrays]    # 4 is for the array size (uint32)
+            else:
+                data = [self._array_bytes(array) for array in arrays]
+                sizes = [len(d) for d in data]
+            array_offsets = []
+            for size in sizes:
+                array_offsets.append(offset)
+                offset += size
+            write_piece_descriptor(f, num_points, num_cells, coordinates,
+                                   self._topology, functions, array_offsets)
             f.write(b'</UnstructuredGrid>\n')
 
             f.write(b'<AppendedData encoding="raw">\n')
             # Appended data must start with "_", separating whitespace
             # from data
             f.write(b'_')
-            write_array(f, coordinates)
-            write_array(f, connectivity)
-            write_array(f, offsets)
-            write_array(f, types)
-            for function in functions:
-                write_array(f, function)
+            if data is None:
+                for array in arrays:
+                    write_array(f, array)
+            else:
+                for d in data:
+                    f.write(d)
             f.write(b'\n</AppendedData>\n')
 
             f.write(b'</VTKFile>\n')
         return fname
 
+    def _write_shared_vtu(self, basename,
+                          coordinates,
+                          *functions):
+        from mpi4py import MPI
+
+        connectivity, offsets, types = self._topology
+        num_points = coordinates.array.shape[0]
+        num_cells = types.array.shape[0]
+        arrays = (coordinates, connectivity, offsets, types) + functions
+        data = [self._array_bytes(array) for array in arrays]
+        pieces = self.comm.allgather((num_points, num_cells,
+                                      [len(d) for d in data]))
+
+        # Every process builds the same header, with one piece per
+        # process.
+        header = io.BytesIO()
+        write_vtu_header(header, self._compressor)
+        # Running offset for appended data
+        offset = 0
+        starts = []
+        for piece_points, piece_cells, sizes in pieces:
+            starts.append(offset)
+            array_offsets = offset + numpy.cumsum([0] + sizes[:-1])
+            write_piece_descriptor(header, piece_points, piece_cells,
+                                   coordinates, self._topology, functions,
+                                   array_offsets)
+            offset += sum(sizes)
+        header.write(b'</UnstructuredGrid>\n')
+        header.write(b'<AppendedData encoding="raw">\n')
+        # Appended data must start with "_", separating whitespace
+        # from data
+        header.write(b'_')
+        header = header.getvalue()
+        footer = b'\n</AppendedData>\n</VTKFile>\n'
+
+        fname = get_vtu_name(basename, 0, 1)
+        size = len(header) + offset + len(footer)
+        chunks = [(len(header) + starts[self.comm.rank], b"".join(data))]
+        if self.comm.rank == 0:
+            chunks += [(0, header), (len(header) + offset, footer)]
+
+        if self._writer is not None:
+            # No MPI calls on the background thread: create the file
+            # now, and let every process write its chunks to it later.
+            if self.comm.rank == 0:
+                with open(fname, "wb") as f:
+                    f.truncate(size)
+            self.comm.barrier()
+            self._writer.submit(write_at, fname, chunks)
+            return fname
+
+        fh = MPI.File.Open(self.comm, fname, MPI.MODE_WRONLY | MPI.MODE_CREATE)
+        try:
+            fh.Set_size(size)
+            # Each process writes its own piece's data collectively.
+            (start, piece), *rest = chunks
+            for position, chunk in rest:
+                fh.Write_at(position, chunk)
+            fh.Write_at_all(start, piece)
+        finally:
+            fh.Close()
+        return fname
+
     def _write_single_pvtu(self, basename,
                            coordinates,
                            *functions):
@@ -544,11 +881,197 @@ class File(object):
         # things around.
         vtu = os.path.relpath(vtu, os.path.dirname(self.basename))
         if self.comm.rank == 0:
-            with open(self.filename, "r+b") as f:
-                # Seek backwards from end to beginning of footer
-                f.seek(-len(self._footer), 2)
-                # Write new dataset name
-                f.write(('<DataSet timestep="%s" '
-                         'file="%s" />\n' % (time, vtu)).encode('ascii'))
-                # And add footer again, so that the file is valid
-                f.write(self._footer)
+            self._submit(self._write_dataset, time, vtu)
+
+    def _write_dataset(self, time, vtu):
+        with open(self.filename, "r+b") as f:
+            # Seek backwards from end to beginning of footer
+            f.seek(-len(self._footer), 2)
+            # Write new dataset name
+            f.write(('<DataSet timestep="%s" '
+                     'file="%s" />\n' % (time, vtu)).encode('ascii'))
+            # And add footer again, so that the file is valid
+            f.write(self._footer)
+
+    def flush(self):
+        """Wait until all data passed to :meth:`write` is written.
+
+        This only has an effect for asynchronous output."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        """Finish writing any pending data and release the resources
+        used for asynchronous output.
+
+        No further data can be written after this."""
+        try:
+            if self._writer is not None:
+                self._writer.close()
+        finally:
+            if self._compression_pool is not None:
+                self._compression_pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class VTKHDFFile(FunctionOutput):
+    def __init__(self, filename, project_output=False, comm=None):
+        r"""Create an object for outputting data for visualisation on
+        a fixed mesh.
+
+        This produces output in the transient VTKHDF format, suitable
+        for visualisation with Paraview (version 5.12 or later) or
+        other VTK-capable visualisation packages.  Unlike
+        :class:`File`, which writes the mesh at every timestep, the
+        topology of the mesh is written only once, and its coordinates
+        only when they change, so that each timestep only adds the
+        values of the :class:`.Function`\s written.  All timesteps are
+        stored in a single file.
+
+        :arg filename: The name of the output file (must end in
+            ``.vtkhdf``).
+        :kwarg project_output: Should the output be projected to
+            linears?  Default is to use interpolation.
+        :kwarg comm: The MPI communicator to use.
+
+        This object can be used in a context manager (in which case it
+        closes the file when the scope is exited).
+
+        .. note::
+
+           As for :class:`File`, fields which are not linear are first
+           projected or interpolated to linear before being written.
+        """
+        import h5py
+
+        filename = os.path.abspath(filename)
+        if os.path.splitext(filename)[1] != ".vtkhdf":
+            raise ValueError("Only output to VTKHDF is supported")
+
+        comm = dup_comm(comm or COMM_WORLD)
+        if comm.rank == 0:
+            outdir = os.path.dirname(filename)
+            if not os.path.exists(outdir):
+                os.makedirs(outdir)
+        comm.barrier()
+
+        super().__init__(project_output, comm)
+        self.filename = filename
+        self.timestep = itertools.count()
+        try:
+            self._h5file = h5py.File(filename, "w", driver="mpio", comm=self.comm)
+        except NameError:  # the error you get if h5py isn't compiled against parallel HDF5
+            raise RuntimeError("h5py *must* be installed with MPI support")
+        self._coordinates = None
+        self._point_offset = None
+
+    def _append(self, name, array):
+        # Append the rows of each process's array to a dataset, in
+        # order of rank, and return the offset of the first one.
+        counts = self.comm.allgather(len(array))
+        if name in self._h5file:
+            dataset = self._h5file[name]
+        else:
+            dataset = self._h5file.create_dataset(name, shape=(0, ) + array.shape[1:],
+                                                  maxshape=(None, ) + array.shape[1:],
+                                                  dtype=array.dtype, chunks=True)
+        offset = dataset.shape[0]
+        dataset.resize(offset + sum(counts), axis=0)
+        if len(array):
+            start = offset + sum(counts[:self.comm.rank])
+            dataset[start:start + len(array)] = array
+        return offset
+
+    def _create_mesh(self):
+        # The topology of each process's part of the mesh, which does
+        # not change between timesteps.
+        root = self._h5file.create_group("VTKHDF")
+        root.attrs["Version"] = numpy.array([2, 0], dtype=numpy.int64)
+        root.attrs["Type"] = numpy.bytes_("UnstructuredGrid")
+        connectivity, offsets, types = self._topology
+        num_points = self.comm.allgather(self._coordinates.shape[0])
+        num_cells = self.comm.allgather(len(types.array))
+        num_ids = self.comm.allgather(len(connectivity.array))
+        for name, counts in [("NumberOfPoints", num_points),
+                             ("NumberOfCells", num_cells),
+                             ("NumberOfConnectivityIds", num_ids)]:
+            root.create_dataset(name, data=numpy.array(counts, dtype=numpy.int64))
+        self._append("VTKHDF/Connectivity", connectivity.array.astype(numpy.int64))
+        # VTKHDF cell offsets start from zero.
+        self._append("VTKHDF/Offsets", numpy.concatenate([[0], offsets.array]).astype(numpy.int64))
+        self._append("VTKHDF/Types", types.array)
+        root.create_group("PointData")
+        steps = root.create_group("Steps")
+        steps.create_group("PointDataOffsets")
+        steps.attrs["NSteps"] = 0
+
+    def write(self, *functions, **kwargs):
+        """Write functions to this :class:`VTKHDFFile`.
+
+        :arg functions: list of functions to write.
+        :kwarg time: optional timestep value.
+
+        All calls to :meth:`write` must use the same set of functions
+        on the same mesh.
+        """
+        time = kwargs.get("time", None)
+        coordinates, functions = self._prepare_functions(*functions)
+        if time is None:
+            time = next(self.timestep)
+
+        if self._coordinates is None:
+            self._coordinates = numpy.array(coordinates.array)
+            self._create_mesh()
+            changed = True
+        else:
+            changed = self.comm.allreduce(not numpy.array_equal(coordinates.array, self._coordinates))
+        if changed:
+            # Only write the coordinates again if the mesh has moved.
+            self._coordinates = numpy.array(coordinates.array)
+            self._point_offset = self._append("VTKHDF/Points", self._coordinates)
+
+        data_offsets = []
+        for function in functions:
+            array = function.array.reshape(len(function.array), -1)
+            if array.shape[1] == 1:
+                array = array.reshape(-1)
+            data_offsets.append(self._append("VTKHDF/PointData/%s" % function.name, array))
+
+        # Every timestep uses the same cells, and the current points.
+        step = {"Values": time,
+                "PartOffsets": 0,
+                "NumberOfParts": self.comm.size,
+                "PointOffsets": self._point_offset,
+                "CellOffsets": [0],
+                "ConnectivityIdOffsets": [0]}
+        step.update(("PointDataOffsets/%s" % function.name, offset)
+                    for function, offset in zip(functions, data_offsets))
+        for name, value in step.items():
+            value = numpy.array([value], dtype=float if name == "Values" else numpy.int64)
+            if self.comm.rank != 0:
+                # Only one process writes the (identical) step data.
+                value = value[:0]
+            self._append("VTKHDF/Steps/%s" % name, value)
+        steps = self._h5file["VTKHDF/Steps"]
+        steps.attrs["NSteps"] = steps["Values"].shape[0]
+        self._h5file.flush()
+
+    def close(self):
+        """Close the file.  No further data can be written after this."""
+        if hasattr(self, "_h5file"):
+            self._h5file.close()
+            del self._h5file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        self.close()
@@ -75,6 +75,18 @@ parameters.add(pyop2_opts)
 
 parameters.add(Parameters("form_compiler", **default_parameters()))
 
+# Maximum numbers of compiled kernels held in memory (None for no
+# limit): in total, for each form, and for recently compiled forms
+# looked up by structure (which keeps these forms alive).  Kernels
+# evicted from memory are reloaded from the disk cache when needed
+# again.  When the disk cache grows beyond max_disk_size bytes (None
+# for no limit), its least recently used kernels are pruned.
+parameters.add(Parameters("kernel_cache",
+                          max_kernels=1000,
+                          max_kernels_per_form=16,
+                          max_fingerprints=64,
+                          max_disk_size=None))
+
 parameters["reorder_meshes"] = True
 
 # One of nest, aij, baij or matfree
@@ -0,0 +1,166 @@
+"""Parallel in time integration with the parareal algorithm.
+
+The time interval is split into slices, one for each member of an
+:class:`.Ensemble`.  Each member integrates its own slice with an
+accurate (fine) propagator, starting from an approximation of the
+state at the start of the slice, and the approximations are
+corrected by sweeping a cheap (coarse) propagator through the slices
+in turn.  After ``k`` iterations, the first ``k`` slices are exact,
+but the approximations typically converge in far fewer iterations
+than there are slices.
+"""
+import time
+
+import numpy as np
+
+from pyop2.mpi import MPI
+
+import firedrake
+
+__all__ = ["Parareal"]
+
+
+def _norm(f):
+    with f.dat.vec_ro as v:
+        return v.norm()
+
+
+class Parareal(object):
+    r"""Integrate in time in parallel with the parareal algorithm.
+
+    :arg ensemble: the :class:`.Ensemble`, each member of which
+        integrates one time slice.
+    :arg coarse: the coarse propagator, a callable ``coarse(u, t0, t1)``
+        which advances the :class:`.Function` ``u`` (in place) from
+        time ``t0`` to ``t1``.
+    :arg fine: the fine propagator, with the same signature as
+        ``coarse``.
+    :arg t0: the start time.
+    :arg T: the end time.
+    :kwarg tolerance: the iteration stops when the largest relative
+        change in the state at the end of a slice is less than this.
+    :kwarg maxits: the maximum number of iterations (by default, the
+        number of slices, after which the solution is exact).
+    :kwarg monitor: an optional callable ``monitor(k, change)``, called
+        on every process after each iteration with the iteration
+        number and the largest relative change.
+
+    The state at the slice boundaries is passed between neighbouring
+    members with non-blocking messages, so that each member starts its
+    fine integration for the next iteration as soon as the corrected
+    state at the start of its slice arrives.
+    """
+
+    def __init__(self, ensemble, coarse, fine, t0, T, tolerance=1e-8,
+                 maxits=None, monitor=None):
+        self.ensemble = ensemble
+        self.coarse = coarse
+        self.fine = fine
+        nslices = ensemble.ensemble_comm.size
+        self.times = np.linspace(t0, T, nslices + 1)
+        """The times of the slice boundaries."""
+        self.tolerance = tolerance
+        self.maxits = nslices if maxits is None else maxits
+        self.monitor = monitor
+        self.changes = []
+        """The largest relative change in the state at the end of a
+        slice, for each iteration."""
+        self.timings = {"coarse": 0.0, "fine": 0.0, "wait": 0.0}
+        """The time (in seconds) this member spent in the coarse and
+        fine propagators, and waiting for the state at the start of
+        its slice."""
+
+    @property
+    def slice(self):
+        """The index of the time slice of this ensemble member."""
+        return self.ensemble.ensemble_comm.rank
+
+    def _propagate(self, propagator, u, kind):
+        start = time.time()
+        propagator(u, *self.times[self.slice:self.slice + 2])
+        self.timings[kind] += time.time() - start
+
+    def _wait(self, request):
+        start = time.time()
+        request.Wait()
+        self.timings["wait"] += time.time() - start
+
+    def gather_timings(self):
+        """Collect the timings of all the time slices.
+
+        :returns: a dict mapping the names of the timings (see
+            :attr:`timings`) to arrays with an entry for each slice.
+        """
+        comm = self.ensemble.ensemble_comm
+        return {kind: np.array(comm.allgather(t)) for kind, t in self.timings.items()}
+
+    def solve(self, u0, u):
+        r"""Integrate from the start to the end time.
+
+        :arg u0: a :class:`.Function` holding the initial condition
+            (only used by the first member of the ensemble).
+        :arg u: a :class:`.Function` in which the state at the end of
+            the time slice of this member is returned.  On the last
+            member, this is the state at the end time.
+        :returns: the number of iterations taken.
+        """
+        ensemble = self.ensemble
+        comm = ensemble.ensemble_comm
+        rank = self.slice
+        first = rank == 0
+        last = rank == comm.size - 1
+        V = u.function_space()
+        start = firedrake.Function(V)
+        new_start = firedrake.Function(V)
+        coarse = firedrake.Function(V)
+        old_coarse = firedrake.Function(V)
+        fine = firedrake.Function(V)
+        difference = firedrake.Function(V)
+        sends = []
+
+        def send(k):
+            if not last:
+                sends.append(ensemble.isend(u, dest=rank + 1, tag=k))
+
+        # Initial approximation by a (pipelined) sweep of the coarse propagator.
+        if first:
+            start.assign(u0)
+        else:
+            ensemble.recv(start, source=rank - 1, tag=0)
+        old_coarse.assign(start)
+        self._propagate(self.coarse, old_coarse, "coarse")
+        u.assign(old_coarse)
+        send(0)
+
+        self.changes = []
+        for k in range(1, self.maxits + 1):
+            # Receive the corrected start state while integrating
+            # the current one.
+            if first:
+                new_start.assign(start)
+            else:
+                request = ensemble.irecv(new_start, source=rank - 1, tag=k)
+            fine.assign(start)
+            self._propagate(self.fine, fine, "fine")
+            if not first:
+                self._wait(request)
+            start.assign(new_start)
+
+            coarse.assign(start)
+            self._propagate(self.coarse, coarse, "coarse")
+            fine.assign(coarse + fine - old_coarse)
+            old_coarse.assign(coarse)
+
+            difference.assign(fine - u)
+            change = _norm(difference) / max(_norm(fine), np.finfo(float).tiny)
+            u.assign(fine)
+            send(k)
+
+            change = comm.allreduce(change, op=MPI.MAX)
+            self.changes.append(change)
+            if self.monitor is not None:
+                self.monitor(k, change)
+            if change < self.tolerance:
+                break
+        firedrake.EnsembleRequest.Waitall(sends)
+        return len(self.changes)
@@ -1,4 +1,6 @@
 
+import numpy
+
 from pyop2.datatypes import IntType, as_cstr
 
 from coffee import base as ast
@@ -109,6 +111,8 @@ def compile_element(expression, coordinates, parameters=None):
 
     code = {
         "geometric_dimension": cell.geometric_dimension(),
+        "topological_dimension": dim,
+        "value_size": numpy.prod(expression.ufl_shape, dtype=int),
         "layers_arg": ", int const *__restrict__ layers" if extruded else "",
         "layers": ", layers" if extruded else "",
         "IntType": as_cstr(IntType),
@@ -146,6 +150,34 @@ int evaluate(struct Function *f, double *x, double *result)
     wrap_evaluate(result, reference_coords.X, cell, cell+1%(layers)s, f->coords, f->f, %(map_args)s);
     return 0;
 }
+
+int evaluate_points(struct Function *f, double *x, int npoints, double *result, int *found)
+{
+    int nfound = 0;
+    for (int i = 0; i < npoints; i++) {
+        found[i] = evaluate(f, x + i*%(geometric_dimension)d, result + i*%(value_size)d) == 0;
+        nfound += found[i];
+    }
+    return nfound;
+}
+
+int evaluate_reference_points(struct Function *f, int npoints, int *cells, double *X, double *result)
+{
+    for (int i = 0; i < npoints; i++) {
+        %(IntType)s cell = cells[i];
+        if (cell == -1) {
+            continue;
+        }
+        int layers[2] = {0, 0};
+        if (f->extruded != 0) {
+            int nlayers = f->n_layers;
+            layers[1] = cell %% nlayers + 2;
+            cell = cell / nlayers;
+        }
+        wrap_evaluate(result + i*%(value_size)d, X + i*%(topological_dimension)d, cell, cell+1%(layers)s, f->coords, f->f, %(map_args)s);
+    }
+    return 0;
+}
 """
 
     return (evaluate_template_c % code) + kernel_code.gencode()
@@ -0,0 +1,223 @@
+import numpy as np
+from mpi4py import MPI
+
+from firedrake.function import PointNotInDomainError
+from firedrake.utils import exchange_rows
+
+
+__all__ = ['PointEvaluator']
+
+
+class PointEvaluator(object):
+    r"""Evaluate :class:`.Function`\s at a fixed set of points.
+
+    Locating points in a mesh is much more expensive than evaluating a
+    :class:`.Function` at a known location.  A :class:`PointEvaluator`
+    finds the cell containing each point, the reference coordinates
+    of the point in that cell and the process owning that cell once,
+    after which evaluating any :class:`.Function` on the mesh only
+    requires tabulating its basis functions at the cached locations.
+
+    By default, as with :meth:`.Function.at`, every process must pass
+    the same points, and the evaluated values are returned on all
+    processes.  With ``redundant=False`` each process passes its own
+    points instead.  These are sent only to the processes whose part
+    of the mesh might contain them, and each process receives the
+    values at its own points only, so that the communication volume
+    does not grow with the number of processes.
+
+    If the coordinates of the cells containing the points change
+    (for example because the mesh moves), the points are located
+    again the next time a :class:`.Function` is evaluated.
+    """
+
+    def __init__(self, mesh, points, tolerance=None, dont_raise=False, redundant=True):
+        r"""
+        :arg mesh: the :func:`.Mesh` the points lie in.
+        :arg points: array-like of shape ``(npoints, gdim)`` containing
+            the point coordinates (for one dimensional meshes, a flat
+            array of coordinates is also accepted).
+        :kwarg tolerance: Tolerance to use when checking for points in cell.
+        :kwarg dont_raise: Do not raise an error if a point is not
+            found.  Values at such points are set to NaN.
+        :kwarg redundant: If ``True`` (the default), all processes
+            must pass the same points.  If ``False``, each process
+            passes (and gets values at) its own, possibly different,
+            points.
+        """
+        mesh.init()
+        if mesh.variable_layers:
+            raise NotImplementedError("Point evaluation not implemented for variable layers")
+        tdim = mesh.ufl_cell().topological_dimension()
+        gdim = mesh.ufl_cell().geometric_dimension()
+        if tdim < gdim:
+            raise NotImplementedError("Point is almost certainly not on the manifold.")
+
+        points = np.array(points, dtype=float)
+        if gdim == 1 and len(points.shape) < 2:
+            points = points.reshape(-1, 1)
+        if len(points.shape) != 2:
+            raise ValueError("PointEvaluator expects an array of points.")
+        if points.shape[1] != gdim:
+            raise ValueError("Point dimension (%d) does not match geometric dimension (%d)." % (points.shape[1], gdim))
+
+        self.mesh = mesh
+        self.points = points
+        self.tolerance = tolerance
+        self.dont_raise = dont_raise
+        self.redundant = redundant
+        self._locate()
+
+    @property
+    def comm(self):
+        return self.mesh.comm
+
+    def _cell_coordinates(self):
+        # The coordinate values of the cells containing the points
+        # evaluated on this process.
+        coordinates = self.mesh.coordinates
+        V = coordinates.function_space()
+        if self.mesh.layers is None:
+            nodes = V.cell_node_list[self._cells]
+        else:
+            nlayers = self.mesh.layers - 1
+            columns, layers = np.divmod(self._cells, nlayers)
+            nodes = V.cell_node_list[columns] + layers[:, np.newaxis] * V.offset
+        return coordinates.dat.data_ro_with_halos[nodes]
+
+    def _owned(self, cells):
+        # Which of the located cells are owned (not halo) cells?
+        mesh = self.mesh
+        columns = cells // (1 if mesh.layers is None else mesh.layers - 1)
+        return (cells != -1) & (columns < mesh.cell_set.size)
+
+    def _raise_not_found(self):
+        # Collectively raise if any process has points not in the domain.
+        comm = self.comm
+        missing = not self.found.all()
+        root = comm.allreduce(comm.rank if missing else comm.size, op=MPI.MIN)
+        if root < comm.size and not self.dont_raise:
+            point = self.points[np.argmin(self.found)] if comm.rank == root else None
+            raise PointNotInDomainError(self.mesh, comm.bcast(point, root=root))
+
+    def _partition_bounding_boxes(self):
+        # Bounding boxes of the local part (including halos) of the
+        # mesh on every process.
+        mesh = self.mesh
+        comm = self.comm
+        gdim = self.points.shape[1]
+        coords = mesh.coordinates.dat.data_ro_with_halos.reshape(-1, gdim)
+        box = np.empty((2, gdim), dtype=float)
+        if len(coords):
+            box[0] = coords.min(axis=0)
+            box[1] = coords.max(axis=0)
+            pad = (1e-14 if self.tolerance is None else self.tolerance) * (box[1] - box[0])
+            box[0] -= pad
+            box[1] += pad
+        else:
+            box[0] = np.inf
+            box[1] = -np.inf
+        boxes = np.empty((comm.size, 2, gdim), dtype=float)
+        comm.Allgather(box, boxes)
+        return boxes
+
+    def _locate(self):
+        # Building the spatial index is collective, but locating points
+        # only builds it on processes with points to locate.
+        self.mesh.spatial_index
+        if self.redundant:
+            self._locate_redundant()
+        else:
+            self._locate_distributed()
+        self._located_cell_coordinates = self._cell_coordinates()
+
+    def _locate_redundant(self):
+        comm = self.comm
+        cells, reference_coords = self.mesh._locate_points(self.points, tolerance=self.tolerance)
+
+        # Each point is owned by the lowest numbered process which
+        # found it in one of its owned (non-halo) cells.
+        owners = np.where(self._owned(cells), comm.rank, comm.size).astype(np.intc)
+        comm.Allreduce(MPI.IN_PLACE, owners, op=MPI.MIN)
+        self.found = owners < comm.size
+        self._raise_not_found()
+        self.owners = np.where(self.found, owners, -1)
+
+        self._local, = np.nonzero(self.owners == comm.rank)
+        self._cells = cells[self._local]
+        self._reference_coords = reference_coords[self._local]
+
+    def _locate_distributed(self):
+        comm = self.comm
+        points = self.points
+
+        # Send each point to every process whose bounding box contains it.
+        send_indices = []
+        for lo, hi in self._partition_bounding_boxes():
+            indices, = np.nonzero(np.all((points >= lo) & (points <= hi), axis=1))
+            send_indices.append(indices)
+        sendcounts = np.array([len(i) for i in send_indices], dtype=np.intc)
+        send_indices = np.concatenate(send_indices).astype(int)
+        destinations = np.repeat(np.arange(comm.size), sendcounts)
+        recvcounts = np.empty_like(sendcounts)
+        comm.Alltoall(sendcounts, recvcounts)
+        recv_points = exchange_rows(comm, points[send_indices], sendcounts, recvcounts)
+
+        # Locate the received points in our owned cells, and tell
+        # their senders which ones we found.
+        cells, reference_coords = self.mesh._locate_points(recv_points, tolerance=self.tolerance)
+        owned = self._owned(cells)
+        self._cells = cells[owned]
+        self._reference_coords = reference_coords[owned]
+        sources = np.repeat(np.arange(comm.size), recvcounts)
+        self._return_counts = np.bincount(sources[owned], minlength=comm.size).astype(np.intc)
+        found = exchange_rows(comm, owned.astype(np.intc), recvcounts, sendcounts).astype(bool)
+        self._result_counts = np.bincount(destinations[found], minlength=comm.size).astype(np.intc)
+
+        # Values are returned for the found points only, in the order
+        # they were sent.  Use the first returned value for each point.
+        found_indices = send_indices[found]
+        self._slots = np.full(len(points), -1, dtype=int)
+        self.owners = np.full(len(points), -1, dtype=np.intc)
+        unique, first = np.unique(found_indices, return_index=True)
+        self._slots[unique] = first
+        self.owners[unique] = destinations[found][first]
+        self.found = self._slots >= 0
+        self._raise_not_found()
+
+    def _check_locations(self):
+        changed = not np.array_equal(self._cell_coordinates(), self._located_cell_coordinates)
+        if self.comm.allreduce(changed, op=MPI.LOR):
+            self.mesh.update_spatial_index()
+            self._locate()
+
+    def _evaluate(self, function):
+        local = function._evaluate_reference_points(self._cells, self._reference_coords)
+        if self.redundant:
+            values = np.zeros((len(self.points), ) + function.ufl_shape, dtype=float)
+            values[self._local] = local
+            if self.comm.size > 1:
+                self.comm.Allreduce(MPI.IN_PLACE, values, op=MPI.SUM)
+        else:
+            values = np.empty((len(self.points), ) + function.ufl_shape, dtype=float)
+            result = exchange_rows(self.comm, local, self._return_counts, self._result_counts)
+            values[self.found] = result[self._slots[self.found]]
+        values[~self.found] = np.nan
+        return values
+
+    def evaluate(self, function):
+        r"""Evaluate a :class:`.Function` at the points.
+
+        :arg function: the :class:`.Function` to evaluate, which must
+            be defined on the mesh of this :class:`PointEvaluator`.
+        :returns: an array of shape ``(npoints, ) + value_shape``, or
+            for a mixed :class:`.Function`, a tuple of such arrays,
+            one for each component.
+        """
+        if function.ufl_domain() is not self.mesh:
+            raise ValueError("Function is not defined on the mesh of this PointEvaluator.")
+        self._check_locations()
+        split = function.split()
+        if len(split) != 1:
+            return tuple(self._evaluate(f) for f in split)
+        return self._evaluate(function)
@@ -0,0 +1,108 @@
+"""Ahead-of-time compilation of forms.
+
+Forms are compiled the first time they are assembled, which can make
+the start of a run with many forms slow.  The functions in this module
+assemble a set of forms beforehand, so that their kernels are in the
+TSFC and PyOP2 disk caches, and later runs start with a warm cache.
+
+Compiling forms in parallel needs them to be built in each worker
+process, so the forms are defined by a script: running it must define
+``forms``, which is either a list of forms (or Slate tensors), a dict
+mapping names to forms, or a callable returning one of these.  The
+script is run with ``__name__`` set to ``"__firedrake_precompile__"``,
+so that a script which also runs a simulation can skip it with the
+usual ``if __name__ == "__main__":`` guard.
+"""
+import collections
+import multiprocessing
+import runpy
+import time
+
+__all__ = ["CompileReport", "load_forms", "precompile", "precompile_script"]
+
+
+CompileReport = collections.namedtuple("CompileReport", ["name", "time"])
+CompileReport.__doc__ = """The time taken to compile (and assemble) a form."""
+
+
+def _named_forms(forms):
+    if callable(forms):
+        forms = forms()
+    if isinstance(forms, dict):
+        return list(forms.items())
+    return [("form %d" % i, form) for i, form in enumerate(forms)]
+
+
+def load_forms(script):
+    """Run a script and return the forms it defines.
+
+    :arg script: the path of the script.
+    :returns: a list of ``(name, form)`` pairs.
+    """
+    namespace = runpy.run_path(script, run_name="__firedrake_precompile__")
+    try:
+        forms = namespace["forms"]
+    except KeyError:
+        raise ValueError("Script %s does not define forms" % script)
+    return _named_forms(forms)
+
+
+def _compile(name, form):
+    from firedrake.assemble import assemble
+    from firedrake.function import Function
+    from firedrake.matrix import MatrixBase
+    start = time.time()
+    result = assemble(form)
+    # Assembly is lazy: force it, so that the PyOP2 code is generated
+    # and compiled too, exactly as a simulation using the form would.
+    if isinstance(result, MatrixBase):
+        result.force_evaluation()
+    elif isinstance(result, Function):
+        result.dat.data_ro
+    return CompileReport(name, time.time() - start)
+
+
+def precompile(forms):
+    r"""Compile forms in this process.
+
+    :arg forms: a list of forms, a dict mapping names to forms, or a
+        callable returning one of these.
+    :returns: a list of :class:`CompileReport`\s, one for each form.
+    """
+    return [_compile(name, form) for name, form in _named_forms(forms)]
+
+
+# The forms defined by the script, in a worker process.
+_worker_forms = None
+
+
+def _init_worker(script):
+    global _worker_forms
+    _worker_forms = load_forms(script)
+
+
+def _num_forms():
+    return len(_worker_forms)
+
+
+def _compile_form(i):
+    return _compile(*_worker_forms[i])
+
+
+def precompile_script(script, processes=None):
+    r"""Compile the forms defined by a script on a pool of processes.
+
+    :arg script: the path of a script defining ``forms`` (see
+        :mod:`firedrake.precompile`).
+    :kwarg processes: the number of processes to use (by default, the
+        number of CPUs).
+    :returns: a list of :class:`CompileReport`\s, one for each form.
+
+    Each process runs the script once, and then compiles a share of
+    the forms.  This should be called from a serial program, since
+    it starts new processes, each of which initialises MPI.
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes, initializer=_init_worker, initargs=(script, )) as pool:
+        nforms = pool.apply(_num_forms)
+        return pool.map(_compile_form, range(nforms), chunksize=1)
@@ -81,6 +81,38 @@ def from_regions(np.ndarray[np.float64_t, ndim=2, mode="c"] regions_lo,
     return spatial_index
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def update_regions(SpatialIndex sidx not None,
+                   np.ndarray[np.int64_t, ndim=1, mode="c"] ids,
+                   np.ndarray[np.float64_t, ndim=2, mode="c"] old_lo,
+                   np.ndarray[np.float64_t, ndim=2, mode="c"] old_hi,
+                   np.ndarray[np.float64_t, ndim=2, mode="c"] new_lo,
+                   np.ndarray[np.float64_t, ndim=2, mode="c"] new_hi):
+    """Moves entries of a spatial index to new regions.
+
+    The entry ids[i], which must have been inserted with the region
+    (old_lo[i], old_hi[i]), is replaced by an entry with the region
+    (new_lo[i], new_hi[i]).  The rest of the index is unchanged.
+    """
+    cdef:
+        int64_t i
+        uint32_t dim
+        RTError err
+
+    assert ids.shape[0] == old_lo.shape[0] == old_hi.shape[0] == new_lo.shape[0] == new_hi.shape[0]
+    assert old_lo.shape[1] == old_hi.shape[1] == new_lo.shape[1] == new_hi.shape[1]
+    dim = old_lo.shape[1]
+
+    for i in range(len(ids)):
+        err = Index_DeleteData(sidx.index, ids[i], &old_lo[i, 0], &old_hi[i, 0], dim)
+        if err != RT_None:
+            raise RuntimeError("failed to delete data from spatial index")
+        err = Index_InsertData(sidx.index, ids[i], &new_lo[i, 0], &new_hi[i, 0], dim, NULL, 0)
+        if err != RT_None:
+            raise RuntimeError("failed to insert data into spatial index")
+
+
 def bounding_boxes(SpatialIndex sidx not None, np.ndarray[np.float64_t, ndim=1] x):
     """Given a spatial index and a point, return the bounding boxes the point is in.
 
@@ -1,5 +1,6 @@
 """Provides the interface to TSFC for compiling a form, and transforms the TSFC-
 generated code in order to make it suitable for passing to the backends."""
+import copy
 import pickle
 
 from hashlib import md5
@@ -9,6 +10,7 @@ import os
 import zlib
 import tempfile
 import collections
+import numpy
 
 import ufl
 from ufl import Form
@@ -18,13 +20,16 @@ from tsfc import compile_form as tsfc_compile_form
 
 from pyop2.caching import Cached
 from pyop2.op2 import Kernel
-from pyop2.mpi import COMM_WORLD
+from pyop2.mpi import COMM_WORLD, MPI
 
-from coffee.base import Invert
+from coffee.base import Invert, Node
+
+from firedrake_configuration import diskcache
 
 from firedrake.formmanipulation import split_form
 
 from firedrake.parameters import parameters as default_parameters
+from firedrake.utils import LRUCache
 
 
 KernelInfo = collections.namedtuple("KernelInfo",
@@ -39,9 +44,31 @@ KernelInfo = collections.namedtuple("KernelInfo",
                                      "needs_cell_sizes"])
 
 
+def _max_kernels():
+    return default_parameters["kernel_cache"]["max_kernels"]
+
+
+def _max_kernels_per_form():
+    return default_parameters["kernel_cache"]["max_kernels_per_form"]
+
+
+def _max_fingerprints():
+    return default_parameters["kernel_cache"]["max_fingerprints"]
+
+
+# Statistics of the kernel caches of all forms.
+_form_cache_stats = collections.Counter()
+
+# Kernels of recently compiled forms, keyed on the form itself (UFL
+# forms hash and compare structurally), so that a form rebuilt
+# identically from the same terminals finds its kernels without
+# computing its signature.
+_fingerprint_cache = LRUCache(maxsize=_max_fingerprints)
+
+
 class TSFCKernel(Cached):
 
-    _cache = {}
+    _cache = LRUCache(maxsize=_max_kernels)
 
     _cachedir = environ.get('FIREDRAKE_TSFC_KERNEL_CACHE_DIR',
                             path.join(tempfile.gettempdir(),
@@ -50,22 +77,32 @@ class TSFCKernel(Cached):
     @classmethod
     def _cache_lookup(cls, key):
         key, comm = key
-        return cls._cache.get(key) or cls._read_from_disk(key, comm)
+        val = cls._cache.get(key)
+        # Each process evicts kernels from its in-memory cache
+        # independently, so agree on whether to (collectively) read
+        # the kernel from disk.
+        if comm.allreduce(val is None, op=MPI.LOR):
+            return cls._read_from_disk(key, comm)
+        return val
+
+    @classmethod
+    def _read_file(cls, key):
+        # The pickled kernel for a key, or None if it is not on disk.
+        shard, disk_key = key[:2], key[2:]
+        filepath = os.path.join(cls._cachedir, shard, disk_key)
+        try:
+            with gzip.open(filepath, 'rb') as f:
+                val = f.read()
+        except (OSError, EOFError, zlib.error):
+            # Not on disk, just removed by firedrake-clean, or corrupt.
+            return None
+        diskcache.touch(filepath)
+        return val
 
     @classmethod
     def _read_from_disk(cls, key, comm):
         if comm.rank == 0:
-            cache = cls._cachedir
-            shard, disk_key = key[:2], key[2:]
-            filepath = os.path.join(cache, shard, disk_key)
-            val = None
-            if os.path.exists(filepath):
-                try:
-                    with gzip.open(filepath, 'rb') as f:
-                        val = f.read()
-                except zlib.error:
-                    pass
-
+            val = cls._read_file(key)
             comm.bcast(val, root=0)
         else:
             val = comm.bcast(None, root=0)
@@ -74,6 +111,64 @@ class TSFCKernel(Cached):
             raise KeyError("Object with key %s not found" % key)
         return cls._cache.setdefault(key, pickle.loads(val))
 
+    @classmethod
+    def _read_many_from_disk(cls, keys, comm):
+        """Load several kernels from disk into the in-memory cache.
+
+        :arg keys: the cache keys (without communicator), which must
+            be the same on all processes.
+        :arg comm: the communicator the kernels are used on.
+        :returns: the number of kernels loaded.
+
+        Process zero reads the kernels, and sends them to one process
+        on each node, which shares them with the other processes on
+        its node through shared memory.
+        """
+        missing = numpy.array([key not in cls._cache for key in keys], dtype=numpy.uint8)
+        comm.Allreduce(MPI.IN_PLACE, missing, op=MPI.MAX)
+        keys = [key for key, m in zip(keys, missing) if m]
+
+        # Size of each pickled kernel, -1 if not on disk.
+        sizes = numpy.full(len(keys), -1, dtype=numpy.int64)
+        vals = []
+        if comm.rank == 0:
+            for i, key in enumerate(keys):
+                val = cls._read_file(key)
+                if val is not None:
+                    sizes[i] = len(val)
+                    vals.append(val)
+
+        node_comm = comm.Split_type(MPI.COMM_TYPE_SHARED, key=comm.rank)
+        leader_comm = comm.Split(0 if node_comm.rank == 0 else MPI.UNDEFINED, key=comm.rank)
+        try:
+            if leader_comm != MPI.COMM_NULL:
+                leader_comm.Bcast(sizes, root=0)
+            node_comm.Bcast(sizes, root=0)
+            offsets = numpy.concatenate([[0], numpy.cumsum(numpy.maximum(sizes, 0))])
+            if offsets[-1] == 0:
+                return 0
+            win = MPI.Win.Allocate_shared(int(offsets[-1]) if node_comm.rank == 0 else 0, 1,
+                                          comm=node_comm)
+            try:
+                buf = numpy.frombuffer(win.Shared_query(0)[0], dtype=numpy.uint8)
+                if comm.rank == 0:
+                    buf[:] = numpy.frombuffer(b"".join(vals), dtype=numpy.uint8)
+                if leader_comm != MPI.COMM_NULL:
+                    leader_comm.Bcast(buf, root=0)
+                node_comm.Barrier()
+                for key, size, offset in zip(keys, sizes, offsets):
+                    if size >= 0:
+                        cls._cache.setdefault(key, pickle.loads(buf[offset:offset + size]))
+                # Don't free the shared memory while it is being read.
+                node_comm.Barrier()
+            finally:
+                win.Free()
+            return int(numpy.count_nonzero(sizes >= 0))
+        finally:
+            node_comm.Free()
+            if leader_comm != MPI.COMM_NULL:
+                leader_comm.Free()
+
     @classmethod
     def _cache_store(cls, key, val):
         key, comm = key
@@ -85,20 +180,21 @@ class TSFCKernel(Cached):
             filepath = os.path.join(cls._cachedir, shard, disk_key)
             tempfile = os.path.join(cls._cachedir, shard, "%s_p%d.tmp" % (disk_key, os.getpid()))
             # No need for a barrier after this, since non root
-            # processes will never race on this file.
+            # processes never read the cache files.
             os.makedirs(os.path.join(cls._cachedir, shard), exist_ok=True)
             with gzip.open(tempfile, 'wb') as f:
                 pickle.dump(val, f, 0)
             os.rename(tempfile, filepath)
-        comm.barrier()
+            max_size = default_parameters["kernel_cache"]["max_disk_size"]
+            if max_size is not None:
+                diskcache.record_store(cls._cachedir, os.path.getsize(filepath), max_size)
 
     @classmethod
     def _cache_key(cls, form, name, parameters, number_map, interface, coffee=False):
-        # FIXME Making the COFFEE parameters part of the cache key causes
-        # unnecessary repeated calls to TSFC when actually only the kernel code
-        # needs to be regenerated
+        # The COFFEE parameters are not part of the key: they do not
+        # change the output of TSFC, only the backend kernels made
+        # from it (see kernels).
         return md5((form.signature() + name
-                    + str(sorted(default_parameters["coffee"].items()))
                     + str(sorted(parameters.items()))
                     + str(number_map)
                     + str(type(interface))
@@ -121,13 +217,12 @@ class TSFCKernel(Cached):
         tree = tsfc_compile_form(form, prefix=name, parameters=parameters, interface=interface, coffee=coffee)
         kernels = []
         for kernel in tree:
-            # Set optimization options
-            opts = default_parameters["coffee"]
             ast = kernel.ast
             ast = ast if not assemble_inverse else _inverse(ast)
             # Unwind coefficient numbering
             numbers = tuple(number_map[c] for c in kernel.coefficient_numbers)
-            kernels.append(KernelInfo(kernel=Kernel(ast, ast.name, opts=opts),
+            # The backend kernel is made from the AST on demand.
+            kernels.append(KernelInfo(kernel=ast,
                                       integral_type=kernel.integral_type,
                                       oriented=kernel.oriented,
                                       subdomain_id=kernel.subdomain_id,
@@ -136,9 +231,41 @@ class TSFCKernel(Cached):
                                       needs_cell_facets=False,
                                       pass_layer_arg=False,
                                       needs_cell_sizes=kernel.needs_cell_sizes))
-        self.kernels = tuple(kernels)
+        self._tsfc_kernels = tuple(kernels)
         self._initialized = True
 
+    def __getstate__(self):
+        # The backend kernels are not stored in the disk cache.
+        state = self.__dict__.copy()
+        state.pop("_backend_kernels", None)
+        return state
+
+    @property
+    def kernels(self):
+        r"""The :class:`KernelInfo`\s of the compiled kernels, with
+        :class:`pyop2.op2.Kernel`\s generated using the current
+        COFFEE parameters.
+
+        The output of TSFC does not depend on these parameters, so
+        changing them only regenerates the backend kernels.  These
+        are cached separately for each set of parameters.
+        """
+        opts = default_parameters["coffee"]
+        key = tuple(sorted(opts.items()))
+        cache = self.__dict__.setdefault("_backend_kernels", {})
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        kernels = []
+        for kinfo in self._tsfc_kernels:
+            ast = kinfo.kernel
+            if isinstance(ast, Node):
+                # COFFEE optimises the AST in place.
+                ast = copy.deepcopy(ast)
+            kernels.append(kinfo._replace(kernel=Kernel(ast, ast.name, opts=dict(opts))))
+        return cache.setdefault(key, tuple(kernels))
+
 
 SplitKernel = collections.namedtuple("SplitKernel", ["indices",
                                                      "kinfo"])
@@ -173,17 +300,14 @@ def compile_form(form, name, parameters=None, inverse=False, split=True, interfa
     if not isinstance(form, Form):
         raise RuntimeError("Unable to convert object to a UFL form: %s" % repr(form))
 
-    if parameters is None:
-        parameters = default_parameters["form_compiler"].copy()
-    else:
-        # Override defaults with user-specified values
-        _ = parameters
-        parameters = default_parameters["form_compiler"].copy()
-        parameters.update(_)
+    parameters = _form_compiler_parameters(parameters)
 
     # We stash the compiled kernels on the form so we don't have to recompile
     # if we assemble the same form again with the same optimisations
-    cache = form._cache.setdefault("firedrake_kernels", {})
+    cache = form._cache.get("firedrake_kernels")
+    if cache is None:
+        cache = LRUCache(maxsize=_max_kernels_per_form, stats=_form_cache_stats)
+        form._cache["firedrake_kernels"] = cache
 
     def tuplify(params):
         return tuple((k, params[k]) for k in sorted(params))
@@ -194,7 +318,38 @@ def compile_form(form, name, parameters=None, inverse=False, split=True, interfa
     except KeyError:
         pass
 
+    # Each process evicts forms from the fingerprint cache
+    # independently (and may have compiled other forms on
+    # COMM_SELF), but a miss makes a collective kernel cache lookup,
+    # so only use the cached kernels if all processes have them.
+    comm = form.ufl_domains()[0].comm
+    fingerprint = (form, key, interface, coffee)
+    kernels = _fingerprint_cache.get(fingerprint)
+    if comm.allreduce(kernels is not None, op=MPI.LAND):
+        return cache.setdefault(key, kernels)
+
     kernels = []
+    for idx, args in _kernel_arguments(form, name, parameters, split, interface, coffee):
+        kinfos = TSFCKernel(*args).kernels
+        for kinfo in kinfos:
+            kernels.append(SplitKernel(idx, kinfo))
+    kernels = tuple(kernels)
+    _fingerprint_cache[fingerprint] = kernels
+    return cache.setdefault(key, kernels)
+
+
+def _form_compiler_parameters(parameters):
+    # Override default form compiler parameters with user-specified values
+    _ = parameters
+    parameters = default_parameters["form_compiler"].copy()
+    if _ is not None:
+        parameters.update(_)
+    return parameters
+
+
+def _kernel_arguments(form, name, parameters, split, interface, coffee):
+    """Yield the indices of each (split) part of a form, and the
+    arguments of the :class:`TSFCKernel` compiled for it."""
     # A map from all form coefficients to their number.
     coefficient_numbers = dict((c, n)
                                for (n, c) in enumerate(form.coefficients()))
@@ -208,12 +363,72 @@ def compile_form(form, name, parameters=None, inverse=False, split=True, interfa
         # compiler) to the global coefficient numbers
         number_map = dict((n, coefficient_numbers[c])
                           for (n, c) in enumerate(f.coefficients()))
-        kinfos = TSFCKernel(f, name + "".join(map(str, idx)), parameters,
-                            number_map, interface, coffee).kernels
-        for kinfo in kinfos:
-            kernels.append(SplitKernel(idx, kinfo))
-    kernels = tuple(kernels)
-    return cache.setdefault(key, kernels)
+        yield idx, (f, name + "".join(map(str, idx)), parameters,
+                    number_map, interface, coffee)
+
+
+def prefetch_kernels(forms, name="form", parameters=None, split=True, interface=None, coffee=False):
+    r"""Load the compiled kernels for several forms from the disk cache.
+
+    Looking up the kernels of a form in the disk cache needs a
+    broadcast from process zero.  This function loads the kernels of
+    all the given forms with a few collective operations, and shares
+    them between the processes on each node through shared memory,
+    which is much faster at startup when there are many forms.
+    Kernels which are not in the disk cache are compiled as usual
+    when the forms are first assembled.
+
+    :arg forms: an iterable of :class:`~ufl.classes.Form`\s.  This
+        must be called collectively with the same forms on all
+        processes of their meshes' communicators.
+    :kwarg name: the prefix of the kernel names, the other
+        arguments are as for :func:`compile_form`.  The defaults are
+        those used by :func:`~.assemble`.
+    :returns: the number of kernels loaded.
+    """
+    parameters = _form_compiler_parameters(parameters)
+    # Cache keys, grouped by communicator.
+    comms = []
+    keys = []
+    for form in forms:
+        for _, args in _kernel_arguments(form, name, parameters, split, interface, coffee):
+            key, comm = TSFCKernel._cache_key(*args)
+            for c, k in zip(comms, keys):
+                if c is comm:
+                    k.append(key)
+                    break
+            else:
+                comms.append(comm)
+                keys.append([key])
+    return sum(TSFCKernel._read_many_from_disk(k, c) for c, k in zip(comms, keys))
+
+
+def kernel_cache_info():
+    r"""Return statistics of the in-memory caches of compiled kernels.
+
+    :returns: a dict with entries ``"kernels"``, for the cache of
+        :class:`TSFCKernel`\s, ``"fingerprints"``, for the cache of
+        kernels of structurally identical forms, and ``"forms"``, for
+        the per-form caches used by :func:`compile_form`, each a dict
+        of the numbers of ``"hits"``, ``"misses"`` and
+        ``"evictions"``.  The first two also give the current and
+        maximum size of the cache.
+    """
+    return {"kernels": TSFCKernel._cache.info(),
+            "fingerprints": _fingerprint_cache.info(),
+            "forms": {"hits": _form_cache_stats["hits"],
+                      "misses": _form_cache_stats["misses"],
+                      "evictions": _form_cache_stats["evictions"]}}
+
+
+def disk_cache_info():
+    """Return statistics of the on-disk cache of compiled kernels.
+
+    :returns: a dict with the number of ``"entries"``, their total
+        ``"size"`` in bytes, and the times of the ``"oldest"`` and
+        ``"newest"`` use of an entry.
+    """
+    return diskcache.cache_stats(TSFCKernel._cachedir)
 
 
 def _real_mangle(form):
@@ -1,4 +1,6 @@
 # Some generic python utilities not really specific to our work.
+import collections
+import numpy
 from decorator import decorator
 from pyop2.utils import cached_property  # noqa: F401
 
@@ -62,3 +64,105 @@ def known_pyop2_safe(f):
         finally:
             opts["type_check"] = check
     return decorator(wrapper, f)
+
+
+class LRUCache(object):
+    """A dictionary-like cache holding a bounded number of entries.
+
+    When the cache is full, adding an entry evicts the least recently
+    used one.
+
+    :kwarg maxsize: the maximum number of entries, or ``None`` for an
+        unbounded cache.  This may also be a callable returning the
+        maximum number of entries, which is called whenever an entry
+        is added, so that the size of the cache can be set at runtime.
+    :kwarg stats: an optional :class:`collections.Counter` to count
+        ``"hits"``, ``"misses"`` and ``"evictions"`` in.  This allows
+        several caches to share their statistics.
+    """
+
+    def __init__(self, maxsize=None, stats=None):
+        self._data = collections.OrderedDict()
+        self._maxsize = maxsize
+        self.stats = collections.Counter() if stats is None else stats
+
+    @property
+    def maxsize(self):
+        """The maximum number of entries (``None`` if unbounded)."""
+        maxsize = self._maxsize
+        return maxsize() if callable(maxsize) else maxsize
+
+    def __getitem__(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.stats["misses"] += 1
+            raise
+        self.stats["hits"] += 1
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        maxsize = self.maxsize
+        if maxsize is not None:
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def setdefault(self, key, value):
+        if key in self._data:
+            self._data.move_to_end(key)
+            return self._data[key]
+        self[key] = value
+        # Might have been evicted straight away if maxsize is zero.
+        return value
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+    def info(self):
+        """Return a dict of the cache statistics: the numbers of hits,
+        misses and evictions, and the current and maximum sizes."""
+        return {"hits": self.stats["hits"],
+                "misses": self.stats["misses"],
+                "evictions": self.stats["evictions"],
+                "currsize": len(self),
+                "maxsize": self.maxsize}
+
+
+def exchange_rows(comm, sendbuf, sendcounts, recvcounts):
+    """Exchange rows of an array between all processes.
+
+    :arg comm: the communicator.
+    :arg sendbuf: array whose first axis is ordered by destination process.
+    :arg sendcounts: number of rows to send to each process.
+    :arg recvcounts: number of rows to receive from each process.
+    :returns: the received rows, ordered by source process.
+    """
+    sendbuf = numpy.ascontiguousarray(sendbuf)
+    rowsize = int(numpy.prod(sendbuf.shape[1:], dtype=int))
+    recvbuf = numpy.empty((sum(recvcounts), ) + sendbuf.shape[1:], dtype=sendbuf.dtype)
+    sendcounts = numpy.asarray(sendcounts) * rowsize
+    recvcounts = numpy.asarray(recvcounts) * rowsize
+    senddispls = numpy.concatenate([[0], numpy.cumsum(sendcounts)[:-1]])
+    recvdispls = numpy.concatenate([[0], numpy.cumsum(recvcounts)[:-1]])
+    comm.Alltoallv([sendbuf, (sendcounts, senddispls)],
+                   [recvbuf, (recvcounts, recvdispls)])
+    return recvbuf
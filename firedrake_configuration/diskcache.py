@@ -0,0 +1,150 @@
+"""Management of Firedrake's on-disk caches of generated code.
+
+The caches are directories of files, sharded into subdirectories.
+The modification time of each file records when it was last used, so
+that the least recently used files can be removed to keep a cache
+within a given size.  This module only uses the standard library, so
+that `firedrake-clean` can manage the caches even if the
+:mod:`.firedrake` module itself is broken."""
+
+import os
+import time
+
+__all__ = ["touch", "cache_entries", "cache_stats", "prune", "record_store"]
+
+
+# Files are written to temporary files (ending in ``.tmp``) and then
+# renamed into place.  Temporary files modified more recently than
+# this many seconds ago might still be being written, so are not
+# cache entries; older ones were abandoned, and may be removed.
+TEMPFILE_GRACE = 3600
+
+# Estimated size (in bytes) of each cache this process has stored
+# files in, to decide when to prune it without scanning it.
+_size_estimates = {}
+
+
+def touch(path):
+    """Record that a cache file has just been used.
+
+    Access times are not reliably updated by many file systems, so
+    the modification time is updated instead.
+
+    :arg path: the path of the file.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        # Read only cache, or the file has just been pruned.
+        pass
+
+
+def cache_entries(cachedir):
+    """Return the files in a cache.
+
+    :arg cachedir: the cache directory.
+    :returns: a list of ``(path, size, mtime)`` tuples, least recently
+        used first.
+
+    Temporary files which might still be being written (see
+    :data:`TEMPFILE_GRACE`) are not included.
+    """
+    entries = []
+    now = time.time()
+    for root, _, files in os.walk(cachedir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Removed by someone else.
+                continue
+            if name.endswith(".tmp") and now - st.st_mtime < TEMPFILE_GRACE:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+    entries.sort(key=lambda entry: entry[2])
+    return entries
+
+
+def cache_stats(cachedir):
+    """Return statistics of a cache.
+
+    :arg cachedir: the cache directory.
+    :returns: a dict with the number of ``"entries"``, their total
+        ``"size"`` in bytes, and the times of the ``"oldest"`` and
+        ``"newest"`` use of an entry (``None`` if the cache is empty).
+    """
+    entries = cache_entries(cachedir)
+    return {"entries": len(entries),
+            "size": sum(size for _, size, _ in entries),
+            "oldest": entries[0][2] if entries else None,
+            "newest": entries[-1][2] if entries else None}
+
+
+def prune(cachedir, max_size=None, max_age=None):
+    """Remove files from a cache.
+
+    :arg cachedir: the cache directory.
+    :kwarg max_size: remove the least recently used files until the
+        total size of the cache is at most this many bytes.
+    :kwarg max_age: remove files last used more than this many
+        seconds ago.
+    :returns: a tuple of the number of files removed and the number
+        of bytes freed.
+    """
+    return _prune_entries(cache_entries(cachedir), max_size, max_age)
+
+
+def _prune_entries(entries, max_size=None, max_age=None):
+    """Remove some of the entries (see :func:`cache_entries`) of a
+    cache, as for :func:`prune`."""
+    total = sum(size for _, size, _ in entries)
+    now = time.time()
+    removed = 0
+    freed = 0
+    for path, size, mtime in entries:
+        too_old = max_age is not None and now - mtime > max_age
+        too_big = max_size is not None and total - freed > max_size
+        if not (too_old or too_big):
+            # Entries are sorted by age, so no later entry is too old.
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+def record_store(cachedir, size, max_size, low_water=0.8):
+    """Record that a file has been stored in a cache, and prune the
+    cache if it might have grown beyond a given size.
+
+    The size of the cache is estimated from the sizes of the files
+    stored by this process, so that the cache is only scanned when
+    the estimate exceeds ``max_size``.  It is then pruned to
+    ``low_water`` times ``max_size``, so that it is not scanned again
+    at the next store.
+
+    :arg cachedir: the cache directory.
+    :arg size: the size (in bytes) of the stored file.
+    :arg max_size: the maximum size (in bytes) of the cache.
+    :kwarg low_water: the fraction of ``max_size`` to prune to.
+    :returns: a tuple of the number of files removed and the number
+        of bytes freed.
+    """
+    estimate = _size_estimates.get(cachedir)
+    if estimate is None:
+        # First store in this cache: find its actual size.
+        estimate = cache_stats(cachedir)["size"]
+    else:
+        estimate += size
+    removed = freed = 0
+    if estimate > max_size:
+        entries = cache_entries(cachedir)
+        total = sum(entry[1] for entry in entries)
+        removed, freed = _prune_entries(entries, max_size=int(low_water * max_size))
+        estimate = total - freed
+    _size_estimates[cachedir] = estimate
+    return removed, freed
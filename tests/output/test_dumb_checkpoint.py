@@ -159,3 +159,95 @@ def test_new_file_valueerror(f, dumpfile):
         chk.store(f)
         with pytest.raises(ValueError):
             chk.new_file()
+
+
+@pytest.mark.parallel(nprocs=3)
+@pytest.mark.parametrize("family, degree", [("CG", 1), ("CG", 3), ("DG", 2)])
+def test_redistributable_checkpoint(dumpfile, family, degree):
+    dumpfile = COMM_WORLD.bcast(dumpfile, root=0)
+
+    def make_function(comm):
+        mesh = UnitSquareMesh(4, 4, comm=comm)
+        V = VectorFunctionSpace(mesh, family, degree)
+        x, y = SpatialCoordinate(mesh)
+        return Function(V, name="f").interpolate(as_vector([x*y, x + y*y])), Function(V, name="f")
+
+    # Store in serial, load on 3 processes.
+    if COMM_WORLD.rank == 0:
+        f, _ = make_function(COMM_SELF)
+        with DumbCheckpoint(dumpfile, mode=FILE_CREATE, comm=COMM_SELF,
+                            redistributable=True) as chk:
+            chk.store(f)
+    COMM_WORLD.barrier()
+    f, g = make_function(COMM_WORLD)
+    with DumbCheckpoint(dumpfile, mode=FILE_READ, comm=COMM_WORLD) as chk:
+        chk.load(g)
+    assert np.allclose(f.dat.data_ro, g.dat.data_ro)
+
+    # Store on 3 processes, load in serial.
+    with DumbCheckpoint(dumpfile, mode=FILE_CREATE, comm=COMM_WORLD,
+                        redistributable=True) as chk:
+        chk.store(f)
+    if COMM_WORLD.rank == 0:
+        f, g = make_function(COMM_SELF)
+        with DumbCheckpoint(dumpfile, mode=FILE_READ, comm=COMM_SELF) as chk:
+            chk.load(g)
+        assert np.allclose(f.dat.data_ro, g.dat.data_ro)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_redistributable_checkpoint_two_meshes(dumpfile):
+    dumpfile = COMM_WORLD.bcast(dumpfile, root=0)
+
+    def make_functions():
+        # The same numbers of entities, numbered differently.
+        functions = []
+        for name, diagonal in [("f", "left"), ("g", "right")]:
+            mesh = UnitSquareMesh(4, 4, diagonal=diagonal)
+            V = FunctionSpace(mesh, "CG", 2)
+            x, y = SpatialCoordinate(mesh)
+            functions.append((Function(V, name=name).interpolate(x + x*y*y),
+                              Function(V, name=name)))
+        return functions
+
+    functions = make_functions()
+    with DumbCheckpoint(dumpfile, mode=FILE_CREATE, redistributable=True) as chk:
+        for f, _ in functions:
+            chk.store(f)
+    with DumbCheckpoint(dumpfile, mode=FILE_READ) as chk:
+        for f, g in make_functions():
+            chk.load(g)
+            assert np.allclose(f.dat.data_ro, g.dat.data_ro)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_time_series_checkpoint(dumpfile):
+    dumpfile = COMM_WORLD.bcast(dumpfile, root=0)
+    mesh = UnitSquareMesh(4, 4)
+    V = FunctionSpace(mesh, "CG", 2)
+    x, y = SpatialCoordinate(mesh)
+    f = Function(V, name="f")
+    with DumbCheckpoint(dumpfile, mode=FILE_CREATE, time_series=True) as chk:
+        for i in range(5):
+            chk.set_timestep(0.1*i)
+            chk.store(f.interpolate(x + i*y))
+
+        steps, indices = chk.get_timesteps()
+        assert np.allclose(steps, 0.1*np.arange(5))
+        assert np.array_equal(indices, np.arange(5))
+
+    g = Function(V, name="f")
+    with DumbCheckpoint(dumpfile, mode=FILE_READ) as chk:
+        for i in [3, 0]:
+            chk.set_timestep(0.1*i, idx=i)
+            chk.load(g)
+            assert np.allclose(g.dat.data_ro, f.interpolate(x + i*y).dat.data_ro)
+
+
+@pytest.mark.parametrize("family", ["RT", "N1curl"])
+def test_redistributable_checkpoint_non_nodal_fails(dumpfile, family):
+    mesh = UnitSquareMesh(2, 2)
+    f = Function(FunctionSpace(mesh, family, 1), name="f")
+    with DumbCheckpoint(dumpfile, mode=FILE_CREATE, redistributable=True) as chk:
+        with pytest.raises(NotImplementedError):
+            chk.store(f)
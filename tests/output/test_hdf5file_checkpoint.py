@@ -129,3 +129,114 @@ def test_multiple_timestamps(f, dumpfile):
         timestamps = h5.get_timestamps()
 
         assert np.allclose(timestamps, [0.1, 0.2])
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_redistributable_checkpoint(dumpfile):
+    dumpfile = MPI.COMM_WORLD.bcast(dumpfile, root=0)
+
+    def make_functions(comm):
+        mesh = UnitSquareMesh(4, 4, quadrilateral=True, comm=comm)
+        W = FunctionSpace(mesh, "Q", 2) * FunctionSpace(mesh, "R", 0)
+        w = Function(W)
+        u, r = w.split()
+        x, y = SpatialCoordinate(mesh)
+        u.interpolate(x*y)
+        r.assign(2)
+        return w, Function(W)
+
+    # Store on 3 processes, load on 2.
+    w, _ = make_functions(MPI.COMM_WORLD)
+    with HDF5File(dumpfile, "w", comm=MPI.COMM_WORLD, redistributable=True) as h5:
+        h5.write(w, "/solution", timestamp=0.5)
+    comm = MPI.COMM_WORLD.Split(MPI.COMM_WORLD.rank < 2)
+    if MPI.COMM_WORLD.rank < 2:
+        w, w2 = make_functions(comm)
+        with HDF5File(dumpfile, "r", comm=comm) as h5:
+            h5.read(w2, "/solution", timestamp=0.5)
+        for a, b in zip(w.split(), w2.split()):
+            assert np.allclose(a.dat.data_ro, b.dat.data_ro)
+    comm.Free()
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_incremental_checkpoint(f, dumpfile, asynchronous):
+    if asynchronous and MPI.Query_thread() < MPI.THREAD_MULTIPLE:
+        pytest.skip("MPI does not support threads")
+    g = Function(f)
+    with HDF5File(dumpfile, "w", comm=f.comm, asynchronous=asynchronous,
+                  incremental=True) as h5:
+        h5.write(g, "/solution", timestamp=0)
+        h5.write(g, "/solution", timestamp=1)
+        # Changing g straight away doesn't change what is written.
+        g.assign(2*f)
+        h5.write(g, "/solution", timestamp=2)
+        h5.flush()
+        assert np.allclose(h5.get_timestamps(), [0, 1, 2])
+        paths = ["/solution/%.15e" % t for t in range(3)]
+        # Unchanged data is stored once.
+        assert h5.attributes(paths[1])["link"] == paths[0]
+        assert "link" not in h5.attributes(paths[2])
+        # Each timestamp keeps its own attributes.
+        assert [h5.attributes(p)["timestamp"] for p in paths] == [0, 1, 2]
+
+        # Rewriting an existing timestamp replaces it.
+        h5.write(g, "/solution", timestamp=1)
+        h5.write(g, "/solution", timestamp=1)
+        assert h5.attributes(paths[1])["link"] == paths[2]
+
+        # Functions in a different space are never linked.
+        mesh = UnitSquareMesh(2, 2, comm=f.comm)
+        h = Function(FunctionSpace(mesh, "CG", 1))
+        h.dat.data[:] = g.dat.data_ro
+        h5.write(h, "/solution", timestamp=3)
+        assert "link" not in h5.attributes("/solution/%.15e" % 3)
+
+        # Rewriting a timestamp that others link to keeps their values.
+        k = Function(f).assign(3*f)
+        h5.write(k, "/solution", timestamp=2)
+        assert "link" not in h5.attributes(paths[1])
+        assert h5.attributes(paths[1])["timestamp"] == 1
+
+        for t, expect in [(0, f), (1, g), (2, k), (3, g)]:
+            h = Function(f.function_space())
+            h5.read(h, "/solution", timestamp=t)
+            assert np.allclose(h.dat.data_ro, expect.dat.data_ro)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_compressed_checkpoint(dumpfile):
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 2)
+    x, y = SpatialCoordinate(mesh)
+    f = Function(V).interpolate(sin(10*x)*y)
+    dumpfile = mesh.comm.bcast(dumpfile, root=0)
+    with HDF5File(dumpfile, "w", comm=mesh.comm, chunk_size=64,
+                  compression="gzip", shuffle=True) as h5:
+        h5.write(f, "/exact")
+        h5.write(f, "/lossy", tolerance=1e-4)
+        dset = h5._h5file["/exact"]
+        assert dset.compression == "gzip"
+        assert dset.chunks == (64, )
+        assert h5._h5file["/lossy"].scaleoffset is not None
+
+    with HDF5File(dumpfile, "r", comm=mesh.comm) as h5:
+        g = Function(V)
+        h5.read(g, "/exact")
+        assert np.array_equal(f.dat.data_ro, g.dat.data_ro)
+        h5.read(g, "/lossy")
+        assert np.abs(f.dat.data_ro - g.dat.data_ro).max() < 1e-4
+
+
+@pytest.mark.parametrize("time_chunk", [1, 3])
+def test_time_series_checkpoint(f, dumpfile, time_chunk):
+    with HDF5File(dumpfile, "w", time_series=True, time_chunk=time_chunk) as h5:
+        for i in range(4):
+            h5.write(f, "/solution", timestamp=0.1*i)
+
+        assert np.allclose(h5.get_timestamps(), 0.1*np.arange(4))
+        assert h5._h5file["/solution/values"].chunks[0] == time_chunk
+
+        g = Function(f.function_space())
+        h5.read(g, "/solution", timestamp=0.2)
+        assert np.allclose(f.dat.data_ro, g.dat.data_ro)
@@ -129,3 +129,108 @@ def test_append(mesh, tmpdir):
         return Counter(s) == Counter(t)
 
     assert compare(files_in_tmp, expected_files)
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_single_file_parallel(dumpdir):
+    mesh = UnitSquareMesh(6, 6)
+    V = FunctionSpace(mesh, "CG", 1)
+    f = Function(V, name="f").interpolate(SpatialCoordinate(mesh)[0])
+
+    pvd = File(join(dumpdir, "shared.pvd"), single_file=True)
+    pvd.write(f)
+    pvd.write(f)
+    mesh.comm.barrier()
+
+    files = sorted(listdir(dumpdir))
+    assert files == ["shared.pvd", "shared_0.vtu", "shared_1.vtu"]
+
+    with open(join(dumpdir, "shared_0.vtu"), "rb") as fh:
+        data = fh.read()
+    header, _, _ = data.partition(b"<AppendedData")
+    assert header.count(b"<Piece ") == mesh.comm.size
+    num_points = mesh.comm.allreduce(f.dat.data_ro_with_halos.shape[0])
+    assert sum(int(p.split(b'"')[1]) for p in header.split(b"NumberOfPoints=")[1:]) == num_points
+    assert data.endswith(b"</AppendedData>\n</VTKFile>\n")
+
+
+@pytest.mark.parametrize("single_file",
+                         [False,
+                          pytest.param(True, marks=pytest.mark.parallel(nprocs=2))],
+                         ids=["separate", "single_file"])
+def test_asynchronous(dumpdir, single_file):
+    mesh = UnitSquareMesh(2, 2)
+    V = FunctionSpace(mesh, "CG", 1)
+    f = Function(V, name="f")
+
+    with File(join(dumpdir, "sync.pvd"), single_file=single_file) as pvd:
+        for t in range(3):
+            f.assign(t)
+            pvd.write(f, time=t)
+    with File(join(dumpdir, "async.pvd"), single_file=single_file,
+              asynchronous=True, max_pending=1) as pvd:
+        for t in range(3):
+            f.assign(t)
+            pvd.write(f, time=t)
+    mesh.comm.barrier()
+
+    def read(name):
+        with open(join(dumpdir, name), "rb") as fh:
+            return fh.read()
+
+    assert read("async.pvd") == read("sync.pvd").replace(b"sync_", b"async_")
+    files = [name for name in listdir(dumpdir) if name.startswith("sync_")]
+    assert len(files) > 0
+    for name in files:
+        assert read("a" + name) == read(name).replace(b"sync_", b"async_")
+
+
+@pytest.mark.parametrize("compression_threads", [1, 3])
+def test_compressed(dumpdir, compression_threads):
+    import numpy
+    import re
+    import zlib
+    mesh = UnitSquareMesh(80, 80)
+    V = FunctionSpace(mesh, "CG", 1)
+    f = Function(V, name="f").interpolate(SpatialCoordinate(mesh)[0])
+
+    with File(join(dumpdir, "compressed.pvd"), compression="zlib",
+              compression_threads=compression_threads) as pvd:
+        pvd.write(f)
+    with open(join(dumpdir, "compressed_0.vtu"), "rb") as fh:
+        data = fh.read()
+    header, _, appended = data.partition(b'<AppendedData encoding="raw">\n_')
+    assert b'compressor="vtkZLibDataCompressor"' in header
+
+    offset = int(re.search(rb'Name="f".*?offset="(\d+)"', header).group(1))
+    nblocks, block_size, last_size = numpy.frombuffer(appended, dtype=numpy.uint32,
+                                                      count=3, offset=offset)
+    sizes = numpy.frombuffer(appended, dtype=numpy.uint32, count=nblocks,
+                             offset=offset + 12)
+    start = offset + 12 + 4*nblocks
+    values = b""
+    for size in sizes:
+        values += zlib.decompress(appended[start:start + size])
+        start += size
+    assert nblocks > 1
+    assert len(values) == (nblocks - 1)*block_size + (last_size or block_size)
+    assert numpy.allclose(numpy.frombuffer(values, dtype=float), f.dat.data_ro)
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_compressed_single_file_empty_rank(dumpdir):
+    # Two cells on three processes: at least one owns no cells.
+    mesh = UnitSquareMesh(1, 1)
+    V = FunctionSpace(mesh, "CG", 1)
+    f = Function(V, name="f").interpolate(SpatialCoordinate(mesh)[0])
+    assert min(mesh.comm.allgather(mesh.cell_set.size)) == 0
+
+    with File(join(dumpdir, "empty.pvd"), single_file=True, compression="zlib") as pvd:
+        pvd.write(f)
+    mesh.comm.barrier()
+
+    with open(join(dumpdir, "empty_0.vtu"), "rb") as fh:
+        data = fh.read()
+    header, _, _ = data.partition(b"<AppendedData")
+    assert header.count(b"<Piece ") == mesh.comm.size
+    assert data.endswith(b"</AppendedData>\n</VTKFile>\n")
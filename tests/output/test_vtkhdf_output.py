@@ -0,0 +1,49 @@
+from os.path import join
+import h5py
+import numpy as np
+import pytest
+from firedrake import *
+
+
+def test_bad_extension(dumpdir):
+    with pytest.raises(ValueError):
+        VTKHDFFile(join(dumpdir, "output.pvd"))
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_static_mesh(dumpdir):
+    mesh = UnitSquareMesh(4, 4)
+    V = FunctionSpace(mesh, "CG", 1)
+    W = VectorFunctionSpace(mesh, "CG", 1)
+    f = Function(V, name="f")
+    g = Function(W, name="g")
+    filename = join(dumpdir, "output.vtkhdf")
+
+    with VTKHDFFile(filename) as out:
+        for t in range(3):
+            if t == 2:
+                mesh.coordinates.dat.data[:] *= 2
+            f.assign(t)
+            g.assign(Constant((t, -t)))
+            out.write(f, g, time=0.5*t)
+
+    num_points = mesh.comm.allreduce(len(f.dat.data_ro_with_halos))
+    num_cells = mesh.comm.allreduce(mesh.cell_set.size)
+    if mesh.comm.rank == 0:
+        with h5py.File(filename, "r") as h5:
+            root = h5["VTKHDF"]
+            assert root.attrs["Type"] == b"UnstructuredGrid"
+            assert sum(root["NumberOfCells"]) == num_cells
+            # The topology is written once, the coordinates twice.
+            assert root["Types"].shape == (num_cells, )
+            assert root["Offsets"].shape == (num_cells + mesh.comm.size, )
+            assert root["Points"].shape == (2*num_points, 3)
+            assert root["PointData/f"].shape == (3*num_points, )
+            assert root["PointData/g"].shape == (3*num_points, 3)
+            steps = root["Steps"]
+            assert steps.attrs["NSteps"] == 3
+            assert np.allclose(steps["Values"], [0, 0.5, 1])
+            assert np.array_equal(steps["PointOffsets"], [0, 0, num_points])
+            assert np.array_equal(steps["PointDataOffsets/f"], [0, num_points, 2*num_points])
+            assert np.allclose(root["PointData/f"][2*num_points:], 2)
+            assert np.allclose(root["Points"][num_points:], 2*root["Points"][:num_points])
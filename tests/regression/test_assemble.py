@@ -122,3 +122,63 @@ def test_assemble_mat_with_tensor(mesh):
     M = assemble(Constant(2)*a, M)
     # Make sure we get the result of the last assembly
     assert np.allclose(M.M.values, 2*assemble(a).M.values, rtol=1e-14)
+
+
+@pytest.mark.parametrize("rank", [0, 1, 2])
+def test_assembly_plan(mesh, rank):
+    V = FunctionSpace(mesh, "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    c = Function(V)
+    form = {0: c*c*dx,
+            1: c*v*dx + c*v*ds,
+            2: c*u*v*dx}[rank]
+    plan = AssemblyPlan(form)
+    for value in [1, 2, 3]:
+        c.assign(value)
+        result = plan.assemble()
+        expect = assemble(form)
+        if rank == 0:
+            assert np.allclose(result, expect)
+        elif rank == 1:
+            assert result is plan.tensor
+            assert np.allclose(result.dat.data_ro, expect.dat.data_ro)
+        else:
+            assert np.allclose(result.M.values, expect.M.values)
+
+
+def test_assembly_plan_bcs(mesh):
+    V = FunctionSpace(mesh, "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    c = Function(V)
+    bc = DirichletBC(V, 0, 1)
+    a = c*u*v*dx
+    L = c*v*dx
+    A = AssemblyPlan(a, bcs=bc)
+    b = AssemblyPlan(L, bcs=bc)
+    for value in [1, 2]:
+        c.assign(value)
+        assert np.allclose(A.assemble().M.values, assemble(a, bcs=bc).M.values)
+        assert np.allclose(b.assemble().dat.data_ro, assemble(L, bcs=bc).dat.data_ro)
+
+
+def test_assemble_many(mesh):
+    V = FunctionSpace(mesh, "CG", 1)
+    Q = VectorFunctionSpace(mesh, "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    c = Function(V).interpolate(SpatialCoordinate(mesh)[0])
+    forms = [c*dx, c*c*ds(1), v*dx, c*v*dx + v*ds, avg(c)*avg(v)*dS,
+             inner(Constant((1, 1)), TestFunction(Q))*dx, u*v*dx]
+    b = Function(V)
+    results = assemble_many(forms, tensors=[None, None, b, None, None, None, None])
+    assert results[2] is b
+    for form, result in zip(forms, results):
+        expect = assemble(form)
+        if len(form.arguments()) == 0:
+            assert np.allclose(result, expect)
+        elif len(form.arguments()) == 1:
+            assert np.allclose(result.dat.data_ro, expect.dat.data_ro)
+        else:
+            assert np.allclose(result.M.values, expect.M.values)
@@ -1,4 +1,6 @@
 from firedrake import *
+import numpy as np
+from pyop2.mpi import MPI
 import pytest
 
 
@@ -60,3 +62,100 @@ def test_comm_manager_allreduce():
     g = Function(V3)
     with pytest.raises(ValueError):
         manager.allreduce(f, g)
+
+
+@pytest.mark.parallel(nprocs=6)
+def test_ensemble_nonblocking_collectives():
+    manager = Ensemble(COMM_WORLD, 2)
+    rank = manager.ensemble_comm.rank
+    nmembers = manager.ensemble_comm.size
+
+    mesh = UnitSquareMesh(10, 10, comm=manager.comm)
+    V = FunctionSpace(mesh, "CG", 1)
+    W = V*FunctionSpace(mesh, "DG", 0)
+    u = Function(V).assign(rank + 1)
+    w = Function(W)
+    w.sub(0).assign(2*(rank + 1))
+    w.sub(1).assign(3*(rank + 1))
+
+    expected = nmembers*(nmembers + 1)/2
+    usum = Function(V)
+    wsum = Function(W)
+    request = manager.iallreduce([u, w], [usum, wsum])
+    request.Wait()
+    assert np.allclose(usum.dat.data_ro, expected)
+    assert np.allclose(wsum.dat.data_ro[0], 2*expected)
+    assert np.allclose(wsum.dat.data_ro[1], 3*expected)
+
+    umax = Function(V)
+    request = manager.ireduce(u, umax, op=MPI.MAX, root=1)
+    EnsembleRequest.Waitall([request])
+    assert np.allclose(umax.dat.data_ro, nmembers if rank == 1 else 0)
+
+    request = manager.ibcast([u, w], root=2)
+    while not request.Test():
+        pass
+    assert np.allclose(u.dat.data_ro, 3)
+    assert np.allclose(w.dat.data_ro[1], 9)
+
+
+@pytest.mark.parallel(nprocs=4)
+def test_ensemble_send_recv():
+    manager = Ensemble(COMM_WORLD, 2)
+    rank = manager.ensemble_comm.rank
+
+    mesh = UnitSquareMesh(10, 10, comm=manager.comm)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = Function(V).assign(rank + 1)
+    v = Function(V).assign(-(rank + 1))
+
+    if rank == 0:
+        request = manager.isend([u, v], dest=1, tag=3)
+        request.Wait()
+    else:
+        manager.recv([u, v], source=0, tag=3)
+        assert np.allclose(u.dat.data_ro, 1)
+        assert np.allclose(v.dat.data_ro, -1)
+
+
+@pytest.mark.parallel(nprocs=6)
+def test_ensemble_function():
+    manager = Ensemble(COMM_WORLD, 2)
+    rank = manager.ensemble_comm.rank
+
+    mesh = UnitSquareMesh(10, 10, comm=manager.comm)
+    V = FunctionSpace(mesh, "CG", 1)
+    x, y = SpatialCoordinate(mesh)
+    u = EnsembleFunction(manager, V, n=2)
+    for i, f in enumerate(u.subfunctions):
+        f.interpolate(x + (2*rank + i)*y)
+    assert u.nfunctions == 6
+
+    # Members 0, ..., 5 are x + k*y.
+    ks = np.arange(6)
+    mean = u.mean(Function(V))
+    variance = u.variance(Function(V))
+    expected = Function(V).interpolate(x + ks.mean()*y)
+    assert np.allclose(mean.dat.data_ro, expected.dat.data_ro)
+    expected.interpolate(ks.var(ddof=1)*y**2)
+    assert np.allclose(variance.dat.data_ro, expected.dat.data_ro)
+
+    # A large mean doesn't spoil the variance.
+    shifted = EnsembleFunction(manager, V, n=2)
+    for f, g in zip(shifted.subfunctions, u.subfunctions):
+        f.assign(g + 1e8)
+    shifted.variance(variance)
+    assert np.allclose(variance.dat.data_ro, expected.dat.data_ro)
+
+    w = EnsembleFunction(manager, V, n=2).assign(1)
+    ndofs = V.dim()
+    assert np.isclose(w.dot(w), 6*ndofs)
+    assert np.isclose(w.norm(), np.sqrt(6*ndofs))
+
+    w.axpy(-1, u)
+    with w.vec_ro as v:
+        assert v.comm.size == COMM_WORLD.size
+        assert np.isclose(v.norm(), w.norm())
+    with w.vec as v:
+        v.scale(2)
+    assert np.isclose(w.dot(u), -2*u.dot(u) + 2*u.dot(EnsembleFunction(manager, V, n=2).assign(1)))
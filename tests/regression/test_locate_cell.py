@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
 from firedrake import *
+from firedrake.mesh import IntervalIndex, ColumnIndex
 
 
 @pytest.fixture(scope="module", params=[False, True])
@@ -40,3 +41,94 @@ def test_locate_cell_not_found(meshdata):
     m, f = meshdata
 
     assert m.locate_cell((0.2, -0.4)) is None
+
+
+def test_locate_cells(meshdata):
+    m, f = meshdata
+    points = [(0.2, 0.1), (0.5, 0.2), (0.9, 0.8), (0.2, -0.4)]
+
+    cells, X = m.locate_cells(points)
+    assert (cells[:3] == [m.locate_cell(p) for p in points[:3]]).all()
+    assert cells[3] == -1
+    assert np.allclose([1, 2, 9], f.dat.data[cells[:3]])
+    assert X.shape == (4, 2)
+    assert ((X[:3] >= 0) & (X[:3] <= 1)).all()
+
+
+@pytest.mark.parametrize("extruded", [False, True])
+def test_locate_cells_all_candidates(extruded):
+    if extruded:
+        m = ExtrudedMesh(UnitIntervalMesh(4), 4)
+    else:
+        m = UnitSquareMesh(4, 4, quadrilateral=True)
+    # Interior vertex, interior facet midpoint, cell interior, outside
+    points = [(0.25, 0.5), (0.375, 0.5), (0.1, 0.1), (2, 2)]
+
+    offsets, cells, X = m.locate_cells(points, all_candidates=True)
+    assert (np.diff(offsets) == [4, 2, 1, 0]).all()
+    assert len(set(cells[:4])) == 4
+    assert len(set(cells[4:6])) == 2
+    assert cells[6] == m.locate_cell(points[2])
+    assert X.shape == (7, 2)
+
+
+def test_update_spatial_index():
+    m = UnitSquareMesh(8, 8)
+    assert m.locate_cell((0.5, 0.5)) is not None
+
+    # The first update moves every cell out of its exact bounding box,
+    # and enlarges the stored regions.
+    x = m.coordinates.dat.data
+    x[:, 0] += 1e-3
+    m.update_spatial_index()
+    sidx = m.spatial_index
+
+    # Later small movements stay inside the enlarged regions.
+    for shift in [2e-3, 3e-3, 4e-3]:
+        x[:, 0] += 1e-3
+        m.update_spatial_index()
+        assert m.spatial_index is sidx
+        assert m.locate_cell((1 + shift - 1e-4, 0.5)) is not None
+        assert m.locate_cell((shift - 1e-4, 0.5)) is None
+
+    # Large movement rebuilds the index.
+    x[:, 0] += 10
+    m.update_spatial_index()
+    assert m.spatial_index is not sidx
+    assert m.locate_cell((10.5, 0.5)) is not None
+    assert m.locate_cell((0.5, 0.5)) is None
+
+
+def test_locate_cell_interval_index():
+    m = IntervalMesh(10, -1, 1)
+    m.coordinates.dat.data[:] = np.sign(m.coordinates.dat.data_ro) * m.coordinates.dat.data_ro**2
+    assert isinstance(m.spatial_index, IntervalIndex)
+
+    points = np.linspace(-0.99, 0.99, 50)
+    cells, X = m.locate_cells(points)
+    assert (cells >= 0).all()
+    assert (cells == [m.locate_cell(p) for p in points]).all()
+    lo = m.spatial_index.lo[np.argsort(m.spatial_index.ids)]
+    hi = m.spatial_index.hi[np.argsort(m.spatial_index.ids)]
+    assert ((lo[cells] <= points) & (points <= hi[cells])).all()
+    assert m.locate_cell(1.5) is None
+
+
+@pytest.mark.parametrize("extrusion_type", ["uniform", "radial"])
+def test_locate_cell_column_index(extrusion_type):
+    if extrusion_type == "uniform":
+        m = ExtrudedMesh(UnitSquareMesh(4, 4), 8)
+        points = np.random.RandomState(0).uniform(0, 1, size=(20, 3))
+    else:
+        m = ExtrudedMesh(CircleManifoldMesh(16), 4, layer_height=0.25, extrusion_type="radial")
+        theta = np.linspace(0, 2*np.pi, 20)
+        r = np.linspace(1.05, 1.95, 20)
+        points = np.stack([r*np.cos(theta), r*np.sin(theta)], axis=1)
+    if extrusion_type == "uniform":
+        assert isinstance(m.spatial_index, ColumnIndex)
+    f = Function(FunctionSpace(m, "DG", 0))
+    f.dat.data[:] = np.arange(len(f.dat.data))
+
+    cells, X = m.locate_cells(points)
+    assert (cells >= 0).all()
+    assert np.allclose(f.dat.data[cells], f.at(points))
@@ -0,0 +1,44 @@
+from firedrake import *
+import numpy as np
+import pytest
+
+
+def backward_euler(nsteps):
+    # Integrate du/dt = -u.
+    def propagate(u, t0, t1):
+        dt = (t1 - t0)/nsteps
+        for _ in range(nsteps):
+            u.assign(u/(1 + dt))
+    return propagate
+
+
+@pytest.mark.parallel(nprocs=4)
+def test_parareal():
+    ensemble = Ensemble(COMM_WORLD, 1)
+    mesh = UnitSquareMesh(4, 4, comm=ensemble.comm)
+    V = FunctionSpace(mesh, "CG", 1)
+    x, y = SpatialCoordinate(mesh)
+    u0 = Function(V).interpolate(1 + x*y)
+    u = Function(V)
+
+    changes = []
+    parareal = Parareal(ensemble, backward_euler(2), backward_euler(50), 0, 2,
+                        tolerance=1e-3, monitor=lambda k, change: changes.append(change))
+    iterations = parareal.solve(u0, u)
+
+    # Parareal converges in fewer iterations than there are slices
+    # (after which it would be exact), with decreasing changes.
+    assert iterations < 4
+    assert changes == parareal.changes
+    assert len(changes) == iterations
+    assert all(b < a for a, b in zip(changes, changes[1:]))
+    assert changes[-1] < 1e-3 <= changes[-2]
+
+    expected = Function(V).assign(u0)
+    fine = backward_euler(50)
+    for i in range(ensemble.ensemble_comm.rank + 1):
+        fine(expected, *parareal.times[i:i + 2])
+    assert np.allclose(u.dat.data_ro, expected.dat.data_ro, atol=1e-5)
+
+    timings = parareal.gather_timings()
+    assert all(len(t) == 4 for t in timings.values())
@@ -131,6 +131,42 @@ def test_dont_raise_mixed():
     assert f.at([1.2, 0.5], dont_raise=True) is None
 
 
+def test_batch_evaluation():
+    mesh = UnitSquareMesh(4, 4)
+    V = VectorFunctionSpace(mesh, "CG", 2)
+    x = SpatialCoordinate(mesh)
+    f = Function(V).interpolate(as_vector((x[0]*x[1], x[0] + x[1])))
+
+    points = np.random.RandomState(0).uniform(-0.5, 1.5, size=(1000, 2))
+    inside = np.all((points >= 0) & (points <= 1), axis=1)
+
+    values, found = f._evaluate_points(points)
+    assert values.shape == (1000, 2)
+    assert (found == inside).all()
+    expect = np.stack([points[:, 0]*points[:, 1], points[:, 0] + points[:, 1]], axis=1)
+    assert np.allclose(expect[found], values[found])
+
+    actual = f.at(points, dont_raise=True)
+    assert all((a is None) == (not i) for a, i in zip(actual, inside))
+    assert np.allclose(expect[inside], [a for a in actual if a is not None])
+
+
+def test_batch_evaluation_mixed():
+    mesh = UnitSquareMesh(2, 2)
+    V = FunctionSpace(mesh, "CG", 1) * VectorFunctionSpace(mesh, "DG", 0)
+    f = Function(V)
+    f1, f2 = f.split()
+    x = SpatialCoordinate(mesh)
+    f1.interpolate(x[0] + x[1])
+    f2.assign(Constant((1.0, 2.0)))
+
+    points = np.array([[0.1, 0.2], [0.4, 0.9], [2.0, 0.3]])
+    (v1, v2), found = f._evaluate_points(points)
+    assert (found == [True, True, False]).all()
+    assert np.allclose([0.3, 1.3], v1[:2])
+    assert np.allclose([[1.0, 2.0], [1.0, 2.0]], v2[:2])
+
+
 @pytest.mark.parallel(nprocs=3)
 def test_nascent_parallel_support():
     mesh = UnitSquareMesh(8, 8)
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from firedrake import *
+
+
+@pytest.fixture(params=[False, True], ids=["simplex", "extruded"])
+def mesh(request):
+    if request.param:
+        return ExtrudedMesh(UnitSquareMesh(4, 4), 4)
+    return UnitCubeMesh(4, 4, 4)
+
+
+@pytest.fixture
+def points():
+    return np.random.RandomState(0).uniform(0.01, 0.99, size=(50, 3))
+
+
+def test_point_evaluator_matches_at(mesh, points):
+    x = SpatialCoordinate(mesh)
+    V = FunctionSpace(mesh, "CG", 2)
+    W = VectorFunctionSpace(mesh, "DG", 1)
+    f = Function(V).interpolate(x[0]*x[1] + x[2])
+    g = Function(W).interpolate(as_vector((x[2], x[0], x[1])))
+
+    probes = PointEvaluator(mesh, points)
+    assert probes.found.all()
+    assert np.allclose(probes.evaluate(f), f.at(points))
+    assert np.allclose(probes.evaluate(g), points[:, [2, 0, 1]])
+
+
+def test_point_evaluator_mixed(mesh, points):
+    x = SpatialCoordinate(mesh)
+    V = FunctionSpace(mesh, "CG", 1) * VectorFunctionSpace(mesh, "CG", 1)
+    f = Function(V)
+    f1, f2 = f.split()
+    f1.interpolate(x[0])
+    f2.interpolate(x)
+
+    v1, v2 = PointEvaluator(mesh, points).evaluate(f)
+    assert np.allclose(v1, points[:, 0])
+    assert np.allclose(v2, points)
+
+
+def test_point_evaluator_not_in_domain():
+    mesh = UnitSquareMesh(2, 2)
+    f = mesh.coordinates
+    with pytest.raises(PointNotInDomainError):
+        PointEvaluator(mesh, [[0.5, 0.5], [1.5, 0.5]])
+
+    probes = PointEvaluator(mesh, [[0.5, 0.5], [1.5, 0.5]], dont_raise=True)
+    assert (probes.found == [True, False]).all()
+    values = probes.evaluate(f)
+    assert np.allclose(values[0], [0.5, 0.5])
+    assert np.isnan(values[1]).all()
+
+
+def test_point_evaluator_moving_mesh():
+    mesh = UnitSquareMesh(4, 4)
+    f = Function(FunctionSpace(mesh, "DG", 0))
+    f.dat.data[:] = np.arange(len(f.dat.data))
+
+    probes = PointEvaluator(mesh, [[0.3, 0.6]])
+    before = probes.evaluate(f)
+    assert np.allclose(before, f.at([0.3, 0.6]))
+
+    mesh.coordinates.dat.data[:] *= 0.5
+    mesh.clear_spatial_index()
+    with pytest.raises(PointNotInDomainError):
+        probes.evaluate(f)
+
+    mesh.coordinates.dat.data[:] *= 4
+    mesh.clear_spatial_index()
+    assert np.allclose(probes.evaluate(f), f.at([0.3, 0.6]))
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_point_evaluator_parallel():
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 2)
+    x = SpatialCoordinate(mesh)
+    f = Function(V).interpolate((x[0] + 0.2)*x[1])
+
+    probes = PointEvaluator(mesh, [[0.12, 0.18], [0.98, 0.87], [0.12, 0.68]])
+    assert ((probes.owners >= 0) & (probes.owners < mesh.comm.size)).all()
+    assert np.allclose([0.0576, 1.0266, 0.2176], probes.evaluate(f))
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_point_evaluator_distributed():
+    mesh = UnitSquareMesh(8, 8)
+    V = VectorFunctionSpace(mesh, "CG", 2)
+    x = SpatialCoordinate(mesh)
+    f = Function(V).interpolate(as_vector(((x[0] + 0.2)*x[1], x[0])))
+
+    rank = mesh.comm.rank
+    points = np.random.RandomState(rank).uniform(0, 1, size=(10*(rank + 1), 2))
+    points[0] = [1.5, 0.5]
+    probes = PointEvaluator(mesh, points, dont_raise=True, redundant=False)
+    assert not probes.found[0] and probes.found[1:].all()
+
+    values = probes.evaluate(f)
+    expect = np.stack([(points[:, 0] + 0.2)*points[:, 1], points[:, 0]], axis=1)
+    assert np.isnan(values[0]).all()
+    assert np.allclose(expect[1:], values[1:])
+
+    actual = f.at(points, dont_raise=True, redundant=False)
+    assert actual[0] is None
+    assert np.allclose(expect[1:], actual[1:])
+
+    with pytest.raises(PointNotInDomainError):
+        PointEvaluator(mesh, points, redundant=False)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_point_evaluator_distributed_no_points():
+    mesh = UnitSquareMesh(4, 4)
+    f = mesh.coordinates
+    if mesh.comm.rank == 0:
+        points = np.array([[0.25, 0.75], [0.6, 0.1]])
+    else:
+        points = np.empty((0, 2))
+    assert np.allclose(points, PointEvaluator(mesh, points, redundant=False).evaluate(f))
@@ -0,0 +1,45 @@
+from firedrake import *
+from firedrake.precompile import precompile, precompile_script
+
+
+script = """
+from firedrake import *
+
+mesh = UnitSquareMesh(2, 2)
+V = FunctionSpace(mesh, "CG", 2)
+u = TrialFunction(V)
+v = TestFunction(V)
+forms = {"mass": u*v*dx,
+         "laplace": inner(grad(u), grad(v))*dx + u*v*ds}
+"""
+
+
+def forms():
+    mesh = UnitSquareMesh(2, 2)
+    V = FunctionSpace(mesh, "CG", 2)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    return [u*v*dx, inner(grad(u), grad(v))*dx + u*v*ds]
+
+
+def test_precompile():
+    reports = precompile(forms)
+    assert [report.name for report in reports] == ["form 0", "form 1"]
+    assert all(report.time >= 0 for report in reports)
+
+
+def test_precompile_script(tmpdir, monkeypatch):
+    filename = tmpdir.join("forms.py")
+    filename.write(script)
+    # An empty PyOP2 cache, which the worker processes inherit.
+    pyop2_cache = tmpdir.mkdir("pyop2")
+    monkeypatch.setenv("PYOP2_CACHE_DIR", str(pyop2_cache))
+    reports = precompile_script(str(filename), processes=2)
+    assert [report.name for report in reports] == ["mass", "laplace"]
+
+    # The generated code has been compiled.
+    assert len(list(pyop2_cache.visit("*.so"))) >= 2
+
+    # The kernels are now in the disk cache.
+    tsfc_interface.TSFCKernel._cache.clear()
+    assert tsfc_interface.prefetch_kernels(forms()) == 2
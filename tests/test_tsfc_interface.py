@@ -3,6 +3,7 @@ from firedrake import *
 import os
 import subprocess
 import sys
+import time
 import loopy
 
 
@@ -132,3 +133,211 @@ with open("{file}", "w") as f:
         kernel_name = sorted(k_[1][0].name for k_ in k)
         assert len(k) == 2 and 'cell_integral' in kernel_name[0] and \
             'exterior_facet_integral' in kernel_name[1]
+
+    def test_tsfc_cache_bounded(self, mass, laplace):
+        """The in-memory kernel cache should evict the least recently
+        used kernels when full."""
+        opts = parameters["kernel_cache"]
+        max_kernels = opts["max_kernels"]
+        opts["max_kernels"] = 1
+        try:
+            before = tsfc_interface.kernel_cache_info()["kernels"]
+            k1 = tsfc_interface.TSFCKernel(mass, 'mass', parameters["form_compiler"], {}, None)
+            k2 = tsfc_interface.TSFCKernel(laplace, 'laplace', parameters["form_compiler"], {}, None)
+            info = tsfc_interface.kernel_cache_info()["kernels"]
+            assert info["currsize"] == 1
+            assert info["evictions"] > before["evictions"]
+            assert tsfc_interface.TSFCKernel(laplace, 'laplace', parameters["form_compiler"], {}, None) is k2
+            # Evicted kernels are reloaded from disk.
+            k3 = tsfc_interface.TSFCKernel(mass, 'mass', parameters["form_compiler"], {}, None)
+            assert k3 is not k1 and k3.cache_key == k1.cache_key
+        finally:
+            opts["max_kernels"] = max_kernels
+
+    def test_form_cache_bounded(self, mass):
+        """The kernels cached on a form should be bounded."""
+        opts = parameters["kernel_cache"]
+        max_kernels = opts["max_kernels_per_form"]
+        opts["max_kernels_per_form"] = 2
+        try:
+            for name in ["a", "b", "c"]:
+                tsfc_interface.compile_form(mass, name)
+            assert len(mass._cache["firedrake_kernels"]) == 2
+            hits = tsfc_interface.kernel_cache_info()["forms"]["hits"]
+            tsfc_interface.compile_form(mass, "c")
+            assert tsfc_interface.kernel_cache_info()["forms"]["hits"] == hits + 1
+        finally:
+            opts["max_kernels_per_form"] = max_kernels
+
+    def test_coffee_parameters_only_regenerate_backend(self, mass):
+        """Changing the COFFEE parameters should reuse the TSFC output."""
+        k1 = tsfc_interface.TSFCKernel(mass, 'mass', parameters["form_compiler"], {}, None)
+        kernels = k1.kernels
+        optlevel = parameters["coffee"]["optlevel"]
+        parameters["coffee"]["optlevel"] = "O0" if optlevel != "O0" else "O2"
+        try:
+            k2 = tsfc_interface.TSFCKernel(mass, 'mass', parameters["form_compiler"], {}, None)
+            assert k2 is k1
+            assert k2.kernels is not kernels
+            assert k2.kernels is k2.kernels
+        finally:
+            parameters["coffee"]["optlevel"] = optlevel
+        assert k1.kernels is kernels
+
+    def test_tsfc_rebuilt_form(self, fs):
+        """Compiling a rebuilt, structurally identical form should
+        load kernels from cache."""
+        f = Function(fs)
+        v = TestFunction(fs)
+        k1 = tsfc_interface.compile_form(f*v*dx, 'form')
+        hits = tsfc_interface.kernel_cache_info()["fingerprints"]["hits"]
+        k2 = tsfc_interface.compile_form(f*v*dx, 'form')
+        assert k1 is k2
+        assert tsfc_interface.kernel_cache_info()["fingerprints"]["hits"] == hits + 1
+        # Different coefficients, same signature.
+        g = Function(fs)
+        k3 = tsfc_interface.compile_form(g*v*dx, 'form')
+        assert k3 is not k1
+        assert all(k1_[-1].kernel is k3_[-1].kernel for k1_, k3_ in zip(k1, k3))
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_fingerprint_cache_diverged():
+    """Compiling a shared form must not hang when the processes
+    disagree on whether it is in the fingerprint cache."""
+    mesh = UnitSquareMesh(2, 2)
+    V = FunctionSpace(mesh, "CG", 1)
+    f = Function(V)
+
+    def form():
+        return f*TestFunction(V)*dx
+
+    opts = parameters["kernel_cache"]
+    max_fingerprints = opts["max_fingerprints"]
+    opts["max_fingerprints"] = 1
+    try:
+        k1 = tsfc_interface.compile_form(form(), "form")
+        if mesh.comm.rank == 0:
+            # Evicts the shared form on this process only.
+            serial = UnitSquareMesh(1, 1, comm=COMM_SELF)
+            tsfc_interface.compile_form(TestFunction(FunctionSpace(serial, "DG", 0))*dx, "form")
+        k2 = tsfc_interface.compile_form(form(), "form")
+        assert all(a.kinfo.kernel is b.kinfo.kernel for a, b in zip(k1, k2))
+    finally:
+        opts["max_fingerprints"] = max_fingerprints
+
+
+def test_lru_cache():
+    from firedrake.utils import LRUCache
+    cache = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1
+    cache["c"] = 3
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.get("b") is None
+    assert cache.info() == {"hits": 1, "misses": 1, "evictions": 1,
+                            "currsize": 2, "maxsize": 2}
+
+
+def test_disk_cache_prune(tmpdir):
+    from firedrake_configuration import diskcache
+    shard = tmpdir.mkdir("ab")
+    now = time.time()
+    for i in range(4):
+        entry = shard.join("entry%d" % i)
+        entry.write("x" * 100)
+        # entry0 was used most recently
+        os.utime(str(entry), (now - i*86400, now - i*86400))
+    stats = diskcache.cache_stats(str(tmpdir))
+    assert stats["entries"] == 4 and stats["size"] == 400
+
+    assert diskcache.prune(str(tmpdir), max_age=2.5*86400) == (1, 100)
+    assert not shard.join("entry3").exists()
+
+    diskcache.touch(str(shard.join("entry2")))
+    assert diskcache.prune(str(tmpdir), max_size=250) == (1, 100)
+    assert sorted(f.basename for f in shard.listdir()) == ["entry0", "entry2"]
+
+    # Temporary files are only removed once they have been abandoned.
+    writing = shard.join("entry5_p1.tmp")
+    writing.write("x" * 100)
+    abandoned = shard.join("entry6_p1.tmp")
+    abandoned.write("x" * 100)
+    os.utime(str(abandoned), (now - 10*86400, now - 10*86400))
+    assert diskcache.prune(str(tmpdir), max_age=2.5*86400) == (1, 100)
+    assert writing.exists() and not abandoned.exists()
+    assert diskcache.prune(str(tmpdir), max_size=0) == (2, 200)
+    assert writing.exists()
+
+
+def test_disk_cache_record_store(tmpdir):
+    from firedrake_configuration import diskcache
+    shard = tmpdir.mkdir("ab")
+    now = time.time()
+    for i in range(4):
+        entry = shard.join("entry%d" % i)
+        entry.write("x" * 100)
+        os.utime(str(entry), (now - i*86400, now - i*86400))
+    # Under the limit: nothing is removed.
+    assert diskcache.record_store(str(tmpdir), 100, max_size=500) == (0, 0)
+    shard.join("entry4").write("x" * 100)
+    assert diskcache.record_store(str(tmpdir), 100, max_size=500) == (0, 0)
+    # Over the limit: prune to 80% of it.
+    shard.join("entry5").write("x" * 100)
+    assert diskcache.record_store(str(tmpdir), 100, max_size=500) == (2, 200)
+    assert not shard.join("entry3").exists() and not shard.join("entry2").exists()
+
+
+def test_disk_cache_read_missing(cache_key):
+    shard, key = cache_key[:2], cache_key[2:]
+    path = os.path.join(tsfc_interface.TSFCKernel._cachedir, shard, key)
+    # Pruned or truncated files are cache misses.
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        with open(path, "wb") as f:
+            f.write(data[:len(data) // 2])
+        assert tsfc_interface.TSFCKernel._read_file(cache_key) is None
+        os.remove(path)
+        assert tsfc_interface.TSFCKernel._read_file(cache_key) is None
+    finally:
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def test_disk_cache_records_use(cache_key):
+    from firedrake_configuration import diskcache
+    shard, key = cache_key[:2], cache_key[2:]
+    path = os.path.join(tsfc_interface.TSFCKernel._cachedir, shard, key)
+    os.utime(path, (0, 0))
+    tsfc_interface.TSFCKernel._read_from_disk(cache_key, COMM_WORLD)
+    assert os.path.getmtime(path) > 0
+    assert path in [entry[0] for entry in diskcache.cache_entries(tsfc_interface.TSFCKernel._cachedir)]
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_prefetch_kernels():
+    mesh = UnitSquareMesh(2, 2)
+    V = FunctionSpace(mesh, "CG", 1)
+
+    def forms():
+        u = TrialFunction(V)
+        v = TestFunction(V)
+        return [u*v*dx, inner(grad(u), grad(v))*dx]
+
+    for form in forms():
+        assemble(form)
+    # Only the disk cache has the kernels: otherwise compile_form
+    # could find them without prefetch_kernels doing anything.
+    tsfc_interface.TSFCKernel._cache.clear()
+    tsfc_interface._fingerprint_cache.clear()
+
+    assert tsfc_interface.prefetch_kernels(forms()) == 2
+    # Already loaded.
+    assert tsfc_interface.prefetch_kernels(forms()) == 0
+
+    misses = tsfc_interface.kernel_cache_info()["kernels"]["misses"]
+    for form in forms():
+        tsfc_interface.compile_form(form, "form")
+    assert tsfc_interface.kernel_cache_info()["kernels"]["misses"] == misses